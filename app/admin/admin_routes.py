@@ -1,6 +1,27 @@
-from fastapi import APIRouter, Request
-from fastapi.responses import HTMLResponse
+from datetime import date, datetime, timedelta
+from typing import List, Optional
+from fastapi import APIRouter, Request, Depends, UploadFile, File, HTTPException, Query
+from fastapi.responses import HTMLResponse, StreamingResponse
 from fastapi.templating import Jinja2Templates
+from sqlalchemy.orm import Session
+from app.auth.dependencies import get_current_user, get_current_admin
+from app.auth.token_cache import token_cache
+from app.database import get_pool_metrics, get_db
+from app.jobs.job_queue import job_queue_stats
+from app.jobs.sales_rollup import (
+    get_revenue_by_day, get_sales_summary, get_top_products, TOP_PRODUCTS_DEFAULT_LIMIT, TOP_PRODUCTS_MAX_LIMIT
+)
+from app.product.product_suggest import suggest_index
+from app.product.product_import import ProductImporter, ImportFormat, ConflictPolicy
+from app.admin.export_service import export_stream, ExportEntity, ExportFormat
+from app.admin.admin_schemas import (
+    MetricsResponse,
+    SuggestIndexRebuild,
+    ImportReport,
+    SalesDay,
+    SalesSummary,
+    ProductSalesItem,
+)
 
 router = APIRouter(prefix="/admin")
 templates = Jinja2Templates(directory="templates")
@@ -8,3 +29,105 @@ templates = Jinja2Templates(directory="templates")
 @router.get("/", response_class=HTMLResponse)
 async def admin_dashboard(request: Request):
     return templates.TemplateResponse("admin/dashboard.html", {"request": request})
+
+@router.get("/metrics", response_model=MetricsResponse, summary="Runtime cache and pool metrics")
+def get_metrics(db: Session = Depends(get_db), user: dict = Depends(get_current_admin)):
+    """
+    Returns hit/miss counters of the verified-token cache, connection pool statistics
+    the size of the product suggest index and the job queue backlog. (Requires admin)
+    """
+    return {
+        "token_cache": token_cache.stats(),
+        "db_pool": get_pool_metrics(),
+        "suggest_index": suggest_index.stats(),
+        "jobs": job_queue_stats(db)
+    }
+
+SALES_DEFAULT_DAYS = 30
+
+
+def _sales_range(date_from: Optional[date], date_to: Optional[date]):
+    date_to = date_to or datetime.utcnow().date()
+    date_from = date_from or date_to - timedelta(days=SALES_DEFAULT_DAYS - 1)
+    if date_from > date_to:
+        raise HTTPException(status_code=400, detail="date_from must not be after date_to")
+    return date_from, date_to
+
+@router.get("/sales/daily", response_model=List[SalesDay], summary="Revenue, orders and average basket per day")
+def sales_by_day(date_from: Optional[date] = None, date_to: Optional[date] = None,
+                 db: Session = Depends(get_db), user: dict = Depends(get_current_user)):
+    """
+    Returns the sales of each day in the range, the last 30 days by default. (Requires valid token)
+    Read from the daily rollup, so the cost grows with the number of days, not with the order lines.
+    """
+    date_from, date_to = _sales_range(date_from, date_to)
+    return get_revenue_by_day(db, date_from, date_to)
+
+@router.get("/sales/summary", response_model=SalesSummary, summary="Total revenue and average basket for a date range")
+def sales_summary(date_from: Optional[date] = None, date_to: Optional[date] = None,
+                  db: Session = Depends(get_db), user: dict = Depends(get_current_user)):
+    """
+    Returns order count, units, revenue and average basket value of the range,
+    the last 30 days by default. (Requires valid token)
+    """
+    date_from, date_to = _sales_range(date_from, date_to)
+    return get_sales_summary(db, date_from, date_to)
+
+@router.get("/sales/products", response_model=List[ProductSalesItem], summary="Units sold and revenue per product")
+def sales_by_product(limit: int = Query(TOP_PRODUCTS_DEFAULT_LIMIT, ge=1, le=TOP_PRODUCTS_MAX_LIMIT),
+                     db: Session = Depends(get_db), user: dict = Depends(get_current_user)):
+    """
+    Returns the best-selling products by units with their revenue. (Requires valid token)
+    """
+    return get_top_products(db, limit)
+
+@router.post("/products/suggest-index/rebuild", response_model=SuggestIndexRebuild,
+             summary="Reload the product autocomplete index")
+def rebuild_suggest_index(user: dict = Depends(get_current_user)):
+    """
+    Reloads this worker's product name index from the database. (Requires valid token)
+    """
+    return {"size": suggest_index.rebuild()}
+
+@router.post("/products/import", response_model=ImportReport, summary="Bulk import products from CSV or NDJSON")
+def import_products(
+    file: UploadFile = File(...),
+    file_format: Optional[ImportFormat] = None,
+    on_conflict: ConflictPolicy = "skip",
+    user: dict = Depends(get_current_admin)
+):
+    """
+    Streams a CSV (with header) or NDJSON product file into the catalog in chunks. (Requires admin)
+    Products whose name already exists are updated or skipped depending on on_conflict.
+    Returns insert/update/skip counts and a per-row error report.
+    """
+    if file_format is None:
+        extension = (file.filename or "").rsplit(".", 1)[-1].lower()
+        file_format = "ndjson" if extension in ("ndjson", "jsonl") else "csv"
+
+    try:
+        report = ProductImporter(on_conflict=on_conflict).run(file.file, file_format)
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="File must be UTF-8 encoded")
+    if report["inserted"]:
+        suggest_index.rebuild()
+    return report
+
+@router.get("/export/{entity}", summary="Stream a products, users or completed orders export")
+def export_data(
+    entity: ExportEntity,
+    export_format: ExportFormat = "ndjson",
+    gzip: bool = True,
+    user: dict = Depends(get_current_admin)
+):
+    """
+    Streams the full table as NDJSON or CSV, gzip-compressed by default. (Requires admin)
+    Rows are read through a server-side cursor, so memory use stays flat for any table size.
+    """
+    filename = f"{entity}.{export_format}" + (".gz" if gzip else "")
+    media_type = "application/gzip" if gzip else ("text/csv" if export_format == "csv" else "application/x-ndjson")
+    return StreamingResponse(
+        export_stream(entity, export_format, compress=gzip),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
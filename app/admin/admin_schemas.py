@@ -0,0 +1,71 @@
+from typing import Optional, List
+from pydantic import BaseModel
+
+
+class TokenCacheStats(BaseModel):
+    size: int
+    max_size: int
+    hits: int
+    misses: int
+    hit_ratio: float
+
+
+class SuggestIndexStats(BaseModel):
+    size: int
+    loaded_at: Optional[float] = None
+
+
+class JobQueueStats(BaseModel):
+    counts: dict
+    lag_seconds: float
+
+
+class MetricsResponse(BaseModel):
+    token_cache: TokenCacheStats
+    db_pool: dict
+    suggest_index: SuggestIndexStats
+    jobs: JobQueueStats
+
+
+class SuggestIndexRebuild(BaseModel):
+    size: int
+
+
+class ImportRowError(BaseModel):
+    row: int
+    error: str
+
+
+class ImportReport(BaseModel):
+    rows: int
+    inserted: int
+    updated: int
+    clamped: int
+    skipped: int
+    invalid: int
+    folder_errors: int
+    errors: List[ImportRowError]
+
+
+class SalesDay(BaseModel):
+    day: str
+    order_count: int
+    units: int
+    revenue: float
+    average_basket: float
+
+
+class SalesSummary(BaseModel):
+    date_from: str
+    date_to: str
+    order_count: int
+    units: int
+    revenue: float
+    average_basket: float
+
+
+class ProductSalesItem(BaseModel):
+    product_id: int
+    name: str
+    units: int
+    revenue: float
@@ -0,0 +1,136 @@
+import csv
+import io
+import os
+import zlib
+from typing import Iterable, Iterator, Literal, Sequence
+import orjson
+from sqlalchemy import select
+from app.database import SessionLocal
+from app.models import Product, User, Order, OrderItem
+from app.order.order_queries import COMPLETED_STATUS
+
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+
+ExportEntity = Literal["products", "users", "orders"]
+ExportFormat = Literal["ndjson", "csv"]
+
+PRODUCT_COLUMNS = ("id", "name", "unit", "price", "description", "stock", "image_path", "created_at", "updated_at")
+USER_COLUMNS = ("id", "first_name", "last_name", "email", "company", "is_admin", "birth_date", "created_at", "updated_at")
+ORDER_COLUMNS = ("order_id", "user_id", "date", "status", "total_amount", "item_count")
+ORDER_ITEM_COLUMNS = ("product_id", "quantity", "unit_price")
+
+
+def _export_query(entity: ExportEntity):
+    if entity == "products":
+        return select(*[getattr(Product, name) for name in PRODUCT_COLUMNS]).order_by(Product.id)
+    if entity == "users":
+        return select(*[getattr(User, name) for name in USER_COLUMNS]).order_by(User.id)
+    return (
+        select(
+            Order.id.label("order_id"), Order.user_id, Order.date, Order.status, Order.total_amount, Order.item_count,
+            OrderItem.product_id, OrderItem.quantity, OrderItem.unit_price
+        )
+        .join(OrderItem, OrderItem.order_id == Order.id)
+        .where(Order.status == COMPLETED_STATUS)
+        .order_by(Order.id, OrderItem.id)
+    )
+
+
+def stream_rows(entity: ExportEntity, batch_size: int = EXPORT_BATCH_SIZE) -> Iterator[Sequence[dict]]:
+    """
+    Reads an export through a server-side cursor in batches.
+
+    The session is owned by the generator and closed when the stream ends or
+    the client disconnects, independent of the request lifecycle.
+
+    Args:
+        entity (ExportEntity): "products", "users" or "orders" (completed orders with items).
+        batch_size (int): Number of rows fetched from the cursor at a time.
+
+    Yields:
+        Sequence[dict]: One batch of rows as dictionaries.
+    """
+    db = SessionLocal()
+    try:
+        result = db.execute(
+            _export_query(entity).execution_options(stream_results=True, yield_per=batch_size)
+        )
+        for partition in result.mappings().partitions():
+            yield partition
+    finally:
+        db.close()
+
+
+def _group_order_items(batches: Iterable[Sequence[dict]]) -> Iterator[list]:
+    """
+    Folds the order/item join rows (sorted by order id) into one record per order.
+    """
+    current = None
+    for batch in batches:
+        records = []
+        for row in batch:
+            if current is None or current["order_id"] != row["order_id"]:
+                if current is not None:
+                    records.append(current)
+                current = {name: row[name] for name in ORDER_COLUMNS}
+                current["items"] = []
+            current["items"].append({name: row[name] for name in ORDER_ITEM_COLUMNS})
+        yield records
+    if current is not None:
+        yield [current]
+
+
+def _encode_ndjson(batches: Iterable[Sequence[dict]]) -> Iterator[bytes]:
+    for batch in batches:
+        yield b"".join(orjson.dumps(dict(row), default=str) + b"\n" for row in batch)
+
+
+def _encode_csv(batches: Iterable[Sequence[dict]], columns: Sequence[str]) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    # The header goes out before the first row is read, so an empty export still has one
+    writer.writerow(columns)
+    yield buffer.getvalue().encode("utf-8")
+    buffer.seek(0)
+    buffer.truncate()
+    for batch in batches:
+        writer.writerows([row[name] for name in columns] for row in batch)
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+
+
+def _gzip(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def export_stream(entity: ExportEntity, export_format: ExportFormat, compress: bool = True) -> Iterator[bytes]:
+    """
+    Streams a full export as NDJSON or CSV, optionally gzip-compressed.
+
+    Rows are read, encoded and compressed batch by batch, so worker memory stays
+    bounded by one batch regardless of the table size. Completed orders are written
+    as one NDJSON record with nested items per order, or one CSV line per item.
+
+    Args:
+        entity (ExportEntity): "products", "users" or "orders".
+        export_format (ExportFormat): "ndjson" or "csv".
+        compress (bool): Whether to gzip the stream.
+
+    Returns:
+        Iterator[bytes]: The encoded export.
+    """
+    batches = stream_rows(entity)
+    if export_format == "ndjson":
+        if entity == "orders":
+            batches = _group_order_items(batches)
+        chunks = _encode_ndjson(batches)
+    else:
+        columns = {"products": PRODUCT_COLUMNS, "users": USER_COLUMNS}.get(entity, ORDER_COLUMNS + ORDER_ITEM_COLUMNS)
+        chunks = _encode_csv(batches, columns)
+    return _gzip(chunks) if compress else chunks
@@ -0,0 +1,52 @@
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from app.database import (
+    DATABASE_URL,
+    DB_POOL_SIZE,
+    DB_MAX_OVERFLOW,
+    DB_POOL_TIMEOUT,
+    DB_POOL_RECYCLE,
+    DB_POOL_PRE_PING,
+    DB_STATEMENT_TIMEOUT_MS,
+)
+
+# Same database as the sync engine, accessed through the asyncpg driver
+ASYNC_DATABASE_URL = make_url(DATABASE_URL).set(drivername="postgresql+asyncpg")
+
+server_settings = {}
+if DB_STATEMENT_TIMEOUT_MS > 0:
+    server_settings["statement_timeout"] = str(DB_STATEMENT_TIMEOUT_MS)
+
+# Create an async SQLAlchemy engine with the same pool settings as the sync engine
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL,
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+    pool_timeout=DB_POOL_TIMEOUT,
+    pool_recycle=DB_POOL_RECYCLE,
+    pool_pre_ping=DB_POOL_PRE_PING,
+    connect_args={"server_settings": server_settings}
+)
+
+# Objects stay usable after commit; lazy loads are not possible on an AsyncSession
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+
+async def get_async_db():
+    """
+    Provides an async database session for dependency injection in FastAPI routes.
+
+    Counterpart of `get_db` for the async backend: the session is rolled back
+    if the route raises and is always closed afterwards.
+
+    Yields:
+        AsyncSession: A SQLAlchemy async database session.
+    """
+    db: AsyncSession = AsyncSessionLocal()
+    try:
+        yield db
+    except Exception:
+        await db.rollback()
+        raise
+    finally:
+        await db.close()
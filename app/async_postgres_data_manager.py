@@ -0,0 +1,129 @@
+from sqlalchemy import select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm.exc import StaleDataError
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Union, Tuple
+from app.models import User, Product, Order, OrderItem, Invoice, Reminder, Shipment
+from app.data_manager_interface import DataManagerInterface
+from app.concurrency import ConcurrentUpdateError
+
+
+class AsyncPostgresDataManager(DataManagerInterface):
+    """
+    Asynchronous implementation of the DataManagerInterface for PostgreSQL using
+    SQLAlchemy's asyncio extension. Offers the same operations as PostgresDataManager
+    as coroutines, so routes never block a threadpool slot while waiting on the database.
+    """
+
+    def __init__(self, db: AsyncSession):
+        """
+        Initializes the data manager with an async database session.
+
+        Args:
+            db (AsyncSession): The session to work with.
+        """
+        self.db = db
+
+    async def rollback(self) -> None:
+        """
+        Rolls back all uncommitted changes of the current session.
+        """
+        await self.db.rollback()
+
+    async def close(self) -> None:
+        """
+        Closes the session and returns its connection to the pool.
+        """
+        await self.db.close()
+
+    async def commit_only(self) -> Tuple[Union[str, dict], int]:
+        """
+        Commits the current database session.
+
+        Returns:
+            Tuple containing an empty string and 200 on success,
+            or an error message and 500 on failure.
+
+        Raises:
+            ConcurrentUpdateError: If a versioned row was changed by another transaction since it was read.
+        """
+        try:
+            await self.db.commit()
+            return "", 200
+        except StaleDataError as error:
+            await self.db.rollback()
+            raise ConcurrentUpdateError(str(error))
+        except SQLAlchemyError:
+            await self.db.rollback()
+            return {'error': 'Sorry, something went wrong while processing your request. Please try again in a few moments.'}, 500
+
+    async def add_element(self, element: Union[User, Product, Order, OrderItem, Invoice, Reminder, Shipment]) -> Tuple[dict, int]:
+        """
+        Adds a new database object and commits the transaction.
+
+        Args:
+            element: A SQLAlchemy model instance to add to the database.
+
+        Returns:
+            Tuple containing an empty string and 200 on success,
+            or an error message and 500 on failure.
+        """
+        try:
+            self.db.add(element)
+            return await self.commit_only()
+        except SQLAlchemyError:
+            return {'error': 'Sorry, something went wrong while processing your request. Please try again in a few moments.'}, 500
+
+    async def get_by_id(self, model, element_id: int):
+        """
+        Retrieves a database record by its ID.
+
+        Args:
+            model: The SQLAlchemy model class.
+            element_id: The ID of the element to retrieve.
+
+        Returns:
+            The found object on success,
+            or an error dictionary and status code on failure.
+        """
+        try:
+            return await self.db.get(model, element_id)
+        except SQLAlchemyError:
+            return {
+                'error': 'Sorry, something went wrong while processing your request. Please try again in a few moments.'}, 500
+
+    async def get_all(self, model):
+        """
+        Retrieves all records for a given model.
+
+        Args:
+            model: The SQLAlchemy model class.
+
+        Returns:
+            A list of all model instances on success,
+            or an error dictionary and status code on failure.
+        """
+        try:
+            result = await self.db.execute(select(model))
+            return result.scalars().all()
+        except SQLAlchemyError:
+            return {
+                'error': 'Sorry, something went wrong while processing your request. Please try again in a few moments.'}, 500
+
+    async def delete_element(self, element) -> Tuple[Union[str, dict], int]:
+        """
+        Deletes a given object and commits the transaction.
+
+        Args:
+            element: The SQLAlchemy model instance to delete.
+
+        Returns:
+            Tuple containing an empty string and 200 on success,
+            or an error message and 500 on failure.
+        """
+        try:
+            await self.db.delete(element)
+            return await self.commit_only()
+        except SQLAlchemyError:
+            return {
+                'error': 'Sorry, something went wrong while processing your request. Please try again in a few moments.'}, 500
@@ -1,48 +1,79 @@
 from jose import jwt
 from jose.exceptions import JWTError, ExpiredSignatureError, JWTClaimsError
 
-import requests
 from fastapi import HTTPException
 from os import getenv
+from app.auth.jwks_cache import jwks_cache
+from app.auth.token_cache import token_cache
 
 AUTH0_DOMAIN = getenv("AUTH0_DOMAIN")
 API_AUDIENCE = getenv("AUTH0_API_AUDIENCE")
 ALGORITHMS = [getenv("AUTH0_ALGORITHMS") or "RS256"]
 
 def get_jwk_keys():
-    jwks_url = f"https://{AUTH0_DOMAIN}/.well-known/jwks.json"
-    response = requests.get(jwks_url)
-    if response.status_code != 200:
+    try:
+        return jwks_cache.get_keys()
+    except RuntimeError:
         raise HTTPException(status_code=500, detail="Unable to fetch JWK keys")
-    return response.json()["keys"]
+
+def get_rsa_key(token: str) -> dict:
+    """
+    Looks up the public key matching the token's `kid` in the shared JWKS cache.
+
+    Args:
+        token (str): The encoded JWT.
+
+    Returns:
+        dict: The RSA key in JWK format, or an empty dict if no key matches.
+    """
+    unverified_header = jwt.get_unverified_header(token)
+    key = jwks_cache.get_key(unverified_header["kid"])
+    if not key:
+        return {}
+    return {
+        "kty": key["kty"],
+        "kid": key["kid"],
+        "use": key["use"],
+        "n": key["n"],
+        "e": key["e"]
+    }
+
+def decode_token(token: str) -> dict:
+    """
+    Verifies the token signature and claims and returns its payload.
+    Tokens verified before are served from the shared token cache until they expire.
+
+    Args:
+        token (str): The encoded JWT.
+
+    Returns:
+        dict: The verified token claims.
+
+    Raises:
+        HTTPException: If no matching signing key is found.
+        JWTError: If the signature or claims are invalid.
+    """
+    payload = token_cache.get(token)
+    if payload is not None:
+        return payload
+
+    rsa_key = get_rsa_key(token)
+    if not rsa_key:
+        raise HTTPException(status_code=401, detail="Appropriate key not found")
+
+    payload = jwt.decode(
+        token,
+        key=rsa_key,
+        algorithms=ALGORITHMS,
+        audience=API_AUDIENCE,
+        issuer=f"https://{AUTH0_DOMAIN}/"
+    )
+    token_cache.put(token, payload)
+    return payload
 
 def get_current_user_data(token: str) -> dict:
     try:
-        unverified_header = jwt.get_unverified_header(token)
-        jwks = get_jwk_keys()
-        rsa_key = {}
-
-        for key in jwks:
-            if key["kid"] == unverified_header["kid"]:
-                rsa_key = {
-                    "kty": key["kty"],
-                    "kid": key["kid"],
-                    "use": key["use"],
-                    "n": key["n"],
-                    "e": key["e"]
-                }
-                break
-
-        if not rsa_key:
-            raise HTTPException(status_code=401, detail="Appropriate key not found")
-
-        payload = jwt.decode(
-            token,
-            key=rsa_key,
-            algorithms=ALGORITHMS,
-            audience=API_AUDIENCE,
-            issuer=f"https://{AUTH0_DOMAIN}/"
-        )
+        payload = decode_token(token)
         return {
             "sub": payload.get("sub"),
             "email": payload.get("email"),
@@ -50,9 +81,11 @@ def get_current_user_data(token: str) -> dict:
             "last_name": payload.get("family_name")
         }
 
-    except jwt.ExpiredSignatureError:
+    except HTTPException:
+        raise
+    except ExpiredSignatureError:
         raise HTTPException(status_code=401, detail="Token expired")
-    except jwt.JWTClaimsError:
+    except JWTClaimsError:
         raise HTTPException(status_code=401, detail="Incorrect claims. Check audience and issuer.")
     except Exception as e:
         raise HTTPException(status_code=401, detail=f"Token validation failed: {str(e)}")
@@ -1,44 +1,41 @@
 from fastapi import Depends, HTTPException
-from jose import jwt, JWTError
-from auth.jwt_bearer import JWTBearer
-import os
-import requests
-
-AUTH0_DOMAIN = os.getenv("AUTH0_DOMAIN")
-API_AUDIENCE = os.getenv("AUTH0_API_AUDIENCE")
-ALGORITHMS = [os.getenv("AUTH0_ALGORITHMS")]
+from jose import JWTError
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from app.auth.jwt_bearer import JWTBearer
+from app.auth.auth_utils import decode_token
+from app.database import get_db
+from app.models import User
 
 def get_current_user(token: str = Depends(JWTBearer())):
     try:
-        jwks_url = f"https://{AUTH0_DOMAIN}/.well-known/jwks.json"
-        jwks = requests.get(jwks_url).json()
-        unverified_header = jwt.get_unverified_header(token)
-        rsa_key = {}
-
-        for key in jwks["keys"]:
-            if key["kid"] == unverified_header["kid"]:
-                rsa_key = {
-                    "kty": key["kty"],
-                    "kid": key["kid"],
-                    "use": key["use"],
-                    "n": key["n"],
-                    "e": key["e"]
-                }
-                break
-
-        if rsa_key:
-            payload = jwt.decode(
-                token,
-                rsa_key,
-                algorithms=ALGORITHMS,
-                audience=API_AUDIENCE,
-                issuer=f"https://{AUTH0_DOMAIN}/"
-            )
-            return payload
-        else:
-            raise HTTPException(status_code=401, detail="Unable to find appropriate key")
+        return decode_token(token)
 
+    except HTTPException:
+        raise
     except JWTError as e:
         raise HTTPException(status_code=401, detail="Invalid token")
     except Exception as e:
         raise HTTPException(status_code=401, detail="Token verification failed")
+
+def get_current_admin(user: dict = Depends(get_current_user), db: Session = Depends(get_db)) -> dict:
+    """
+    Resolves the token's email to a shop user and only lets admins through.
+
+    Args:
+        user (dict): The verified token payload.
+        db (Session): Database session of the request.
+
+    Returns:
+        dict: The token payload of the admin.
+
+    Raises:
+        HTTPException: 403 if the token belongs to no user or to a user without admin privileges.
+    """
+    email = user.get("email")
+    is_admin = email is not None and db.execute(
+        select(User.is_admin).where(User.email == email)
+    ).scalar_one_or_none()
+    if not is_admin:
+        raise HTTPException(status_code=403, detail="Admin privileges required")
+    return user
@@ -0,0 +1,229 @@
+import json
+import logging
+import os
+import re
+import threading
+import time
+from typing import Optional, Tuple
+
+import requests
+from dotenv import load_dotenv
+from app.auth.local_keys import auth_dev_mode, ensure_local_keys
+
+load_dotenv()  # .env laden
+
+logger = logging.getLogger(__name__)
+
+AUTH0_DOMAIN = os.getenv("AUTH0_DOMAIN")
+# A local key set replaces Auth0 only together with AUTH_DEV_MODE=true. AUTH0_JWKS_FILE=local
+# uses a throwaway key pair generated on first use (see local_keys and `python get_token.py --local`).
+JWKS_FILE = os.getenv("AUTH0_JWKS_FILE")
+if JWKS_FILE and not auth_dev_mode():
+    raise RuntimeError("AUTH0_JWKS_FILE is only allowed with AUTH_DEV_MODE=true")
+if JWKS_FILE == "local":
+    JWKS_FILE = ensure_local_keys()[0]
+JWKS_DEFAULT_TTL = int(os.getenv("JWKS_DEFAULT_TTL", "600"))
+JWKS_REFRESH_MARGIN = int(os.getenv("JWKS_REFRESH_MARGIN", "60"))
+JWKS_MIN_REFRESH_INTERVAL = int(os.getenv("JWKS_MIN_REFRESH_INTERVAL", "30"))
+JWKS_REQUEST_TIMEOUT = float(os.getenv("JWKS_REQUEST_TIMEOUT", "5"))
+
+_MAX_AGE_PATTERN = re.compile(r"max-age=(\d+)")
+
+
+def parse_max_age(cache_control: Optional[str]) -> Optional[int]:
+    """
+    Extracts the max-age value from a Cache-Control header.
+
+    Args:
+        cache_control (Optional[str]): The raw Cache-Control header value.
+
+    Returns:
+        Optional[int]: The max-age in seconds, 0 for no-cache/no-store,
+        or None if the header does not specify a lifetime.
+    """
+    if not cache_control:
+        return None
+    if "no-store" in cache_control or "no-cache" in cache_control:
+        return 0
+    match = _MAX_AGE_PATTERN.search(cache_control)
+    return int(match.group(1)) if match else None
+
+
+class JWKSCache:
+    """
+    Thread-safe cache for the JSON Web Key Set used to verify Auth0 tokens.
+
+    Keys are indexed by their `kid`. The cache lifetime follows the endpoint's
+    Cache-Control header, a background thread refreshes the keys shortly before
+    they expire, and an unknown `kid` triggers an immediate refetch that is
+    rate-limited to protect Auth0 from token floods with forged key IDs.
+    If a local JWKS file is configured, keys are read from it instead of Auth0.
+    """
+
+    def __init__(self, jwks_url: Optional[str] = None, jwks_file: Optional[str] = None,
+                 default_ttl: int = JWKS_DEFAULT_TTL, refresh_margin: int = JWKS_REFRESH_MARGIN,
+                 min_refresh_interval: int = JWKS_MIN_REFRESH_INTERVAL):
+        """
+        Initializes an empty cache.
+
+        Args:
+            jwks_url (Optional[str]): URL of the JWKS endpoint. Defaults to the Auth0 tenant URL.
+            jwks_file (Optional[str]): Path to a local JWKS file that replaces the HTTP fetch.
+            default_ttl (int): Lifetime in seconds if the endpoint sends no max-age.
+            refresh_margin (int): Seconds before expiry at which the background refresh runs.
+            min_refresh_interval (int): Minimum seconds between two fetches triggered by unknown kids.
+        """
+        self.jwks_url = jwks_url or f"https://{AUTH0_DOMAIN}/.well-known/jwks.json"
+        self.jwks_file = jwks_file
+        self.default_ttl = default_ttl
+        self.refresh_margin = refresh_margin
+        self.min_refresh_interval = min_refresh_interval
+
+        self._keys: dict = {}
+        self._expires_at = 0.0
+        self._last_fetch: Optional[float] = None
+        self._lock = threading.Lock()
+        self._fetch_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._refresh_thread: Optional[threading.Thread] = None
+
+    def _fetch(self) -> Tuple[list, int]:
+        """
+        Loads the key set from the local file or the JWKS endpoint.
+
+        Returns:
+            Tuple[list, int]: The list of JWKs and their lifetime in seconds.
+
+        Raises:
+            RuntimeError: If the keys cannot be loaded.
+        """
+        if self.jwks_file:
+            try:
+                with open(self.jwks_file, encoding="utf-8") as jwks_file:
+                    return json.load(jwks_file)["keys"], self.default_ttl
+            except (OSError, ValueError, KeyError) as error:
+                raise RuntimeError(f"Unable to read JWK keys from {self.jwks_file}: {error}")
+
+        try:
+            response = requests.get(self.jwks_url, timeout=JWKS_REQUEST_TIMEOUT)
+        except requests.RequestException as error:
+            raise RuntimeError(f"Unable to fetch JWK keys: {error}")
+        if response.status_code != 200:
+            raise RuntimeError(f"Unable to fetch JWK keys: {response.status_code}")
+
+        max_age = parse_max_age(response.headers.get("Cache-Control"))
+        ttl = self.default_ttl if max_age is None else max(max_age, self.min_refresh_interval)
+        return response.json()["keys"], ttl
+
+    def refresh(self) -> None:
+        """
+        Fetches the key set and replaces the cached keys.
+
+        Raises:
+            RuntimeError: If the keys cannot be loaded. The previously cached keys are kept.
+        """
+        with self._lock:
+            self._last_fetch = time.monotonic()
+        keys, ttl = self._fetch()
+        with self._lock:
+            self._keys = {key["kid"]: key for key in keys if "kid" in key}
+            self._expires_at = time.monotonic() + ttl
+        logger.info(f"Loaded {len(keys)} JWK keys (ttl {ttl}s)")
+
+    def get_key(self, kid: str) -> Optional[dict]:
+        """
+        Returns the JWK for the given key ID.
+
+        The key set is only fetched synchronously if it was never loaded, has
+        expired without a running background refresh, or does not contain the
+        requested kid and the last fetch is older than the minimum refresh interval.
+
+        Args:
+            kid (str): The key ID from the token header.
+
+        Returns:
+            Optional[dict]: The matching JWK, or None if the key is unknown.
+        """
+        now = time.monotonic()
+        with self._lock:
+            key = self._keys.get(kid)
+            expired = now >= self._expires_at
+            may_refetch = self._last_fetch is None or now - self._last_fetch >= self.min_refresh_interval
+            background_active = self._refresh_thread is not None and self._refresh_thread.is_alive()
+
+        if key is not None and (not expired or background_active or not may_refetch):
+            return key
+        if key is None and not may_refetch:
+            return None
+
+        with self._fetch_lock:
+            # Another thread may have refreshed the keys while this one was waiting
+            with self._lock:
+                refreshed_meanwhile = self._last_fetch is not None and self._last_fetch >= now
+            if not refreshed_meanwhile:
+                try:
+                    self.refresh()
+                except RuntimeError as error:
+                    logger.error(str(error))
+                    return key
+
+        with self._lock:
+            return self._keys.get(kid)
+
+    def get_keys(self) -> list:
+        """
+        Returns all cached JWKs, loading them first if the cache is empty or expired.
+
+        Returns:
+            list: The cached JWKs.
+        """
+        with self._lock:
+            stale = not self._keys or time.monotonic() >= self._expires_at
+        if stale:
+            self.refresh()
+        with self._lock:
+            return list(self._keys.values())
+
+    def _refresh_loop(self) -> None:
+        """
+        Background loop that refreshes the key set shortly before it expires.
+        On failure the stale keys stay in use and the fetch is retried after
+        the minimum refresh interval.
+        """
+        while not self._stop_event.is_set():
+            with self._lock:
+                delay = self._expires_at - self.refresh_margin - time.monotonic()
+            if self._stop_event.wait(max(delay, 1)):
+                break
+            try:
+                self.refresh()
+            except RuntimeError as error:
+                logger.warning(f"Background JWKS refresh failed: {error}")
+                self._stop_event.wait(self.min_refresh_interval)
+
+    def start(self) -> None:
+        """
+        Prefetches the key set and starts the background refresh thread.
+        A failed prefetch is logged; the keys are then loaded on first use.
+        """
+        try:
+            self.refresh()
+        except RuntimeError as error:
+            logger.error(f"JWKS prefetch failed: {error}")
+
+        if self._refresh_thread is None or not self._refresh_thread.is_alive():
+            self._stop_event.clear()
+            self._refresh_thread = threading.Thread(target=self._refresh_loop, name="jwks-refresh", daemon=True)
+            self._refresh_thread.start()
+
+    def stop(self) -> None:
+        """
+        Stops the background refresh thread.
+        """
+        self._stop_event.set()
+        if self._refresh_thread is not None:
+            self._refresh_thread.join(timeout=1)
+            self._refresh_thread = None
+
+
+jwks_cache = JWKSCache(jwks_file=JWKS_FILE)
@@ -1,12 +1,7 @@
 from fastapi import Request, HTTPException
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from jose import jwt, JWTError
-import requests
-import os
-
-AUTH0_DOMAIN = os.getenv("AUTH0_DOMAIN")
-API_AUDIENCE = os.getenv("AUTH0_API_AUDIENCE")
-ALGORITHMS = [os.getenv("AUTH0_ALGORITHMS")]
+from jose import JWTError
+from app.auth.auth_utils import decode_token
 
 class JWTBearer(HTTPBearer):
     def __init__(self, auto_error: bool = True):
@@ -25,31 +20,8 @@ class JWTBearer(HTTPBearer):
 
     def verify_jwt(self, token: str) -> bool:
         try:
-            jwks_url = f"https://{AUTH0_DOMAIN}/.well-known/jwks.json"
-            jwks = requests.get(jwks_url).json()
-            unverified_header = jwt.get_unverified_header(token)
-            rsa_key = {}
-
-            for key in jwks["keys"]:
-                if key["kid"] == unverified_header["kid"]:
-                    rsa_key = {
-                        "kty": key["kty"],
-                        "kid": key["kid"],
-                        "use": key["use"],
-                        "n": key["n"],
-                        "e": key["e"]
-                    }
-                    break
-
-            if rsa_key:
-                payload = jwt.decode(
-                    token,
-                    rsa_key,
-                    algorithms=ALGORITHMS,
-                    audience=API_AUDIENCE,
-                    issuer=f"https://{AUTH0_DOMAIN}/"
-                )
-                return True
+            decode_token(token)
+            return True
         except JWTError:
             return False
         except Exception:
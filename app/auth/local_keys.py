@@ -0,0 +1,61 @@
+import base64
+import json
+import os
+from typing import Optional, Tuple
+
+# Throwaway key pair for offline development; generated on first use, never committed
+LOCAL_KEYS_DIR = ".local_auth"
+LOCAL_KEY_ID = "local-dev"
+
+
+def auth_dev_mode() -> bool:
+    """
+    Tells whether the explicit development flag is set that allows local signing keys.
+
+    Returns:
+        bool: True if AUTH_DEV_MODE is set to 1/true/yes.
+    """
+    return os.getenv("AUTH_DEV_MODE", "false").lower() in ("1", "true", "yes")
+
+
+def ensure_local_keys(directory: Optional[str] = None) -> Tuple[str, str]:
+    """
+    Returns the local JWKS file and signing key, generating a fresh RSA key pair if none exists yet.
+
+    Args:
+        directory (Optional[str]): Directory holding the generated files (outside the app package).
+            Defaults to AUTH_LOCAL_KEYS_DIR or .local_auth.
+
+    Returns:
+        Tuple[str, str]: Paths of the JWKS file and of the PEM private key.
+
+    Raises:
+        RuntimeError: If AUTH_DEV_MODE is not set.
+    """
+    if not auth_dev_mode():
+        raise RuntimeError("Local signing keys are only available with AUTH_DEV_MODE=true")
+
+    directory = directory or os.getenv("AUTH_LOCAL_KEYS_DIR", LOCAL_KEYS_DIR)
+    jwks_path = os.path.join(directory, "jwks.json")
+    key_path = os.path.join(directory, "signing_key.pem")
+    if os.path.exists(jwks_path) and os.path.exists(key_path):
+        return jwks_path, key_path
+
+    # Imported lazily: the rsa package comes with python-jose, but is only needed here
+    import rsa
+
+    def b64url(number: int) -> str:
+        raw = number.to_bytes((number.bit_length() + 7) // 8, "big")
+        return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+    public_key, private_key = rsa.newkeys(2048)
+    os.makedirs(directory, exist_ok=True)
+    with open(os.open(key_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), "wb") as key_file:
+        key_file.write(private_key.save_pkcs1())
+    jwks = {"keys": [{
+        "kty": "RSA", "use": "sig", "alg": "RS256", "kid": LOCAL_KEY_ID,
+        "n": b64url(public_key.n), "e": b64url(public_key.e)
+    }]}
+    with open(jwks_path, "w", encoding="utf-8") as jwks_file:
+        json.dump(jwks, jwks_file, indent=2)
+    return jwks_path, key_path
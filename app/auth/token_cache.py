@@ -0,0 +1,107 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "10000"))
+
+
+class VerifiedTokenCache:
+    """
+    Bounded LRU cache for the claims of already verified JWTs.
+
+    Entries are keyed by the SHA-256 digest of the raw token, so the tokens
+    themselves are never kept in memory, and each entry expires at the token's
+    own `exp` claim. Hit and miss counters are kept for monitoring.
+    """
+
+    def __init__(self, max_size: int = TOKEN_CACHE_SIZE):
+        """
+        Initializes an empty cache.
+
+        Args:
+            max_size (int): Maximum number of tokens kept before the least recently used is evicted.
+        """
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _digest(token: str) -> str:
+        return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+    def get(self, token: str) -> Optional[dict]:
+        """
+        Returns the cached claims for a token if it was verified before and has not expired.
+
+        Args:
+            token (str): The encoded JWT.
+
+        Returns:
+            Optional[dict]: The verified claims, or None on a cache miss.
+        """
+        digest = self._digest(token)
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is not None:
+                expires_at, claims = entry
+                if time.time() < expires_at:
+                    self._entries.move_to_end(digest)
+                    self.hits += 1
+                    return claims
+                del self._entries[digest]
+            self.misses += 1
+            return None
+
+    def put(self, token: str, claims: dict) -> None:
+        """
+        Stores the verified claims of a token until its `exp` claim.
+        Tokens without an `exp` claim are not cached.
+
+        Args:
+            token (str): The encoded JWT.
+            claims (dict): The verified token claims.
+        """
+        expires_at = claims.get("exp")
+        if not isinstance(expires_at, (int, float)) or expires_at <= time.time():
+            return
+
+        digest = self._digest(token)
+        with self._lock:
+            self._entries[digest] = (expires_at, claims)
+            self._entries.move_to_end(digest)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """
+        Removes all cached tokens and resets the counters.
+        """
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict:
+        """
+        Returns the current size and hit/miss counters of the cache.
+
+        Returns:
+            dict: Cache size, capacity, hits, misses and hit ratio.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0
+            }
+
+
+token_cache = VerifiedTokenCache()
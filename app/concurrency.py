@@ -0,0 +1,88 @@
+import asyncio
+import functools
+import logging
+import os
+import random
+import time
+from typing import Callable
+
+logger = logging.getLogger(__name__)
+
+CONFLICT_RETRY_ATTEMPTS = int(os.getenv("CONFLICT_RETRY_ATTEMPTS", "4"))
+CONFLICT_RETRY_BASE_DELAY = float(os.getenv("CONFLICT_RETRY_BASE_DELAY", "0.01"))
+CONFLICT_RETRY_MAX_DELAY = float(os.getenv("CONFLICT_RETRY_MAX_DELAY", "0.2"))
+
+CONFLICT_RESPONSE = (
+    {"error": "The record was changed by another request at the same time. Please reload and try again."},
+    409
+)
+
+
+class ConcurrentUpdateError(Exception):
+    """
+    Raised when a commit fails because a versioned row (Product, Order) was
+    changed by another transaction after it was read.
+    """
+
+    def __init__(self, message: str = "Concurrent update detected"):
+        super().__init__(message)
+
+
+def conflict_backoff(attempt: int) -> float:
+    """
+    Returns the delay before the given retry, growing exponentially with full jitter.
+
+    Args:
+        attempt (int): 1-based number of the retry.
+
+    Returns:
+        float: Seconds to wait.
+    """
+    return random.uniform(0, min(CONFLICT_RETRY_MAX_DELAY, CONFLICT_RETRY_BASE_DELAY * 2 ** (attempt - 1)))
+
+
+def retry_on_conflict(method: Callable) -> Callable:
+    """
+    Retries a service method that raised ConcurrentUpdateError with bounded backoff.
+
+    The data manager has already rolled the session back when the error is
+    raised, so every attempt reads fresh rows. After CONFLICT_RETRY_ATTEMPTS
+    attempts the method returns a 409 error tuple. Works for sync and async
+    service methods.
+
+    Args:
+        method (Callable): The service method; it must re-read the rows it changes.
+
+    Returns:
+        Callable: The wrapped method.
+    """
+    if asyncio.iscoroutinefunction(method):
+        @functools.wraps(method)
+        async def async_wrapper(*args, **kwargs):
+            for attempt in range(1, CONFLICT_RETRY_ATTEMPTS + 1):
+                try:
+                    return await method(*args, **kwargs)
+                except ConcurrentUpdateError:
+                    if attempt == CONFLICT_RETRY_ATTEMPTS:
+                        break
+                    logger.info(f"{method.__qualname__}: version conflict, retry {attempt}")
+                    await asyncio.sleep(conflict_backoff(attempt))
+            logger.warning(f"{method.__qualname__}: giving up after {CONFLICT_RETRY_ATTEMPTS} version conflicts")
+            return CONFLICT_RESPONSE
+
+        return async_wrapper
+
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        for attempt in range(1, CONFLICT_RETRY_ATTEMPTS + 1):
+            try:
+                return method(*args, **kwargs)
+            except ConcurrentUpdateError:
+                if attempt == CONFLICT_RETRY_ATTEMPTS:
+                    break
+                logger.info(f"{method.__qualname__}: version conflict, retry {attempt}")
+                time.sleep(conflict_backoff(attempt))
+        logger.warning(f"{method.__qualname__}: giving up after {CONFLICT_RETRY_ATTEMPTS} version conflicts")
+        return CONFLICT_RESPONSE
+
+    return wrapper
@@ -13,6 +13,16 @@ class DataManagerInterface(ABC):
         """Commits the current database session."""
         pass
 
+    @abstractmethod
+    def rollback(self) -> None:
+        """Rolls back the current database session."""
+        pass
+
+    @abstractmethod
+    def close(self) -> None:
+        """Releases the database session."""
+        pass
+
     @abstractmethod
     def get_by_id(self, model, element_id: int):
         """Retrieves a single element by its ID."""
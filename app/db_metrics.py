@@ -0,0 +1,89 @@
+import threading
+from typing import Optional
+
+
+class PoolMetrics:
+    """
+    Collects connection pool checkout statistics.
+
+    Records how long callers waited for a pooled connection and how many
+    checkouts timed out. Combined with the live pool status this shows whether
+    the pool is sized correctly for the uvicorn workers and threadpool.
+    """
+
+    # Upper bounds in seconds of the checkout wait histogram buckets
+    BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        """
+        Resets all counters.
+        """
+        with self._lock:
+            self.checkouts = 0
+            self.timeouts = 0
+            self.total_wait = 0.0
+            self.max_wait = 0.0
+            self.bucket_counts = [0] * (len(self.BUCKETS) + 1)
+
+    def record_checkout(self, wait_seconds: float, timed_out: bool = False) -> None:
+        """
+        Records a single connection checkout.
+
+        Args:
+            wait_seconds (float): Time spent waiting for the connection.
+            timed_out (bool): Whether the checkout failed because the pool timeout was reached.
+        """
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.total_wait += wait_seconds
+            self.max_wait = max(self.max_wait, wait_seconds)
+            for index, bound in enumerate(self.BUCKETS):
+                if wait_seconds <= bound:
+                    self.bucket_counts[index] += 1
+                    break
+            else:
+                self.bucket_counts[-1] += 1
+
+    def snapshot(self, pool=None, capacity: Optional[int] = None) -> dict:
+        """
+        Returns the collected statistics, optionally combined with the live pool status.
+
+        Args:
+            pool: The SQLAlchemy pool whose current usage should be included.
+            capacity (Optional[int]): Maximum number of connections (pool_size + max_overflow).
+
+        Returns:
+            dict: Checkout counts, wait times, histogram and saturation.
+        """
+        with self._lock:
+            attempts = self.checkouts + self.timeouts
+            labels = [f"le_{bound}" for bound in self.BUCKETS] + ["le_inf"]
+            result = {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "avg_wait_ms": (self.total_wait / attempts * 1000) if attempts else 0.0,
+                "max_wait_ms": self.max_wait * 1000,
+                "wait_histogram": dict(zip(labels, self.bucket_counts))
+            }
+
+        if pool is not None and hasattr(pool, "checkedout"):
+            checked_out = pool.checkedout()
+            result.update({
+                "pool_size": pool.size(),
+                "checked_out": checked_out,
+                "checked_in": pool.checkedin(),
+                "overflow": pool.overflow(),
+                "capacity": capacity,
+                "saturation": checked_out / capacity if capacity else None
+            })
+        return result
+
+
+pool_metrics = PoolMetrics()
@@ -1,4 +1,105 @@
+import inspect
+from typing import AsyncIterator, Iterator, Tuple, Union
+from fastapi import HTTPException
+from starlette.concurrency import run_in_threadpool
+from app.concurrency import ConcurrentUpdateError, CONFLICT_RESPONSE
+from app.database import SessionLocal, DB_BACKEND, get_db
 from app.postgres_data_manager import PostgresDataManager
+from app.async_postgres_data_manager import AsyncPostgresDataManager
 
-def get_data_manager():
-    return PostgresDataManager()
+USE_ASYNC_DB = DB_BACKEND == "async"
+
+
+def raise_for_commit(result: Tuple[Union[str, dict], int]) -> None:
+    """
+    Turns a failed unit-of-work commit into an error response.
+
+    Args:
+        result (Tuple[Union[str, dict], int]): The return value of `commit_only`.
+
+    Raises:
+        HTTPException: With the status and error message of the failed commit.
+    """
+    message, status = result
+    if status != 200:
+        raise HTTPException(status_code=status, detail=message["error"])
+
+
+def get_sync_data_manager() -> Iterator[PostgresDataManager]:
+    """
+    Provides a request-scoped data manager for dependency injection in FastAPI routes.
+
+    Every request gets its own session. Pending changes are committed when the
+    route finishes, rolled back if it raises, and the session is always closed
+    so its connection goes back to the pool. A failed commit is answered with
+    its error status (409 for a concurrent update) instead of the route's result.
+
+    Yields:
+        PostgresDataManager: A data manager bound to a fresh session.
+    """
+    data_manager = PostgresDataManager(SessionLocal())
+    try:
+        yield data_manager
+        try:
+            raise_for_commit(data_manager.commit_only())
+        except ConcurrentUpdateError:
+            raise HTTPException(status_code=CONFLICT_RESPONSE[1], detail=CONFLICT_RESPONSE[0]["error"])
+    except Exception:
+        data_manager.rollback()
+        raise
+    finally:
+        data_manager.close()
+
+
+async def get_async_data_manager() -> AsyncIterator[AsyncPostgresDataManager]:
+    """
+    Async counterpart of `get_sync_data_manager` for the asyncpg backend.
+
+    Yields:
+        AsyncPostgresDataManager: A data manager bound to a fresh async session.
+    """
+    # Imported lazily so the asyncpg driver is only required with DB_BACKEND=async
+    from app.async_database import AsyncSessionLocal
+
+    data_manager = AsyncPostgresDataManager(AsyncSessionLocal())
+    try:
+        yield data_manager
+        try:
+            raise_for_commit(await data_manager.commit_only())
+        except ConcurrentUpdateError:
+            raise HTTPException(status_code=CONFLICT_RESPONSE[1], detail=CONFLICT_RESPONSE[0]["error"])
+    except Exception:
+        await data_manager.rollback()
+        raise
+    finally:
+        await data_manager.close()
+
+
+async def run_service(func, *args, **kwargs):
+    """
+    Calls a service function from an async route.
+
+    Coroutine functions of the async backend are awaited directly, blocking
+    functions of the sync backend are run in the threadpool so they never
+    block the event loop.
+
+    Args:
+        func: The service function or bound method to call.
+        *args: Positional arguments passed to the function.
+        **kwargs: Keyword arguments passed to the function.
+
+    Returns:
+        The function's return value.
+    """
+    if inspect.iscoroutinefunction(func):
+        return await func(*args, **kwargs)
+    return await run_in_threadpool(func, *args, **kwargs)
+
+
+# DB_BACKEND selects the implementation the API routes depend on
+if USE_ASYNC_DB:
+    from app.async_database import get_async_db as get_session
+    get_data_manager = get_async_data_manager
+else:
+    get_session = get_db
+    get_data_manager = get_sync_data_manager
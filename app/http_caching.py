@@ -0,0 +1,111 @@
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Iterable, Optional, Tuple
+from fastapi import Request, Response
+
+
+def make_etag(*parts) -> str:
+    """
+    Builds a weak ETag from version components such as ids and update timestamps.
+
+    Args:
+        *parts: Values that change whenever the representation changes.
+
+    Returns:
+        str: A weak ETag, e.g. W/"3f2a...".
+    """
+    digest = hashlib.sha1("|".join(str(part) for part in parts).encode("utf-8")).hexdigest()
+    return f'W/"{digest}"'
+
+
+def validators_for_rows(rows: Iterable, *scope) -> Tuple[str, Optional[datetime]]:
+    """
+    Builds the ETag and Last-Modified value for a resource or a page of resources.
+
+    Args:
+        rows (Iterable): Version rows with an `id` and an `updated_at` attribute. Further columns,
+            e.g. `reserved`, are folded into the ETag as well.
+        *scope: Additional values the representation depends on, e.g. query parameters.
+
+    Returns:
+        Tuple[str, Optional[datetime]]: The ETag and the newest update timestamp.
+    """
+    rows = list(rows)
+    last_modified = max((row.updated_at for row in rows if row.updated_at), default=None)
+    parts = ["@".join("" if value is None else str(value) for value in row) for row in rows]
+    return make_etag(*scope, *parts), last_modified
+
+
+def _http_date(value: datetime) -> str:
+    # Timestamps are stored as naive UTC (datetime.utcnow)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return format_datetime(value.astimezone(timezone.utc), usegmt=True)
+
+
+def is_not_modified(request: Request, etag: str, last_modified: Optional[datetime]) -> bool:
+    """
+    Evaluates the conditional request headers against the current validators.
+
+    If-None-Match takes precedence over If-Modified-Since, as required by RFC 9110.
+
+    Args:
+        request (Request): The incoming request.
+        etag (str): Current ETag of the resource.
+        last_modified (Optional[datetime]): Current modification time of the resource.
+
+    Returns:
+        bool: True if the client's cached copy is still valid and a 304 can be sent.
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        if if_none_match.strip() == "*":
+            return True
+        current = etag.removeprefix("W/")
+        candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        return current in candidates
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        modified = last_modified if last_modified.tzinfo else last_modified.replace(tzinfo=timezone.utc)
+        # HTTP dates have second precision
+        return modified.replace(microsecond=0) <= since
+    return False
+
+
+def set_validators(response: Response, etag: str, last_modified: Optional[datetime]) -> None:
+    """
+    Adds the ETag and Last-Modified headers to a response.
+
+    Args:
+        response (Response): The outgoing response.
+        etag (str): The ETag to send.
+        last_modified (Optional[datetime]): The modification time to send, if known.
+    """
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "no-cache"
+    if last_modified is not None:
+        response.headers["Last-Modified"] = _http_date(last_modified)
+
+
+def not_modified_response(etag: str, last_modified: Optional[datetime]) -> Response:
+    """
+    Builds an empty 304 Not Modified response carrying the current validators.
+
+    Args:
+        etag (str): The current ETag.
+        last_modified (Optional[datetime]): The current modification time.
+
+    Returns:
+        Response: The 304 response.
+    """
+    response = Response(status_code=304)
+    set_validators(response, etag, last_modified)
+    return response
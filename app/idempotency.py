@@ -0,0 +1,445 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Optional, Tuple, Union
+from fastapi import HTTPException
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import select, delete, func, tuple_, text
+from sqlalchemy.dialects.postgresql import Insert, insert as pg_insert
+from sqlalchemy.exc import DBAPIError, OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from app.database import SessionLocal
+from app.dependencies import run_service
+from app.models import IdempotencyKey
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENCY_KEY_TTL = timedelta(hours=int(os.getenv("IDEMPOTENCY_KEY_TTL_HOURS", "24")))
+# How long a duplicate waits for the first request with the same key before giving up
+IDEMPOTENCY_WAIT_TIMEOUT_MS = int(os.getenv("IDEMPOTENCY_WAIT_TIMEOUT_MS", "10000"))
+IDEMPOTENCY_CLEANUP_INTERVAL = int(os.getenv("IDEMPOTENCY_CLEANUP_INTERVAL", "3600"))
+IDEMPOTENCY_CLEANUP_BATCH_SIZE = 5000
+# SQLSTATE raised when lock_timeout expires
+LOCK_NOT_AVAILABLE = "55P03"
+RESET_LOCK_TIMEOUT = text("SET LOCAL lock_timeout TO DEFAULT")
+
+
+def request_fingerprint(scope: str, payload: dict) -> str:
+    """
+    Hashes the endpoint and body of a request, so a key reused for a different request is detected.
+
+    Args:
+        scope (str): Name of the endpoint, e.g. "cart_add".
+        payload (dict): The validated request body.
+
+    Returns:
+        str: The hex SHA-256 digest.
+    """
+    canonical = json.dumps(jsonable_encoder(payload), sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(f"{scope}:{canonical}".encode("utf-8")).hexdigest()
+
+
+def in_progress_error() -> HTTPException:
+    """
+    Returns the 409 raised while the first request with a key has not finished.
+
+    Returns:
+        HTTPException: The error to raise.
+    """
+    return HTTPException(status_code=409, detail="A request with this Idempotency-Key is still in progress.")
+
+
+def build_claim_statement(scope: str, key: str, fingerprint: str, now: datetime) -> Insert:
+    """
+    Builds the INSERT that claims a key; it returns no row if the key is already taken.
+
+    Args:
+        scope (str): Name of the endpoint the key belongs to.
+        key (str): The client's Idempotency-Key.
+        fingerprint (str): Hash of the request, see request_fingerprint.
+        now (datetime): The current UTC time.
+
+    Returns:
+        Insert: The claim statement.
+    """
+    return (
+        pg_insert(IdempotencyKey)
+        .values(scope=scope, key=key, request_hash=fingerprint, created_at=now, expires_at=now + IDEMPOTENCY_KEY_TTL)
+        .on_conflict_do_nothing()
+        .returning(IdempotencyKey.key)
+    )
+
+
+def build_response_statement(scope: str, key: str, fingerprint: str, status_code: int, body) -> Insert:
+    """
+    Builds the statement that stores the response of a key.
+
+    A successful request committed the key row together with its changes, so
+    the response is added to that row. A client error was rolled back with the
+    request, so the row is inserted again, unless a duplicate has claimed the
+    key in the meantime; that duplicate's outcome is kept.
+
+    Args:
+        scope (str): Name of the endpoint the key belongs to.
+        key (str): The client's Idempotency-Key.
+        fingerprint (str): Hash of the request.
+        status_code (int): HTTP status code of the response.
+        body: JSON-serializable response body.
+
+    Returns:
+        Insert: The upsert statement.
+    """
+    now = datetime.utcnow()
+    statement = pg_insert(IdempotencyKey).values(
+        scope=scope, key=key, request_hash=fingerprint, status_code=status_code, response=body,
+        created_at=now, expires_at=now + IDEMPOTENCY_KEY_TTL
+    )
+    if status_code >= 400:
+        return statement.on_conflict_do_nothing()
+    return statement.on_conflict_do_update(
+        index_elements=[IdempotencyKey.scope, IdempotencyKey.key],
+        set_={"status_code": statement.excluded.status_code, "response": statement.excluded.response},
+        where=IdempotencyKey.status_code.is_(None) & (IdempotencyKey.request_hash == fingerprint)
+    )
+
+
+def stored_outcome(stored, fingerprint: str) -> Tuple[int, object]:
+    """
+    Checks the key row of an earlier request and returns its response for replay.
+
+    Args:
+        stored: The row with request_hash, status_code and response, or None.
+        fingerprint (str): Hash of the current request.
+
+    Returns:
+        Tuple[int, object]: The stored status code and body.
+
+    Raises:
+        HTTPException: 422 if the key was used for a different request,
+                           409 if the earlier request's changes were committed but its response was not stored.
+    """
+    if stored is None:
+        raise in_progress_error()
+    if stored.request_hash != fingerprint:
+        raise HTTPException(status_code=422, detail="Idempotency-Key was already used for a different request.")
+    if stored.status_code is None:
+        raise HTTPException(
+            status_code=409,
+            detail="A request with this Idempotency-Key was already processed, but its response is not available."
+        )
+    return stored.status_code, stored.response
+
+
+class IdempotencyClaim:
+    """
+    Claim on an idempotency key for the duration of one request.
+
+    The key row is inserted in the request's own session before the service
+    runs, so it is committed in the same transaction as the request's changes
+    and no second connection is held. A duplicate request inserting the same
+    key blocks inside PostgreSQL until the first one commits or rolls back:
+    after a commit the duplicate replays the stored response, after a rollback
+    its insert succeeds and it runs the request itself. A key whose changes
+    were committed is never given up again.
+    """
+
+    def __init__(self, db: Session, scope: str, key: str, fingerprint: str):
+        """
+        Initializes the claim.
+
+        Args:
+            db (Session): The request's database session.
+            scope (str): Name of the endpoint the key belongs to.
+            key (str): The client's Idempotency-Key.
+            fingerprint (str): Hash of the request, see request_fingerprint.
+        """
+        self.db = db
+        self.scope = scope
+        self.key = key
+        self.fingerprint = fingerprint
+
+    def acquire(self) -> Optional[Tuple[int, object]]:
+        """
+        Claims the key or returns the stored response of an earlier request.
+
+        Returns:
+            Optional[Tuple[int, object]]: The stored status code and body of a completed
+            request, or None if the key was claimed and the request should run.
+
+        Raises:
+            HTTPException: 422 if the key was used for a different request,
+                               409 if the first request is still running after the wait timeout.
+        """
+        now = datetime.utcnow()
+        identity = (IdempotencyKey.scope == self.scope, IdempotencyKey.key == self.key)
+        try:
+            self.db.execute(select(func.set_config("lock_timeout", f"{IDEMPOTENCY_WAIT_TIMEOUT_MS}ms", True)))
+            self.db.execute(delete(IdempotencyKey).where(*identity, IdempotencyKey.expires_at < now))
+            claimed = self.db.execute(build_claim_statement(self.scope, self.key, self.fingerprint, now)).first()
+            if claimed is not None:
+                # The request's own statements run without the wait timeout
+                self.db.execute(RESET_LOCK_TIMEOUT)
+                return None
+            stored = self.db.execute(
+                select(IdempotencyKey.request_hash, IdempotencyKey.status_code, IdempotencyKey.response)
+                .where(*identity)
+            ).first()
+        except OperationalError as error:
+            self.db.rollback()
+            if getattr(error.orig, "pgcode", None) == LOCK_NOT_AVAILABLE:
+                raise in_progress_error()
+            raise
+        except Exception:
+            self.db.rollback()
+            raise
+
+        self.db.rollback()
+        return stored_outcome(stored, self.fingerprint)
+
+    def complete(self, status_code: int, body) -> None:
+        """
+        Stores the response for the claimed key.
+
+        Called after the service committed (or, for client errors, rolled back)
+        its changes. Anything still pending is discarded first, so only the
+        response is written.
+
+        Args:
+            status_code (int): HTTP status code of the response.
+            body: JSON-serializable response body.
+        """
+        try:
+            self.db.rollback()
+            self.db.execute(build_response_statement(self.scope, self.key, self.fingerprint, status_code, body))
+            self.db.commit()
+        except Exception as error:
+            self.db.rollback()
+            logger.error(f"Could not store response for Idempotency-Key '{self.key}': {error}")
+
+    def release(self) -> None:
+        """
+        Gives the key up without a response, so a retry runs the request again.
+        Only uncommitted claims are affected; a key committed with the request's changes stays.
+        """
+        self.db.rollback()
+
+
+class AsyncIdempotencyClaim:
+    """
+    Async counterpart of `IdempotencyClaim` for the asyncpg backend.
+    """
+
+    def __init__(self, db: AsyncSession, scope: str, key: str, fingerprint: str):
+        """
+        Initializes the claim.
+
+        Args:
+            db (AsyncSession): The request's async database session.
+            scope (str): Name of the endpoint the key belongs to.
+            key (str): The client's Idempotency-Key.
+            fingerprint (str): Hash of the request, see request_fingerprint.
+        """
+        self.db = db
+        self.scope = scope
+        self.key = key
+        self.fingerprint = fingerprint
+
+    async def acquire(self) -> Optional[Tuple[int, object]]:
+        """
+        Claims the key or returns the stored response of an earlier request.
+
+        Returns:
+            Optional[Tuple[int, object]]: The stored status code and body of a completed
+            request, or None if the key was claimed and the request should run.
+
+        Raises:
+            HTTPException: 422 if the key was used for a different request,
+                               409 if the first request is still running after the wait timeout.
+        """
+        now = datetime.utcnow()
+        identity = (IdempotencyKey.scope == self.scope, IdempotencyKey.key == self.key)
+        try:
+            await self.db.execute(select(func.set_config("lock_timeout", f"{IDEMPOTENCY_WAIT_TIMEOUT_MS}ms", True)))
+            await self.db.execute(delete(IdempotencyKey).where(*identity, IdempotencyKey.expires_at < now))
+            claimed = (await self.db.execute(build_claim_statement(self.scope, self.key, self.fingerprint, now))).first()
+            if claimed is not None:
+                # The request's own statements run without the wait timeout
+                await self.db.execute(RESET_LOCK_TIMEOUT)
+                return None
+            stored = (await self.db.execute(
+                select(IdempotencyKey.request_hash, IdempotencyKey.status_code, IdempotencyKey.response)
+                .where(*identity)
+            )).first()
+        except DBAPIError as error:
+            await self.db.rollback()
+            code = getattr(error.orig, "pgcode", None) or getattr(error.orig, "sqlstate", None)
+            if code == LOCK_NOT_AVAILABLE:
+                raise in_progress_error()
+            raise
+        except Exception:
+            await self.db.rollback()
+            raise
+
+        await self.db.rollback()
+        return stored_outcome(stored, self.fingerprint)
+
+    async def complete(self, status_code: int, body) -> None:
+        """
+        Stores the response for the claimed key, see `IdempotencyClaim.complete`.
+
+        Args:
+            status_code (int): HTTP status code of the response.
+            body: JSON-serializable response body.
+        """
+        try:
+            await self.db.rollback()
+            await self.db.execute(build_response_statement(self.scope, self.key, self.fingerprint, status_code, body))
+            await self.db.commit()
+        except Exception as error:
+            await self.db.rollback()
+            logger.error(f"Could not store response for Idempotency-Key '{self.key}': {error}")
+
+    async def release(self) -> None:
+        """
+        Gives an uncommitted claim up without a response, so a retry runs the request again.
+        """
+        await self.db.rollback()
+
+
+async def run_idempotent(db: Union[Session, AsyncSession], scope: str, key: Optional[str], payload: dict,
+                         call: Callable[[], Awaitable]):
+    """
+    Runs a route body at most once per Idempotency-Key.
+
+    Without a key the call simply runs. With a key, a replay returns the stored
+    response without touching products or orders, marked with an
+    `Idempotent-Replayed: true` header. Successful responses and client errors
+    (4xx) are stored; server errors release the key so the client can retry,
+    unless the request's changes were already committed.
+
+    Args:
+        db (Union[Session, AsyncSession]): The request's database session, also used by `call`.
+        scope (str): Endpoint and user the key belongs to, e.g. "cart_add:42", so clients
+            cannot replay or block each other's keys.
+        key (Optional[str]): The Idempotency-Key header, if sent.
+        payload (dict): The validated request body.
+        call (Callable[[], Awaitable]): Runs the actual request.
+
+    Returns:
+        The route result, or an ORJSONResponse with the stored response.
+    """
+    if not key:
+        return await call()
+
+    fingerprint = request_fingerprint(scope, payload)
+    if isinstance(db, AsyncSession):
+        claim = AsyncIdempotencyClaim(db, scope, key, fingerprint)
+    else:
+        claim = IdempotencyClaim(db, scope, key, fingerprint)
+    stored = await run_service(claim.acquire)
+    if stored is not None:
+        status_code, body = stored
+        return ORJSONResponse(body, status_code=status_code, headers={"Idempotent-Replayed": "true"})
+
+    try:
+        result = await call()
+    except HTTPException as error:
+        if error.status_code < 500:
+            await run_service(claim.complete, error.status_code, jsonable_encoder({"detail": error.detail}))
+        else:
+            await run_service(claim.release)
+        raise
+    except BaseException:
+        await run_service(claim.release)
+        raise
+
+    await run_service(claim.complete, 200, jsonable_encoder(result))
+    return result
+
+
+class IdempotencyKeyCleaner:
+    """
+    Background job that deletes expired idempotency keys in batches.
+    """
+
+    def __init__(self, interval: int = IDEMPOTENCY_CLEANUP_INTERVAL, batch_size: int = IDEMPOTENCY_CLEANUP_BATCH_SIZE):
+        """
+        Initializes the cleaner.
+
+        Args:
+            interval (int): Seconds between runs; 0 disables the background thread.
+            batch_size (int): Maximum number of keys deleted per transaction.
+        """
+        self.interval = interval
+        self.batch_size = batch_size
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def purge(self) -> int:
+        """
+        Deletes all expired keys.
+
+        Returns:
+            int: Number of deleted keys.
+        """
+        deleted = 0
+        db = SessionLocal()
+        try:
+            while not self._stop_event.is_set():
+                expired = (
+                    select(IdempotencyKey.scope, IdempotencyKey.key)
+                    .where(IdempotencyKey.expires_at < datetime.utcnow())
+                    .limit(self.batch_size)
+                    .with_for_update(skip_locked=True)
+                )
+                result = db.execute(
+                    delete(IdempotencyKey).where(
+                        tuple_(IdempotencyKey.scope, IdempotencyKey.key).in_(expired)
+                    )
+                )
+                db.commit()
+                deleted += result.rowcount
+                if result.rowcount < self.batch_size:
+                    break
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+        if deleted:
+            logger.info(f"Deleted {deleted} expired idempotency keys")
+        return deleted
+
+    def _run(self) -> None:
+        while not self._stop_event.wait(self.interval):
+            try:
+                self.purge()
+            except Exception as error:
+                logger.warning(f"Idempotency key cleanup failed: {error}")
+
+    def start(self) -> None:
+        """
+        Starts the background cleanup thread.
+        """
+        if self.interval > 0 and (self._thread is None or not self._thread.is_alive()):
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._run, name="idempotency-cleanup", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        """
+        Stops the background cleanup thread.
+        """
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+            self._thread = None
+
+
+idempotency_cleaner = IdempotencyKeyCleaner()
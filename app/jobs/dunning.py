@@ -0,0 +1,161 @@
+import argparse
+import logging
+import os
+from datetime import date, datetime, timedelta
+from typing import Optional
+from sqlalchemy import text
+from app.database import engine
+
+logger = logging.getLogger(__name__)
+
+DUNNING_PAYMENT_TERM_DAYS = int(os.getenv("DUNNING_PAYMENT_TERM_DAYS", "14"))
+DUNNING_INTERVAL_DAYS = int(os.getenv("DUNNING_INTERVAL_DAYS", "14"))
+DUNNING_BATCH_SIZE = int(os.getenv("DUNNING_BATCH_SIZE", "5000"))
+# Reminder status per dunning level; invoices at the last level are not reminded again
+DUNNING_LEVELS = ("zahlungserinnerung", "erste_mahnung", "letzte_mahnung")
+# Keeps two runs from working on the same checkpoint at the same time
+DUNNING_LOCK_KEY = 0x64756E6E
+
+START_RUN = text("""
+    INSERT INTO dunning_runs (run_date, reminders_created, started_at)
+    VALUES (:run_date, 0, now() AT TIME ZONE 'utc')
+    ON CONFLICT (run_date) DO NOTHING
+""")
+
+LOAD_CHECKPOINT = text("""
+    SELECT last_invoice_date, last_invoice_id, reminders_created, finished_at
+    FROM dunning_runs WHERE run_date = :run_date
+""")
+
+# One chunk: the next open, overdue, due-for-reminder invoices in (invoice_date, id)
+# order via the partial index, escalated and reminded in a single statement. Invoices
+# locked by a concurrent payment are skipped and picked up by the next run.
+DUNNING_CHUNK = text("""
+    WITH batch AS (
+        SELECT id, invoice_date
+        FROM invoices
+        WHERE NOT is_paid
+          AND invoice_date <= :due_cutoff
+          AND (invoice_date, id) > (:last_date, :last_id)
+          AND dunning_level < :max_level
+          AND (last_reminded_at IS NULL OR last_reminded_at <= :remind_cutoff)
+        ORDER BY invoice_date, id
+        LIMIT :batch_size
+        FOR UPDATE SKIP LOCKED
+    ),
+    escalated AS (
+        UPDATE invoices i
+        SET dunning_level = i.dunning_level + 1, last_reminded_at = :run_date
+        FROM batch b
+        WHERE i.id = b.id
+        RETURNING i.id, i.dunning_level
+    ),
+    inserted AS (
+        INSERT INTO reminders (invoice_id, reminder_date, status)
+        SELECT e.id, :run_date, (CAST(:statuses AS varchar[]))[e.dunning_level]
+        FROM escalated e
+        RETURNING id
+    ),
+    last_row AS (
+        SELECT invoice_date, id FROM batch ORDER BY invoice_date DESC, id DESC LIMIT 1
+    )
+    SELECT (SELECT count(*) FROM inserted) AS created, l.invoice_date, l.id
+    FROM last_row l
+""")
+
+SAVE_CHECKPOINT = text("""
+    UPDATE dunning_runs
+    SET last_invoice_date = :last_date, last_invoice_id = :last_id,
+        reminders_created = reminders_created + :created
+    WHERE run_date = :run_date
+""")
+
+FINISH_RUN = text("""
+    UPDATE dunning_runs SET finished_at = now() AT TIME ZONE 'utc' WHERE run_date = :run_date
+""")
+
+
+def run_dunning(run_date: Optional[date] = None, batch_size: int = DUNNING_BATCH_SIZE) -> dict:
+    """
+    Sends the reminders that are due on a given day.
+
+    Open invoices older than the payment term are scanned in keyset-ordered
+    chunks. Each chunk raises the dunning level of its invoices, bulk-inserts one
+    Reminder per invoice with the status of the new level, and stores the last
+    (invoice_date, id) as checkpoint, all in one short transaction. A run that was
+    interrupted continues after the checkpoint; a finished run is not repeated.
+
+    Args:
+        run_date (Optional[date]): The dunning day. Defaults to today (UTC).
+        batch_size (int): Number of invoices per chunk and transaction.
+
+    Returns:
+        dict: The run date, the number of reminders created in total and in this call,
+        the number of chunks and whether an earlier run was resumed.
+
+    Raises:
+        RuntimeError: If another dunning run is in progress.
+    """
+    run_date = run_date or datetime.utcnow().date()
+    params = {
+        "run_date": run_date,
+        "due_cutoff": run_date - timedelta(days=DUNNING_PAYMENT_TERM_DAYS),
+        "remind_cutoff": run_date - timedelta(days=DUNNING_INTERVAL_DAYS),
+        "max_level": len(DUNNING_LEVELS),
+        "statuses": list(DUNNING_LEVELS),
+        "batch_size": batch_size,
+    }
+    report = {"run_date": run_date.isoformat(), "created": 0, "chunks": 0, "resumed": False}
+
+    with engine.connect() as connection:
+        if not connection.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": DUNNING_LOCK_KEY}).scalar():
+            connection.rollback()
+            raise RuntimeError("Another dunning run is in progress")
+        connection.commit()
+        try:
+            with connection.begin():
+                connection.execute(START_RUN, {"run_date": run_date})
+                checkpoint = connection.execute(LOAD_CHECKPOINT, {"run_date": run_date}).one()
+
+            report["resumed"] = checkpoint.last_invoice_id is not None
+            if checkpoint.finished_at is not None:
+                report["total"] = checkpoint.reminders_created
+                logger.info(f"Dunning run {run_date} already finished")
+                return report
+
+            last_date = checkpoint.last_invoice_date or date.min
+            last_id = checkpoint.last_invoice_id or 0
+            while True:
+                with connection.begin():
+                    chunk = connection.execute(
+                        DUNNING_CHUNK, {**params, "last_date": last_date, "last_id": last_id}
+                    ).first()
+                    if chunk is None:
+                        connection.execute(FINISH_RUN, {"run_date": run_date})
+                        break
+                    last_date, last_id = chunk.invoice_date, chunk.id
+                    connection.execute(SAVE_CHECKPOINT, {
+                        "run_date": run_date, "last_date": last_date, "last_id": last_id, "created": chunk.created
+                    })
+                report["created"] += chunk.created
+                report["chunks"] += 1
+                logger.info(f"Dunning run {run_date}: {report['created']} reminders after {report['chunks']} chunks")
+
+            report["total"] = connection.execute(LOAD_CHECKPOINT, {"run_date": run_date}).one().reminders_created
+            connection.commit()
+        finally:
+            connection.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": DUNNING_LOCK_KEY})
+            connection.commit()
+
+    logger.info(f"Dunning run {run_date} finished: {report['created']} reminders created")
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Create reminders for overdue unpaid invoices (run daily, e.g. from cron).")
+    parser.add_argument("--date", type=date.fromisoformat, default=None, help="Dunning day (YYYY-MM-DD), default today")
+    parser.add_argument("--batch-size", type=int, default=DUNNING_BATCH_SIZE, help="Invoices per chunk")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    print(run_dunning(args.date, args.batch_size))
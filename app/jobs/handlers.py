@@ -0,0 +1,63 @@
+import logging
+from datetime import datetime
+from typing import Callable, Dict
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import Insert
+from sqlalchemy.orm import Session
+from app.models import Invoice, Order, Shipment
+from app.jobs.job_queue import build_enqueue_statement
+from app.jobs.sales_rollup import SALES_ROLLUP_JOB, apply_order_to_rollups
+
+logger = logging.getLogger(__name__)
+
+ORDER_FULFILLMENT_JOB = "order_fulfillment"
+SHIPMENT_PENDING_STATUS = "ausstehend"
+
+
+def build_order_fulfillment_job(order_id: int) -> Insert:
+    """
+    Builds the enqueue statement for the post-checkout work of an order.
+
+    Args:
+        order_id (int): ID of the checked-out order.
+
+    Returns:
+        Insert: The enqueue statement, deduplicated per order.
+    """
+    return build_enqueue_statement(ORDER_FULFILLMENT_JOB, {"order_id": order_id}, f"{ORDER_FULFILLMENT_JOB}:{order_id}")
+
+
+def fulfill_order(db: Session, payload: dict) -> None:
+    """
+    Creates the invoice and a pending shipment for a checked-out order.
+
+    The invoice total is the order's stored total amount. Runs in the worker's
+    transaction together with the job's completion, and skips documents that
+    already exist, so a retried job never creates duplicates.
+
+    Args:
+        db (Session): The worker's database session.
+        payload (dict): Job arguments with the `order_id`.
+    """
+    order_id = payload["order_id"]
+
+    if db.execute(select(Invoice.id).where(Invoice.order_id == order_id)).first() is None:
+        total = db.execute(select(Order.total_amount).where(Order.id == order_id)).scalar() or 0.0
+        db.add(Invoice(
+            order_id=order_id,
+            invoice_date=datetime.utcnow().date(),
+            total_amount=round(total, 2),
+            is_paid=False
+        ))
+
+    if db.execute(select(Shipment.id).where(Shipment.order_id == order_id)).first() is None:
+        db.add(Shipment(order_id=order_id, status=SHIPMENT_PENDING_STATUS))
+
+    db.flush()
+    logger.info(f"Created invoice and shipment for order {order_id}")
+
+
+HANDLERS: Dict[str, Callable[[Session, dict], None]] = {
+    ORDER_FULFILLMENT_JOB: fulfill_order,
+    SALES_ROLLUP_JOB: apply_order_to_rollups,
+}
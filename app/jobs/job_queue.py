@@ -0,0 +1,135 @@
+import os
+from datetime import datetime, timedelta
+from typing import Optional
+from sqlalchemy import select, func, Select
+from sqlalchemy.dialects.postgresql import insert as pg_insert, Insert
+from sqlalchemy.orm import Session
+from app.models import Job
+
+JOB_QUEUED = "queued"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "5"))
+JOB_RETRY_BASE_DELAY = int(os.getenv("JOB_RETRY_BASE_DELAY", "10"))
+JOB_RETRY_MAX_DELAY = int(os.getenv("JOB_RETRY_MAX_DELAY", "3600"))
+# Stored error messages are cut to this length
+MAX_ERROR_LENGTH = 2000
+
+
+def build_enqueue_statement(kind: str, payload: dict, dedupe_key: Optional[str] = None,
+                            max_attempts: int = JOB_MAX_ATTEMPTS) -> Insert:
+    """
+    Builds the INSERT that puts a job on the queue.
+
+    Executed in the caller's transaction, the job becomes visible to workers
+    exactly when the caller commits, and disappears with a rollback. A job with
+    a dedupe key that was already enqueued is not inserted again.
+
+    Args:
+        kind (str): Name of the job handler.
+        payload (dict): JSON arguments for the handler.
+        dedupe_key (Optional[str]): Unique key that makes enqueuing idempotent.
+        max_attempts (int): Number of runs before the job is marked as failed.
+
+    Returns:
+        Insert: The enqueue statement.
+    """
+    now = datetime.utcnow()
+    return pg_insert(Job).values(
+        kind=kind,
+        payload=payload,
+        dedupe_key=dedupe_key,
+        status=JOB_QUEUED,
+        attempts=0,
+        max_attempts=max_attempts,
+        run_at=now,
+        created_at=now
+    ).on_conflict_do_nothing(index_elements=[Job.dedupe_key])
+
+
+def build_claim_query(now: datetime) -> Select:
+    """
+    Builds a query that locks the next due job.
+
+    Jobs locked by other workers are skipped, so any number of workers can
+    poll the same table without blocking each other or running a job twice.
+    The lock is held until the worker commits the job's result.
+
+    Args:
+        now (datetime): The current UTC time.
+
+    Returns:
+        Select: The claim query for one Job.
+    """
+    return (
+        select(Job)
+        .where(Job.status == JOB_QUEUED, Job.run_at <= now)
+        .order_by(Job.run_at, Job.id)
+        .limit(1)
+        .with_for_update(skip_locked=True)
+    )
+
+
+def retry_delay(attempts: int) -> timedelta:
+    """
+    Returns the delay before the next run of a job that failed `attempts` times.
+
+    Args:
+        attempts (int): Number of failed runs so far.
+
+    Returns:
+        timedelta: Exponential backoff, capped at JOB_RETRY_MAX_DELAY.
+    """
+    return timedelta(seconds=min(JOB_RETRY_MAX_DELAY, JOB_RETRY_BASE_DELAY * 2 ** (attempts - 1)))
+
+
+def mark_done(job: Job, now: datetime) -> None:
+    """
+    Records a successful run of a claimed job.
+
+    Args:
+        job (Job): The claimed job.
+        now (datetime): The current UTC time.
+    """
+    job.attempts += 1
+    job.status = JOB_DONE
+    job.finished_at = now
+    job.last_error = None
+
+
+def mark_failed(job: Job, error: Exception, now: datetime) -> None:
+    """
+    Records a failed run of a claimed job and schedules the retry, or gives up
+    after the job's maximum number of attempts.
+
+    Args:
+        job (Job): The claimed job.
+        error (Exception): The error raised by the handler.
+        now (datetime): The current UTC time.
+    """
+    job.attempts += 1
+    job.last_error = f"{type(error).__name__}: {error}"[:MAX_ERROR_LENGTH]
+    if job.attempts >= job.max_attempts:
+        job.status = JOB_FAILED
+        job.finished_at = now
+    else:
+        job.run_at = now + retry_delay(job.attempts)
+
+
+def job_queue_stats(db: Session) -> dict:
+    """
+    Counts the jobs per status and the age of the oldest due job.
+
+    Args:
+        db (Session): The active SQLAlchemy database session.
+
+    Returns:
+        dict: Job counts per status and the queue lag in seconds.
+    """
+    counts = dict(db.execute(select(Job.status, func.count()).group_by(Job.status)).all())
+    oldest_due = db.execute(
+        select(func.min(Job.run_at)).where(Job.status == JOB_QUEUED, Job.run_at <= datetime.utcnow())
+    ).scalar()
+    lag = (datetime.utcnow() - oldest_due).total_seconds() if oldest_due else 0.0
+    return {"counts": counts, "lag_seconds": lag}
@@ -0,0 +1,223 @@
+import argparse
+import logging
+from datetime import date
+from typing import List
+from sqlalchemy import select, func, text
+from sqlalchemy.dialects.postgresql import Insert
+from sqlalchemy.orm import Session
+from app.database import SessionLocal
+from app.models import DailySales, ProductSales, Product
+from app.jobs.job_queue import build_enqueue_statement, JOB_QUEUED
+from app.order.order_queries import COMPLETED_STATUS
+
+logger = logging.getLogger(__name__)
+
+SALES_ROLLUP_JOB = "sales_rollup"
+TOP_PRODUCTS_DEFAULT_LIMIT = 20
+TOP_PRODUCTS_MAX_LIMIT = 100
+
+# Adds one completed order to both rollups. Product rows are upserted in id order,
+# so concurrent workers always lock them in the same order.
+APPLY_ORDER = text("""
+    WITH lines AS (
+        SELECT oi.product_id, oi.quantity, oi.quantity * oi.unit_price AS revenue, CAST(o.date AS date) AS day
+        FROM order_items oi
+        JOIN orders o ON o.id = oi.order_id
+        WHERE o.id = :order_id AND o.status = :completed
+    ),
+    daily AS (
+        INSERT INTO daily_sales (day, order_count, units, revenue)
+        SELECT day, 1, sum(quantity), sum(revenue) FROM lines GROUP BY day
+        ON CONFLICT (day) DO UPDATE
+        SET order_count = daily_sales.order_count + EXCLUDED.order_count,
+            units = daily_sales.units + EXCLUDED.units,
+            revenue = daily_sales.revenue + EXCLUDED.revenue
+    )
+    INSERT INTO product_sales (product_id, units, revenue)
+    SELECT product_id, sum(quantity), sum(revenue) FROM lines GROUP BY product_id ORDER BY product_id
+    ON CONFLICT (product_id) DO UPDATE
+    SET units = product_sales.units + EXCLUDED.units,
+        revenue = product_sales.revenue + EXCLUDED.revenue
+""")
+
+# Completed orders whose rollup job has not run yet are left to that job
+ROLLED_UP_ORDERS = """
+    SELECT o.id, CAST(o.date AS date) AS day
+    FROM orders o
+    WHERE o.status = :completed
+      AND NOT EXISTS (
+          SELECT 1 FROM jobs j
+          WHERE j.dedupe_key = :job_prefix || o.id AND j.status = :queued
+      )
+"""
+
+BACKFILL_STATEMENTS = [
+    # Waits for workers that already added an order, and holds new ones off until the rebuild commits
+    text("LOCK TABLE daily_sales, product_sales IN EXCLUSIVE MODE"),
+    text("DELETE FROM daily_sales"),
+    text("DELETE FROM product_sales"),
+    text(f"""
+        INSERT INTO daily_sales (day, order_count, units, revenue)
+        SELECT r.day, count(DISTINCT r.id), sum(oi.quantity), sum(oi.quantity * oi.unit_price)
+        FROM ({ROLLED_UP_ORDERS}) r
+        JOIN order_items oi ON oi.order_id = r.id
+        GROUP BY r.day
+    """),
+    text(f"""
+        INSERT INTO product_sales (product_id, units, revenue)
+        SELECT oi.product_id, sum(oi.quantity), sum(oi.quantity * oi.unit_price)
+        FROM ({ROLLED_UP_ORDERS}) r
+        JOIN order_items oi ON oi.order_id = r.id
+        GROUP BY oi.product_id
+    """),
+]
+
+
+def build_sales_rollup_job(order_id: int) -> Insert:
+    """
+    Builds the enqueue statement that adds a checked-out order to the sales rollups.
+
+    Args:
+        order_id (int): ID of the checked-out order.
+
+    Returns:
+        Insert: The enqueue statement, deduplicated per order.
+    """
+    return build_enqueue_statement(SALES_ROLLUP_JOB, {"order_id": order_id}, f"{SALES_ROLLUP_JOB}:{order_id}")
+
+
+def apply_order_to_rollups(db: Session, payload: dict) -> None:
+    """
+    Adds a completed order to the daily and per-product rollups.
+
+    Runs in the worker's transaction together with the job's completion. The
+    job is enqueued once per order and marked done in the same commit, so each
+    order is counted exactly once.
+
+    Args:
+        db (Session): The worker's database session.
+        payload (dict): Job arguments with the `order_id`.
+    """
+    db.execute(APPLY_ORDER, {"order_id": payload["order_id"], "completed": COMPLETED_STATUS})
+
+
+def backfill_rollups() -> dict:
+    """
+    Rebuilds both rollups from the completed orders in one transaction.
+
+    Orders whose rollup job is still queued are skipped; the job adds them
+    afterwards, so running the backfill next to the job worker does not count
+    an order twice.
+
+    Returns:
+        dict: Number of days and products in the rebuilt rollups.
+    """
+    params = {"completed": COMPLETED_STATUS, "job_prefix": f"{SALES_ROLLUP_JOB}:", "queued": JOB_QUEUED}
+    db = SessionLocal()
+    try:
+        for statement in BACKFILL_STATEMENTS:
+            db.execute(statement, params)
+        days = db.execute(select(func.count()).select_from(DailySales)).scalar()
+        products = db.execute(select(func.count()).select_from(ProductSales)).scalar()
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+    logger.info(f"Rebuilt sales rollups: {days} days, {products} products")
+    return {"days": days, "products": products}
+
+
+def get_revenue_by_day(db: Session, date_from: date, date_to: date) -> List[dict]:
+    """
+    Reads revenue, order count, units and average basket per day from the daily rollup.
+
+    Args:
+        db (Session): The active SQLAlchemy database session.
+        date_from (date): First day, inclusive.
+        date_to (date): Last day, inclusive.
+
+    Returns:
+        List[dict]: One entry per day with sales, oldest first.
+    """
+    rows = db.execute(
+        select(DailySales)
+        .where(DailySales.day >= date_from, DailySales.day <= date_to)
+        .order_by(DailySales.day)
+    ).scalars().all()
+    return [
+        {
+            "day": row.day.isoformat(),
+            "order_count": row.order_count,
+            "units": row.units,
+            "revenue": round(row.revenue, 2),
+            "average_basket": round(row.revenue / row.order_count, 2) if row.order_count else 0.0
+        }
+        for row in rows
+    ]
+
+
+def get_sales_summary(db: Session, date_from: date, date_to: date) -> dict:
+    """
+    Sums the daily rollup over a date range.
+
+    Args:
+        db (Session): The active SQLAlchemy database session.
+        date_from (date): First day, inclusive.
+        date_to (date): Last day, inclusive.
+
+    Returns:
+        dict: Total orders, units and revenue and the average basket value of the range.
+    """
+    orders, units, revenue = db.execute(
+        select(
+            func.coalesce(func.sum(DailySales.order_count), 0),
+            func.coalesce(func.sum(DailySales.units), 0),
+            func.coalesce(func.sum(DailySales.revenue), 0.0)
+        ).where(DailySales.day >= date_from, DailySales.day <= date_to)
+    ).one()
+    return {
+        "date_from": date_from.isoformat(),
+        "date_to": date_to.isoformat(),
+        "order_count": orders,
+        "units": units,
+        "revenue": round(revenue, 2),
+        "average_basket": round(revenue / orders, 2) if orders else 0.0
+    }
+
+
+def get_top_products(db: Session, limit: int = TOP_PRODUCTS_DEFAULT_LIMIT) -> List[dict]:
+    """
+    Reads the best-selling products by units from the product rollup.
+
+    Args:
+        db (Session): The active SQLAlchemy database session.
+        limit (int): Number of products to return.
+
+    Returns:
+        List[dict]: Product ID, name, units sold and revenue, best seller first.
+    """
+    rows = db.execute(
+        select(ProductSales.product_id, Product.name, ProductSales.units, ProductSales.revenue)
+        .join(Product, Product.id == ProductSales.product_id)
+        .order_by(ProductSales.units.desc(), ProductSales.product_id.desc())
+        .limit(limit)
+    ).all()
+    return [
+        {"product_id": row.product_id, "name": row.name, "units": row.units, "revenue": round(row.revenue, 2)}
+        for row in rows
+    ]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Maintain the sales rollups behind the admin dashboard.")
+    parser.add_argument("--backfill", action="store_true", help="Rebuild both rollups from all completed orders")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    if args.backfill:
+        print(backfill_rollups())
+    else:
+        parser.print_help()
@@ -0,0 +1,133 @@
+import argparse
+import logging
+import os
+import signal
+import threading
+from datetime import datetime
+from typing import List
+from app.database import SessionLocal
+from app.jobs.handlers import HANDLERS
+from app.jobs.job_queue import build_claim_query, mark_done, mark_failed
+
+logger = logging.getLogger(__name__)
+
+JOB_WORKER_CONCURRENCY = int(os.getenv("JOB_WORKER_CONCURRENCY", "4"))
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "1"))
+
+
+class JobWorker:
+    """
+    Runs queued jobs with a fixed number of threads.
+
+    Each thread claims one due job at a time with FOR UPDATE SKIP LOCKED and
+    runs its handler in a savepoint of the same transaction. On success the
+    handler's writes and the job's completion are committed together; on
+    failure only the savepoint is rolled back and the retry is scheduled with
+    exponential backoff. If a worker dies mid-job, its transaction is rolled
+    back and the job becomes due again for the other workers.
+    """
+
+    def __init__(self, concurrency: int = JOB_WORKER_CONCURRENCY, poll_interval: float = JOB_POLL_INTERVAL):
+        """
+        Initializes the worker.
+
+        Args:
+            concurrency (int): Number of jobs processed in parallel (one connection each).
+            poll_interval (float): Seconds an idle thread waits before polling again.
+        """
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self._stop_event = threading.Event()
+        self._threads: List[threading.Thread] = []
+
+    def run_once(self, db) -> bool:
+        """
+        Claims and runs one due job.
+
+        Args:
+            db (Session): The thread's database session.
+
+        Returns:
+            bool: True if a job was processed, False if the queue had no due job.
+        """
+        now = datetime.utcnow()
+        job = db.execute(build_claim_query(now)).scalars().first()
+        if job is None:
+            db.rollback()
+            return False
+
+        handler = HANDLERS.get(job.kind)
+        try:
+            if handler is None:
+                raise LookupError(f"No handler for job kind '{job.kind}'")
+            with db.begin_nested():
+                handler(db, job.payload)
+            mark_done(job, datetime.utcnow())
+        except Exception as error:
+            logger.warning(f"Job {job.id} ({job.kind}) failed on attempt {job.attempts + 1}: {error}")
+            mark_failed(job, error, datetime.utcnow())
+        db.commit()
+        return True
+
+    def _loop(self) -> None:
+        db = SessionLocal()
+        try:
+            while not self._stop_event.is_set():
+                try:
+                    if not self.run_once(db):
+                        self._stop_event.wait(self.poll_interval)
+                except Exception as error:
+                    db.rollback()
+                    logger.error(f"Job worker error: {error}")
+                    self._stop_event.wait(self.poll_interval)
+        finally:
+            db.close()
+
+    def start(self) -> None:
+        """
+        Starts the worker threads.
+        """
+        self._stop_event.clear()
+        self._threads = [
+            threading.Thread(target=self._loop, name=f"job-worker-{number}", daemon=True)
+            for number in range(self.concurrency)
+        ]
+        for thread in self._threads:
+            thread.start()
+        logger.info(f"Job worker started with {self.concurrency} threads")
+
+    def stop(self, timeout: float = 30) -> None:
+        """
+        Asks the threads to stop after their current job and waits for them.
+
+        Args:
+            timeout (float): Seconds to wait for each thread.
+        """
+        self._stop_event.set()
+        for thread in self._threads:
+            thread.join(timeout=timeout)
+        self._threads = []
+
+    def run_forever(self) -> None:
+        """
+        Runs the worker until SIGINT or SIGTERM, then finishes the running jobs.
+        """
+        stop = threading.Event()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signum, lambda *_: stop.set())
+        self.start()
+        stop.wait()
+        logger.info("Stopping job worker")
+        self.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Process background jobs such as invoice and shipment creation.")
+    parser.add_argument("--concurrency", type=int, default=JOB_WORKER_CONCURRENCY,
+                        help="Number of jobs processed in parallel")
+    parser.add_argument("--poll-interval", type=float, default=JOB_POLL_INTERVAL,
+                        help="Seconds an idle thread waits before polling again")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    JobWorker(concurrency=args.concurrency, poll_interval=args.poll_interval).run_forever()
@@ -1,8 +1,16 @@
-from sqlalchemy import Column, Integer, String, Float, Boolean, Date, DateTime, ForeignKey
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, Float, Boolean, Date, DateTime, ForeignKey, UniqueConstraint, Index, text, JSON, Computed, CheckConstraint
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import relationship, deferred, column_property
 from .database import Base
 from datetime import datetime
 
+PRODUCT_SEARCH_VECTOR = (
+    "setweight(to_tsvector('german'::regconfig, coalesce(name, '')), 'A') || "
+    "setweight(to_tsvector('english'::regconfig, coalesce(name, '')), 'A') || "
+    "setweight(to_tsvector('german'::regconfig, coalesce(description, '')), 'B') || "
+    "setweight(to_tsvector('english'::regconfig, coalesce(description, '')), 'B')"
+)
+
 
 class User(Base):
     """
@@ -51,6 +59,13 @@ class Product(Base):
     Represents a product that can be ordered by users.
     """
     __tablename__ = "products"
+    __table_args__ = (
+        # Pattern ops serve both name equality checks and name prefix filters
+        Index("ix_products_name_pattern", "name", postgresql_ops={"name": "varchar_pattern_ops"}),
+        Index("ix_products_search_vector", "search_vector", postgresql_using="gin"),
+        # Covers every write path: stock edits, imports and adjustments must leave room for cart reservations
+        CheckConstraint("stock >= reserved", name="ck_products_stock_covers_reserved"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, nullable=False)
@@ -58,9 +73,18 @@ class Product(Base):
     price = Column(Float, nullable=False)
     description = Column(String, nullable=False)
     stock = Column(Integer, nullable=False)
+    # Quantity held by active cart reservations; available = stock - reserved
+    reserved = Column(Integer, nullable=False, default=0, server_default=text("0"))
     image_path = Column(String, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # Maintained by PostgreSQL; names weigh more than descriptions, stemmed in German and English
+    search_vector = deferred(Column(TSVECTOR, Computed(PRODUCT_SEARCH_VECTOR, persisted=True)))
+    available = column_property(stock - reserved)
+    # Optimistic concurrency: ORM updates fail with StaleDataError if another transaction changed the row
+    version = Column(Integer, nullable=False, server_default=text("1"))
+
+    __mapper_args__ = {"version_id_col": version}
 
     order_items = relationship("OrderItem", back_populates="product")
 
@@ -71,15 +95,32 @@ class Order(Base):
     Represents a customer order.
     """
     __tablename__ = "orders"
+    __table_args__ = (
+        Index("ix_orders_user_id_status", "user_id", "status"),
+        # At most one open cart per user
+        Index("uq_orders_one_cart_per_user", "user_id", unique=True,
+              postgresql_where=text("status = 'im_warenkorb'")),
+        # A cart may be opened before the user has addresses; they are required from checkout on
+        CheckConstraint(
+            "status = 'im_warenkorb' OR (shipping_address_id IS NOT NULL AND billing_address_id IS NOT NULL)",
+            name="ck_orders_addresses_after_checkout"
+        ),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
-    shipping_address_id = Column(Integer, ForeignKey("addresses.id"), nullable=False)
-    billing_address_id = Column(Integer, ForeignKey("addresses.id"), nullable=False)
+    shipping_address_id = Column(Integer, ForeignKey("addresses.id"), nullable=True)
+    billing_address_id = Column(Integer, ForeignKey("addresses.id"), nullable=True)
     date = Column(DateTime, default=datetime.utcnow)
     status = Column(String)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    version = Column(Integer, nullable=False, server_default=text("1"))
+    # Sum of quantity * unit_price and of quantity over the items, kept up to date with every cart change
+    total_amount = Column(Float, nullable=False, default=0.0, server_default=text("0"))
+    item_count = Column(Integer, nullable=False, default=0, server_default=text("0"))
+
+    __mapper_args__ = {"version_id_col": version}
 
     user = relationship("User", back_populates="orders")
     items = relationship("OrderItem", back_populates="order", cascade="all, delete-orphan")
@@ -94,6 +135,10 @@ class OrderItem(Base):
     Represents an individual item within an order.
     """
     __tablename__ = "order_items"
+    __table_args__ = (
+        # One line per product and order; lets add-to-cart upsert with ON CONFLICT
+        UniqueConstraint("order_id", "product_id", name="uq_order_items_order_product"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     order_id = Column(Integer, ForeignKey("orders.id"))
@@ -110,12 +155,19 @@ class Invoice(Base):
     Represents an invoice for a completed order.
     """
     __tablename__ = "invoices"
+    __table_args__ = (
+        # Open invoices in keyset order for the dunning run; paid invoices drop out of the index
+        Index("ix_invoices_unpaid_invoice_date", "invoice_date", "id", postgresql_where=text("NOT is_paid")),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
-    order_id = Column(Integer, ForeignKey("orders.id"))
+    order_id = Column(Integer, ForeignKey("orders.id"), index=True)
     invoice_date = Column(Date)
     total_amount = Column(Float)
     is_paid = Column(Boolean, default=False)
+    # Number of reminders sent so far and the date of the latest one
+    dunning_level = Column(Integer, nullable=False, default=0, server_default=text("0"))
+    last_reminded_at = Column(Date, nullable=True)
 
     order = relationship("Order", back_populates="invoice")
     reminders = relationship("Reminder", back_populates="invoice", cascade="all, delete-orphan")
@@ -128,7 +180,7 @@ class Reminder(Base):
     __tablename__ = "reminders"
 
     id = Column(Integer, primary_key=True, index=True)
-    invoice_id = Column(Integer, ForeignKey("invoices.id"))
+    invoice_id = Column(Integer, ForeignKey("invoices.id"), index=True)
     reminder_date = Column(Date)
     status = Column(String)
 
@@ -142,9 +194,114 @@ class Shipment(Base):
     __tablename__ = "shipments"
 
     id = Column(Integer, primary_key=True, index=True)
-    order_id = Column(Integer, ForeignKey("orders.id"))
+    order_id = Column(Integer, ForeignKey("orders.id"), index=True)
     tracking_number = Column(String)
     shipped_date = Column(Date)
     carrier = Column(String)
+    status = Column(String)
 
     order = relationship("Order", back_populates="shipment")
+
+
+class StockBatch(Base):
+    """
+    Records an applied warehouse stock batch so that replays of the same batch are idempotent.
+    """
+    __tablename__ = "stock_batches"
+
+    batch_id = Column(String, primary_key=True)
+    item_count = Column(Integer, nullable=False)
+    result = Column(JSON, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
+class StockReservation(Base):
+    """
+    Holds stock for a cart line until checkout or until the reservation expires.
+    """
+    __tablename__ = "stock_reservations"
+
+    order_id = Column(Integer, ForeignKey("orders.id"), primary_key=True)
+    product_id = Column(Integer, ForeignKey("products.id"), primary_key=True)
+    quantity = Column(Integer, nullable=False)
+    expires_at = Column(DateTime, nullable=False, index=True)
+
+
+class IdempotencyKey(Base):
+    """
+    Stores the outcome of a POST sent with an Idempotency-Key header, so retries get the same response.
+    """
+    __tablename__ = "idempotency_keys"
+
+    scope = Column(String, primary_key=True)
+    key = Column(String, primary_key=True)
+    request_hash = Column(String(64), nullable=False)
+    status_code = Column(Integer, nullable=True)
+    response = Column(JSON, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    expires_at = Column(DateTime, nullable=False, index=True)
+
+
+class Job(Base):
+    """
+    A unit of background work in the PostgreSQL job queue, e.g. creating the invoice of a checked-out order.
+    """
+    __tablename__ = "jobs"
+    __table_args__ = (
+        # Workers only ever scan jobs that are due
+        Index("ix_jobs_queued_run_at", "run_at", postgresql_where=text("status = 'queued'")),
+    )
+
+    id = Column(Integer, primary_key=True)
+    kind = Column(String, nullable=False)
+    payload = Column(JSON, nullable=False)
+    # Enqueuing the same job twice (e.g. per order) is a no-op
+    dedupe_key = Column(String, unique=True, nullable=True)
+    status = Column(String, nullable=False, default="queued", server_default=text("'queued'"))
+    attempts = Column(Integer, nullable=False, default=0, server_default=text("0"))
+    max_attempts = Column(Integer, nullable=False, default=5, server_default=text("5"))
+    run_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    last_error = Column(String, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    finished_at = Column(DateTime, nullable=True)
+
+
+class DunningRun(Base):
+    """
+    Checkpoint of the dunning run for one day, so an interrupted run continues where it stopped.
+    """
+    __tablename__ = "dunning_runs"
+
+    run_date = Column(Date, primary_key=True)
+    last_invoice_date = Column(Date, nullable=True)
+    last_invoice_id = Column(Integer, nullable=True)
+    reminders_created = Column(Integer, nullable=False, default=0, server_default=text("0"))
+    started_at = Column(DateTime, default=datetime.utcnow)
+    finished_at = Column(DateTime, nullable=True)
+
+
+class DailySales(Base):
+    """
+    Rollup of completed orders per checkout day for the admin dashboard.
+    """
+    __tablename__ = "daily_sales"
+
+    day = Column(Date, primary_key=True)
+    order_count = Column(Integer, nullable=False, default=0, server_default=text("0"))
+    units = Column(Integer, nullable=False, default=0, server_default=text("0"))
+    revenue = Column(Float, nullable=False, default=0.0, server_default=text("0"))
+
+
+class ProductSales(Base):
+    """
+    Rollup of units sold and revenue per product for the admin dashboard.
+    """
+    __tablename__ = "product_sales"
+    __table_args__ = (
+        # Top sellers are read in this order
+        Index("ix_product_sales_units", "units", "product_id"),
+    )
+
+    product_id = Column(Integer, ForeignKey("products.id"), primary_key=True)
+    units = Column(Integer, nullable=False, default=0, server_default=text("0"))
+    revenue = Column(Float, nullable=False, default=0.0, server_default=text("0"))
@@ -0,0 +1,427 @@
+from datetime import datetime
+from typing import Optional
+import logging
+from fastapi import HTTPException
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models import Product, OrderItem, Order, User
+from app.pagination import DEFAULT_PAGE_SIZE
+from app.order.order_service import validate_quantity, integrity_error_code, FOREIGN_KEY_VIOLATION, UNIQUE_VIOLATION
+from app.order.order_queries import (
+    build_cart_query,
+    build_cart_insert_statement,
+    build_default_address_query,
+    build_order_history_query,
+    build_order_page,
+    build_cart_upsert_statement,
+    build_cart_line_query,
+    build_order_totals_update_statement,
+    build_order_totals_query,
+    build_locked_cart_query,
+    build_order_product_lock_query,
+    build_stock_deduction_statement,
+    build_shortfall_query,
+    shortfall_detail,
+    CART_STATUS,
+    COMPLETED_STATUS,
+)
+from app.jobs.handlers import build_order_fulfillment_job
+from app.jobs.sales_rollup import build_sales_rollup_job
+from app.order.reservation_queries import (
+    build_reservation_change_statement,
+    build_reservation_delete_statement,
+    reservation_expiry,
+    shortage_detail,
+)
+
+logger = logging.getLogger(__name__)
+
+
+async def user_exists_by_id(db: AsyncSession, user_id: int) -> bool:
+    """
+    Checks whether a user with the given ID exists in the database.
+
+    Args:
+        db (AsyncSession): The active SQLAlchemy async database session.
+        user_id (int): The ID of the user to check.
+
+    Returns:
+        bool: True if the user exists, False otherwise.
+    """
+    result = await db.execute(select(User.id).where(User.id == user_id))
+    return result.first() is not None
+
+
+async def get_cart_order(db: AsyncSession, user_id: int):
+    """
+    Retrieves the open cart order of a user.
+
+    Args:
+        db (AsyncSession): SQLAlchemy async session.
+        user_id (int): ID of the user.
+
+    Returns:
+        Optional[Order]: The cart order, or None if the user has no cart.
+    """
+    result = await db.execute(
+        select(Order).where(Order.user_id == user_id, Order.status == "im_warenkorb").limit(1)
+    )
+    return result.scalars().first()
+
+
+async def get_cart_item(db: AsyncSession, order_id: int, product_id: int):
+    """
+    Retrieves and locks the cart line for a product within an order.
+
+    Args:
+        db (AsyncSession): SQLAlchemy async session.
+        order_id (int): ID of the cart order.
+        product_id (int): ID of the product.
+
+    Returns:
+        Optional[OrderItem]: The order item, or None if the product is not in the cart.
+    """
+    result = await db.execute(build_cart_line_query(order_id, product_id))
+    return result.scalars().first()
+
+
+async def assign_order_addresses(db: AsyncSession, order: Order):
+    """
+    Fills in missing shipping and billing addresses of an order from the user's addresses.
+
+    Args:
+        db (AsyncSession): SQLAlchemy async session.
+        order (Order): The locked cart order.
+
+    Raises:
+        HTTPException: 400 if the user has no address to ship or bill to. The transaction is rolled back.
+    """
+    if order.shipping_address_id is None:
+        order.shipping_address_id = (
+            await db.execute(build_default_address_query(order.user_id, shipping=True))
+        ).scalar()
+    if order.billing_address_id is None:
+        order.billing_address_id = (
+            await db.execute(build_default_address_query(order.user_id, shipping=False))
+        ).scalar()
+    if order.shipping_address_id is None or order.billing_address_id is None:
+        await db.rollback()
+        raise HTTPException(status_code=400, detail="Please add an address before checking out")
+
+
+async def reduce_stock_on_checkout(db: AsyncSession, order: Order):
+    """
+    Converts the reservations of an order into stock deductions.
+
+    The product rows are locked in id order, then a single conditional UPDATE
+    deducts the ordered quantities and releases what the order held. Lines that
+    are fully reserved always succeed; lines whose reservation expired only
+    succeed if enough unreserved stock is left. If any item is short, the
+    transaction is rolled back and a per-item shortfall report is raised. The
+    caller commits on success, together with its own changes.
+
+    Args:
+        db (AsyncSession): The active SQLAlchemy async database session.
+        order (Order): The order instance whose items are to be processed.
+
+    Raises:
+        HTTPException: 409 with a shortfall report if a product does not exist
+                           or its available stock is insufficient for any of the order items.
+    """
+    locked = (await db.execute(build_order_product_lock_query(order.id))).all()
+    deducted_ids = set((await db.execute(build_stock_deduction_statement(order.id))).scalars().all())
+    # Only an incomplete deduction needs the shortfall report
+    if locked and len(deducted_ids) == locked[0].product_count:
+        shortfalls = []
+    else:
+        shortfalls = (await db.execute(build_shortfall_query(order.id, deducted_ids))).all()
+    if shortfalls:
+        await db.rollback()
+        raise HTTPException(status_code=409, detail=shortfall_detail(shortfalls))
+
+    await db.execute(build_reservation_delete_statement(order.id))
+    logger.info(f"Stock reduced for order {order.id}")
+
+
+async def reserve_stock(db: AsyncSession, order_id: int, product_id: int, quantity: int):
+    """
+    Sets the quantity a cart line holds of a product and restarts its time to live.
+
+    The lock of the product, the check against the available stock (stock minus
+    all active reservations), the change of the reserved counter and the upsert
+    of the reservation run as a single statement, so they cannot race other
+    carts or the sweeper. Only the difference to the quantity already held has
+    to be available. A quantity of 0 releases the reservation.
+
+    Args:
+        db (AsyncSession): The active SQLAlchemy async database session.
+        order_id (int): ID of the cart order.
+        product_id (int): ID of the product.
+        quantity (int): The new quantity of the cart line.
+
+    Raises:
+        HTTPException: 404 if the product does not exist, 409 if the additional
+                           quantity is not available. The transaction is rolled back.
+    """
+    change = (await db.execute(
+        build_reservation_change_statement(order_id, product_id, quantity, reservation_expiry())
+    )).first()
+    if change is None:
+        await db.rollback()
+        raise HTTPException(status_code=404, detail="Product not found")
+    if not change.granted:
+        await db.rollback()
+        available = max(change.stock - change.reserved + change.held, 0)
+        raise HTTPException(status_code=409, detail=shortage_detail(change.name, available))
+
+
+async def ensure_cart_order(db: AsyncSession, user_id: int) -> bool:
+    """
+    Makes sure the user has an open cart order, creating it if necessary.
+
+    The insert runs in a savepoint, so a foreign key violation for an unknown
+    user or a concurrently created cart does not abort the surrounding transaction.
+
+    Args:
+        db (AsyncSession): SQLAlchemy async session.
+        user_id (int): ID of the user.
+
+    Returns:
+        bool: True if the user has an open cart, False if the user does not exist.
+
+    Raises:
+        IntegrityError: For any other integrity violation.
+    """
+    cart_query = build_cart_query(user_id)
+    if (await db.execute(cart_query)).first() is not None:
+        return True
+    try:
+        async with db.begin_nested():
+            await db.execute(build_cart_insert_statement(user_id))
+        return True
+    except IntegrityError as error:
+        code = integrity_error_code(error)
+        if code == FOREIGN_KEY_VIOLATION:
+            return False
+        if code == UNIQUE_VIOLATION:
+            # A concurrent request opened the cart first
+            return (await db.execute(cart_query)).first() is not None
+        raise
+
+
+async def add_to_cart(db: AsyncSession, user_id: int, product_id: int, quantity: int):
+    """
+    Adds a product to the user's cart. Updates quantity if already present.
+
+    The common case of an existing cart costs a single upsert statement. Only if
+    it affects no row is the cart created or the missing user/product reported.
+    The new line quantity is then reserved; if it is not available, nothing is
+    added and a 409 with the available quantity is raised. The order totals are
+    increased in the same transaction.
+
+    Args:
+        db (AsyncSession): SQLAlchemy async session.
+        user_id (int): ID of the user.
+        product_id (int): ID of the product.
+        quantity (int): Quantity to add.
+
+    Returns:
+        dict: Confirmation message.
+    """
+    try:
+        validate_quantity(quantity)
+
+        upsert = build_cart_upsert_statement(user_id, product_id, quantity)
+        line = (await db.execute(upsert)).first()
+        if line is None:
+            # No open cart yet, or the product does not exist
+            if not await ensure_cart_order(db, user_id):
+                await db.rollback()
+                raise HTTPException(status_code=404, detail="User not found")
+            line = (await db.execute(upsert)).first()
+            if line is None:
+                await db.rollback()
+                raise HTTPException(status_code=404, detail="Product not found")
+
+        # Lock the order before the product, in the same order as checkout
+        await db.execute(build_order_totals_update_statement(line.order_id, quantity * line.unit_price, quantity))
+        # Hold the whole line quantity for this cart, or fail before anything is committed
+        await reserve_stock(db, line.order_id, product_id, line.quantity)
+
+        await db.commit()
+        return {"message": "Product added to cart."}
+    except HTTPException:
+        raise
+    except Exception as error:
+        await db.rollback()
+        logger.error(f"Error adding to cart: {error}")
+        raise HTTPException(status_code=500, detail="Error adding to cart")
+
+
+async def update_cart_item(db: AsyncSession, user_id: int, product_id: int, quantity: int):
+    """
+    Updates the quantity of a product in the user's cart and adjusts its reservation and the order totals.
+
+    Args:
+        db (AsyncSession): SQLAlchemy async session.
+        user_id (int): ID of the user.
+        product_id (int): ID of the product.
+        quantity (int): New quantity value.
+
+    Returns:
+        dict: Confirmation message.
+    """
+    try:
+        validate_quantity(quantity)
+
+        order_id = (await db.execute(build_cart_query(user_id))).scalar()
+        if order_id is None:
+            raise HTTPException(status_code=404, detail="Product not in cart")
+        item = await get_cart_item(db, order.id, product_id)
+        if not item:
+            raise HTTPException(status_code=404, detail="Product not in cart")
+        delta = quantity - item.quantity
+        item.quantity = quantity
+        await db.flush()
+        await db.execute(build_order_totals_update_statement(order_id, delta * item.unit_price, delta))
+        await reserve_stock(db, order_id, product_id, quantity)
+        await db.commit()
+        return {"message": "Cart item updated."}
+    except HTTPException:
+        raise
+    except Exception as error:
+        logger.error(f"Error updating cart item: {error}")
+        raise HTTPException(status_code=500, detail="Error updating cart item")
+
+
+async def remove_from_cart(db: AsyncSession, user_id: int, product_id: int):
+    """
+    Removes a product from the user's cart, releases its reservation and updates the order totals.
+
+    Args:
+        db (AsyncSession): SQLAlchemy async session.
+        user_id (int): ID of the user.
+        product_id (int): ID of the product.
+
+    Returns:
+        dict: Confirmation message.
+    """
+    try:
+        order_id = (await db.execute(build_cart_query(user_id))).scalar()
+        if order_id is None:
+            raise HTTPException(status_code=404, detail="Product not in cart")
+        item = await get_cart_item(db, order.id, product_id)
+        if not item:
+            raise HTTPException(status_code=404, detail="Product not in cart")
+        await db.execute(build_order_totals_update_statement(order_id, -item.quantity * item.unit_price, -item.quantity))
+        await db.delete(item)
+        await db.flush()
+        await reserve_stock(db, order_id, product_id, 0)
+        await db.commit()
+        return {"message": "Product removed from cart."}
+    except HTTPException:
+        raise
+    except Exception as error:
+        logger.error(f"Error removing product from cart: {error}")
+        raise HTTPException(status_code=500, detail="Error removing product from cart")
+
+
+async def get_cart(db: AsyncSession, user_id: int):
+    """
+    Retrieves the current cart for the user.
+
+    Args:
+        db (AsyncSession): SQLAlchemy async session.
+        user_id (int): ID of the user.
+
+    Returns:
+        dict: Cart contents.
+    """
+    try:
+        order = await get_cart_order(db, user_id)
+        if not order:
+            return {"message": "Cart is empty", "items": []}
+        result = await db.execute(select(OrderItem).where(OrderItem.order_id == order.id))
+        return {"order_id": order.id, "items": result.scalars().all()}
+    except Exception as error:
+        logger.error(f"Error retrieving cart: {error}")
+        raise HTTPException(status_code=500, detail="Error retrieving cart")
+
+
+async def checkout_cart(db: AsyncSession, user_id: int):
+    """
+    Finalizes the user's cart by reducing product stock and marking the order as completed.
+    Stock deduction, status change and the jobs for invoice, shipment and sales rollups
+    are committed in one transaction.
+
+    Args:
+        db (AsyncSession): SQLAlchemy async session.
+        user_id (int): ID of the user.
+
+    Returns:
+        dict: Confirmation message.
+    """
+    try:
+        order = (await db.execute(build_locked_cart_query(user_id))).scalars().first()
+        if not order:
+            raise HTTPException(status_code=404, detail="No cart to checkout")
+
+        await assign_order_addresses(db, order)
+
+        # Reduce stock for all items in the order
+        await reduce_stock_on_checkout(db, order)
+
+        # Finalize order in the same transaction as the stock deduction
+        order.status = COMPLETED_STATUS
+        order.date = datetime.utcnow()
+        # Settle the stored totals from the items, so a completed order always matches them
+        totals = (await db.execute(build_order_totals_query(order.id))).one()
+        order.total_amount = float(totals.total_amount)
+        order.item_count = totals.item_count
+        # Invoice, shipment and the sales rollups are handled by the job worker once this commits
+        await db.execute(build_order_fulfillment_job(order.id))
+        await db.execute(build_sales_rollup_job(order.id))
+        await db.commit()
+        return {"message": "Order checked out successfully"}
+    except HTTPException:
+        await db.rollback()
+        raise
+    except Exception as error:
+        await db.rollback()
+        logger.error(f"Error during checkout: {error}")
+        raise HTTPException(status_code=500, detail="Error during checkout")
+
+
+async def get_user_orders(db: AsyncSession, user_id: int, limit: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None,
+                          date_from: Optional[datetime] = None, date_to: Optional[datetime] = None,
+                          with_items: bool = True):
+    """
+    Retrieves one page of completed orders for a user, newest first, with or without their items.
+
+    Args:
+        db (AsyncSession): SQLAlchemy async session.
+        user_id (int): ID of the user.
+        limit (int): Page size.
+        cursor (Optional[str]): Cursor returned with the previous page.
+        date_from (Optional[datetime]): Only include orders placed at or after this time.
+        date_to (Optional[datetime]): Only include orders placed before this time.
+        with_items (bool): Whether to load the items; the stored totals are always included.
+
+    Returns:
+        dict: The orders of the page and the cursor for the next page.
+    """
+    try:
+        if not await user_exists_by_id(db, user_id):
+            raise HTTPException(status_code=404, detail="User not found")
+        try:
+            query = build_order_history_query(user_id, limit, cursor, date_from, date_to, with_items)
+        except ValueError as error:
+            raise HTTPException(status_code=400, detail=str(error))
+        orders = (await db.execute(query)).scalars().all()
+        return build_order_page(orders, limit)
+    except HTTPException:
+        raise
+    except Exception as error:
+        logger.error(f"Error retrieving user orders: {error}")
+        raise HTTPException(status_code=500, detail="Error retrieving user orders")
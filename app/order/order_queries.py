@@ -0,0 +1,389 @@
+from datetime import datetime
+from typing import Collection, Optional
+from sqlalchemy import select, update, func, distinct, or_, tuple_, literal, cast, Integer, Numeric, Select, Update
+from sqlalchemy.dialects.postgresql import insert as pg_insert, Insert
+from sqlalchemy.orm import selectinload
+from app.models import Product, OrderItem, Order, StockReservation, Address
+from app.pagination import encode_cursor, decode_cursor
+
+CART_STATUS = "im_warenkorb"
+COMPLETED_STATUS = "abgeschlossen"
+
+
+def build_cart_query(user_id: int) -> Select:
+    """
+    Builds a query for the id of the user's open cart order.
+
+    Args:
+        user_id (int): ID of the user.
+
+    Returns:
+        Select: The cart id query.
+    """
+    return select(Order.id).where(Order.user_id == user_id, Order.status == CART_STATUS).limit(1)
+
+
+def build_default_address_query(user_id: int, shipping: bool) -> Select:
+    """
+    Builds a query for the address an order of the user is shipped or billed to.
+
+    Addresses flagged for the purpose come first, then any other address of the user.
+
+    Args:
+        user_id (int): ID of the user.
+        shipping (bool): True for the shipping address, False for the billing address.
+
+    Returns:
+        Select: The address id query, empty if the user has no address.
+    """
+    flag = Address.is_shipping if shipping else Address.is_billing
+    return (
+        select(Address.id)
+        .where(Address.user_id == user_id)
+        .order_by(flag.is_(True).desc(), Address.id)
+        .limit(1)
+    )
+
+
+def build_cart_insert_statement(user_id: int) -> Insert:
+    """
+    Builds the INSERT that opens a cart for the user.
+
+    The user's default shipping and billing addresses are filled in by the same
+    statement; they stay empty if the user has none yet and are resolved again
+    at checkout.
+
+    Args:
+        user_id (int): ID of the user.
+
+    Returns:
+        Insert: The cart insert statement.
+    """
+    now = datetime.utcnow()
+    return pg_insert(Order).values(
+        user_id=user_id,
+        date=now,
+        status=CART_STATUS,
+        shipping_address_id=build_default_address_query(user_id, shipping=True).scalar_subquery(),
+        billing_address_id=build_default_address_query(user_id, shipping=False).scalar_subquery(),
+        total_amount=0.0,
+        item_count=0,
+        created_at=now,
+        updated_at=now
+    )
+
+
+def build_locked_cart_query(user_id: int) -> Select:
+    """
+    Builds a query for the user's cart order that locks the order row.
+    A concurrent checkout of the same cart waits and then no longer finds the cart.
+
+    Args:
+        user_id (int): ID of the user.
+
+    Returns:
+        Select: The locking cart query.
+    """
+    return (
+        select(Order)
+        .where(Order.user_id == user_id, Order.status == CART_STATUS)
+        .limit(1)
+        .with_for_update()
+    )
+
+
+def build_cart_upsert_statement(user_id: int, product_id: int, quantity: int) -> Insert:
+    """
+    Builds a single INSERT ... ON CONFLICT that adds a product to the user's open cart.
+
+    The cart id and the unit price are read in the same statement. If the product
+    is already in the cart, its quantity is increased instead. The cart row is read
+    FOR KEY SHARE, so an add-to-cart racing a checkout waits for it and then no
+    longer sees the completed order as cart. No row is returned if the user has no
+    open cart or the product does not exist.
+
+    Args:
+        user_id (int): ID of the user.
+        product_id (int): ID of the product.
+        quantity (int): Quantity to add.
+
+    Returns:
+        Insert: The upsert statement returning the id, order id, new quantity and unit price of the line.
+    """
+    cart = (
+        select(Order.id.label("order_id"))
+        .where(Order.user_id == user_id, Order.status == CART_STATUS)
+        .limit(1)
+        .with_for_update(read=True, key_share=True)
+        .cte("cart")
+    )
+    source = (
+        select(cart.c.order_id, Product.id, literal(quantity, Integer), Product.price)
+        .select_from(cart)
+        .join(Product, Product.id == product_id)
+    )
+    statement = pg_insert(OrderItem).from_select(
+        ["order_id", "product_id", "quantity", "unit_price"], source
+    )
+    return statement.on_conflict_do_update(
+        constraint="uq_order_items_order_product",
+        set_={"quantity": OrderItem.quantity + statement.excluded.quantity}
+    ).returning(OrderItem.id, OrderItem.order_id, OrderItem.quantity, OrderItem.unit_price)
+
+
+def build_cart_line_query(order_id: int, product_id: int) -> Select:
+    """
+    Builds a query for one cart line that locks it until the transaction ends.
+
+    Concurrent changes of the same line wait for each other, so the quantity
+    read here is the one the change of the order totals is based on.
+
+    Args:
+        order_id (int): ID of the cart order.
+        product_id (int): ID of the product.
+
+    Returns:
+        Select: The locking query for the OrderItem.
+    """
+    return (
+        select(OrderItem)
+        .where(OrderItem.order_id == order_id, OrderItem.product_id == product_id)
+        .with_for_update()
+    )
+
+
+def build_order_totals_update_statement(order_id: int, amount: float, count: int) -> Update:
+    """
+    Builds an UPDATE that adds the change of a cart line to the stored totals of its order.
+
+    The totals are changed relative to the current row, so concurrent changes
+    of different lines of the same cart add up instead of overwriting each other.
+
+    Args:
+        order_id (int): ID of the order.
+        amount (float): Change of the order value.
+        count (int): Change of the number of units.
+
+    Returns:
+        Update: The totals update statement.
+    """
+    return (
+        update(Order)
+        .where(Order.id == order_id)
+        .values(
+            total_amount=func.round(cast(Order.total_amount + amount, Numeric), 2),
+            item_count=Order.item_count + count,
+            version=Order.version + 1
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+
+def build_order_totals_query(order_id: int) -> Select:
+    """
+    Builds a query that computes the value and number of units of an order from its items.
+
+    Args:
+        order_id (int): ID of the order.
+
+    Returns:
+        Select: One row with total_amount and item_count.
+    """
+    return select(
+        func.round(cast(func.coalesce(func.sum(OrderItem.quantity * OrderItem.unit_price), 0), Numeric), 2)
+        .label("total_amount"),
+        func.coalesce(func.sum(OrderItem.quantity), 0).label("item_count")
+    ).where(OrderItem.order_id == order_id)
+
+
+def _demand_cte(order_id: int):
+    """
+    Ordered quantity per product of an order, together with the quantity the
+    order holds through its stock reservations.
+    """
+    return (
+        select(
+            OrderItem.product_id,
+            func.sum(OrderItem.quantity).label("quantity"),
+            func.coalesce(func.max(StockReservation.quantity), 0).label("held")
+        )
+        .outerjoin(
+            StockReservation,
+            (StockReservation.order_id == OrderItem.order_id) & (StockReservation.product_id == OrderItem.product_id)
+        )
+        .where(OrderItem.order_id == order_id)
+        .group_by(OrderItem.product_id)
+        .cte("demand")
+    )
+
+
+def build_order_product_lock_query(order_id: int) -> Select:
+    """
+    Builds a query that locks the product rows of an order in id order.
+
+    Running it before the deduction means concurrent checkouts over overlapping
+    products cannot deadlock, and the reservations read afterwards can no longer
+    be changed by the sweeper, which only touches products it has locked. Every
+    row also carries the number of distinct products in the order, so the caller
+    knows whether the deduction covered all of them.
+
+    Args:
+        order_id (int): ID of the order being checked out.
+
+    Returns:
+        Select: Rows with the id of each locked product and the order's product_count.
+    """
+    product_count = (
+        select(func.count(distinct(OrderItem.product_id)))
+        .where(OrderItem.order_id == order_id)
+        .scalar_subquery()
+    )
+    return (
+        select(Product.id, product_count.label("product_count"))
+        .where(Product.id.in_(select(OrderItem.product_id).where(OrderItem.order_id == order_id)))
+        .order_by(Product.id)
+        .with_for_update(of=Product, key_share=True)
+    )
+
+
+def build_stock_deduction_statement(order_id: int) -> Update:
+    """
+    Builds one conditional UPDATE that turns an order's reservations into stock deductions.
+
+    For every product, the ordered quantity is taken from the stock and the
+    quantity the order held is released from the reserved counter. A row is only
+    updated if the stock not reserved by other carts covers the ordered quantity,
+    which always holds for fully reserved lines. The ids of the updated products
+    are returned, so any product missing from the result is short. The product
+    rows must be locked with build_order_product_lock_query first.
+
+    Args:
+        order_id (int): ID of the order being checked out.
+
+    Returns:
+        Update: The deduction statement returning the updated product ids.
+    """
+    demand = _demand_cte(order_id)
+    return (
+        update(Product)
+        .where(
+            Product.id == demand.c.product_id,
+            Product.stock - Product.reserved + demand.c.held >= demand.c.quantity
+        )
+        .values(
+            stock=Product.stock - demand.c.quantity,
+            reserved=func.greatest(Product.reserved - demand.c.held, 0),
+            updated_at=datetime.utcnow(),
+            version=Product.version + 1
+        )
+        .returning(Product.id)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def build_shortfall_query(order_id: int, deducted_ids: Collection[int]) -> Select:
+    """
+    Builds the per-item shortfall report for an order whose stock deduction was incomplete.
+
+    Args:
+        order_id (int): ID of the order being checked out.
+        deducted_ids (Collection[int]): Products whose stock was deducted successfully.
+
+    Returns:
+        Select: Rows with product_id, name, available and required for every short item.
+    """
+    demand = _demand_cte(order_id)
+    available = Product.stock - Product.reserved + demand.c.held
+    query = (
+        select(
+            demand.c.product_id,
+            Product.name,
+            available.label("available"),
+            demand.c.quantity.label("required")
+        )
+        .select_from(demand)
+        .outerjoin(Product, Product.id == demand.c.product_id)
+        .where(or_(Product.id.is_(None), available < demand.c.quantity))
+        .order_by(demand.c.product_id)
+    )
+    if deducted_ids:
+        query = query.where(demand.c.product_id.not_in(list(deducted_ids)))
+    return query
+
+
+def shortfall_detail(rows) -> dict:
+    """
+    Formats shortfall rows as the detail of a 409 checkout response.
+
+    Args:
+        rows: Result rows of build_shortfall_query.
+
+    Returns:
+        dict: A message and one entry per short item.
+    """
+    return {
+        "message": "Not enough stock for some items. No stock was deducted.",
+        "shortfalls": [
+            {
+                "product_id": row.product_id,
+                "name": row.name,
+                "available": row.available or 0,
+                "required": row.required
+            }
+            for row in rows
+        ]
+    }
+
+
+def build_order_history_query(user_id: int, limit: int, cursor: Optional[str] = None,
+                              date_from: Optional[datetime] = None,
+                              date_to: Optional[datetime] = None, with_items: bool = True) -> Select:
+    """
+    Builds a keyset-paginated query for a user's completed orders, newest first.
+
+    Items are loaded with one additional SELECT ... IN query for the whole page,
+    so a page costs the same number of queries regardless of its size. Without
+    items, the page is read from the orders table alone, using the stored totals.
+
+    Args:
+        user_id (int): ID of the user.
+        limit (int): Page size.
+        cursor (Optional[str]): Cursor of the previous page.
+        date_from (Optional[datetime]): Only include orders placed at or after this time.
+        date_to (Optional[datetime]): Only include orders placed before this time.
+        with_items (bool): Whether to load the items of the orders.
+
+    Returns:
+        Select: The order history statement, fetching one extra row to detect a next page.
+
+    Raises:
+        ValueError: If the cursor is invalid.
+    """
+    query = select(Order).where(Order.user_id == user_id, Order.status == COMPLETED_STATUS)
+    if with_items:
+        query = query.options(selectinload(Order.items))
+    if date_from is not None:
+        query = query.where(Order.date >= date_from)
+    if date_to is not None:
+        query = query.where(Order.date < date_to)
+    if cursor:
+        last_date, last_id = decode_cursor(cursor, (datetime, int))
+        query = query.where(tuple_(Order.date, Order.id) < tuple_(last_date, last_id))
+    return query.order_by(Order.date.desc(), Order.id.desc()).limit(limit + 1)
+
+
+def build_order_page(orders: list, limit: int) -> dict:
+    """
+    Turns the result of build_order_history_query into a page with the cursor for the next page.
+
+    Args:
+        orders (list): Orders returned by the query (up to limit + 1).
+        limit (int): Page size.
+
+    Returns:
+        dict: The orders of the page and the next cursor (None on the last page).
+    """
+    has_more = len(orders) > limit
+    orders = orders[:limit]
+    next_cursor = encode_cursor([orders[-1].date, orders[-1].id]) if has_more and orders else None
+    return {"items": orders, "next_cursor": next_cursor}
@@ -1,94 +1,141 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from app.database import get_db
-from app.order.order_service import (
-    add_to_cart,
-    get_cart,
-    update_cart_item,
-    remove_from_cart,
-    checkout_cart,
-    get_user_orders,
-)
+from datetime import datetime
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Header
+from app.dependencies import get_session, run_service, USE_ASYNC_DB
+from app.idempotency import run_idempotent
+from app.order import order_service, async_order_service
 from app.order.order_schemas import (
     CartAddItem,
     CartUpdateItem,
     CartRemoveItem,
     CartCheckout,
+    OrderPage,
+    OrderSummaryPage,
+    CartResponse,
 )
+from app.schemas import MessageResponse
+from app.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
 
 router = APIRouter(prefix="/orders", tags=["orders"])
 
+# Service functions matching the configured DB_BACKEND
+orders = async_order_service if USE_ASYNC_DB else order_service
+
 
-@router.get("/cart/{user_id}")
-def view_cart(user_id: int, db: Session = Depends(get_db)):
+@router.get("/cart/{user_id}", response_model=CartResponse, response_model_exclude_none=True)
+async def view_cart(user_id: int, db=Depends(get_session)):
     """
     Retrieves the current cart for a user.
     """
     try:
-        return get_cart(db, user_id)
+        return await run_service(orders.get_cart, db, user_id)
     except Exception as error:
         raise HTTPException(status_code=500, detail=str(error))
 
 
-@router.post("/cart/add")
-def add_product_to_cart(payload: CartAddItem, db: Session = Depends(get_db)):
+@router.post("/cart/add", response_model=MessageResponse)
+async def add_product_to_cart(
+    payload: CartAddItem,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", max_length=255),
+    db=Depends(get_session)
+):
     """
     Adds a product to the user's cart using Pydantic schema.
+    Retries with the same Idempotency-Key header return the first response instead of adding again.
     """
-    try:
-        return add_to_cart(db, payload.user_id, payload.product_id, payload.quantity)
-    except HTTPException as http_error:
-        raise http_error
-    except Exception as error:
-        raise HTTPException(status_code=500, detail=str(error))
+    async def add():
+        try:
+            return await run_service(orders.add_to_cart, db, payload.user_id, payload.product_id, payload.quantity)
+        except HTTPException as http_error:
+            raise http_error
+        except Exception as error:
+            raise HTTPException(status_code=500, detail=str(error))
 
+    return await run_idempotent(db, f"cart_add:{payload.user_id}", idempotency_key, payload.model_dump(), add)
 
-@router.put("/cart/update")
-def update_product_in_cart(payload: CartUpdateItem, db: Session = Depends(get_db)):
+
+@router.put("/cart/update", response_model=MessageResponse)
+async def update_product_in_cart(payload: CartUpdateItem, db=Depends(get_session)):
     """
     Updates the quantity of a product in the user's cart using Pydantic schema.
     """
     try:
-        return update_cart_item(db, payload.user_id, payload.product_id, payload.quantity)
+        return await run_service(orders.update_cart_item, db, payload.user_id, payload.product_id, payload.quantity)
     except HTTPException as http_error:
         raise http_error
     except Exception as error:
         raise HTTPException(status_code=500, detail=str(error))
 
 
-@router.delete("/cart/remove")
-def remove_product_from_cart(payload: CartRemoveItem, db: Session = Depends(get_db)):
+@router.delete("/cart/remove", response_model=MessageResponse)
+async def remove_product_from_cart(payload: CartRemoveItem, db=Depends(get_session)):
     """
     Removes a product from the user's cart using Pydantic schema.
     """
     try:
-        return remove_from_cart(db, payload.user_id, payload.product_id)
+        return await run_service(orders.remove_from_cart, db, payload.user_id, payload.product_id)
     except HTTPException as http_error:
         raise http_error
     except Exception as error:
         raise HTTPException(status_code=500, detail=str(error))
 
 
-@router.post("/cart/checkout")
-def checkout_user_cart(payload: CartCheckout, db: Session = Depends(get_db)):
+@router.post("/cart/checkout", response_model=MessageResponse)
+async def checkout_user_cart(
+    payload: CartCheckout,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", max_length=255),
+    db=Depends(get_session)
+):
     """
     Finalizes the cart by changing its status to 'abgeschlossen' and deducting stock.
+    Retries with the same Idempotency-Key header return the first response instead of checking out again.
+    """
+    async def checkout():
+        try:
+            return await run_service(orders.checkout_cart, db, payload.user_id)
+        except HTTPException as http_error:
+            raise http_error
+        except Exception as error:
+            raise HTTPException(status_code=500, detail=str(error))
+
+    return await run_idempotent(db, f"checkout:{payload.user_id}", idempotency_key, payload.model_dump(), checkout)
+
+
+@router.get("/user/{user_id}", response_model=OrderPage)
+async def get_user_completed_orders(
+    user_id: int,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    db=Depends(get_session)
+):
+    """
+    Retrieves completed orders with their items for a given user, newest first and page by page.
     """
     try:
-        return checkout_cart(db, payload.user_id)
+        return await run_service(orders.get_user_orders, db, user_id, limit, cursor, date_from, date_to)
     except HTTPException as http_error:
         raise http_error
     except Exception as error:
         raise HTTPException(status_code=500, detail=str(error))
 
 
-@router.get("/user/{user_id}")
-def get_user_completed_orders(user_id: int, db: Session = Depends(get_db)):
+@router.get("/user/{user_id}/summary", response_model=OrderSummaryPage)
+async def get_user_order_summaries(
+    user_id: int,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    db=Depends(get_session)
+):
     """
-    Retrieves all completed orders for a given user.
+    Retrieves completed orders with their total amount and item count but without items, page by page.
+    Only the orders table is read.
     """
     try:
-        return get_user_orders(db, user_id)
+        return await run_service(orders.get_user_orders, db, user_id, limit, cursor, date_from, date_to, False)
     except HTTPException as http_error:
         raise http_error
     except Exception as error:
@@ -23,17 +23,32 @@ class OrderItemResponse(BaseModel):
         from_attributes = True
 
 
-class OrderResponse(BaseModel):
+class OrderSummaryResponse(BaseModel):
     id: int
     user_id: int
     date: datetime
     status: str
-    items: List[OrderItemResponse]
+    total_amount: float
+    item_count: int
 
     class Config:
         from_attributes = True
 
 
+class OrderResponse(OrderSummaryResponse):
+    items: List[OrderItemResponse]
+
+
+class OrderPage(BaseModel):
+    items: List[OrderResponse]
+    next_cursor: Optional[str] = None
+
+
+class OrderSummaryPage(BaseModel):
+    items: List[OrderSummaryResponse]
+    next_cursor: Optional[str] = None
+
+
 # New schemas for cart handling
 
 class CartAddItem(BaseModel):
@@ -67,5 +82,7 @@ class CartItemResponse(BaseModel):
 
 
 class CartResponse(BaseModel):
-    order_id: int
+    # Without an open cart, only the message and an empty item list are returned
+    order_id: Optional[int] = None
+    message: Optional[str] = None
     items: List[CartItemResponse]
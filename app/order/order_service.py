@@ -1,11 +1,57 @@
 from datetime import datetime
+from typing import Optional
 import logging
 from fastapi import HTTPException
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from app.models import Product, OrderItem, Order, User
+from app.pagination import DEFAULT_PAGE_SIZE
+from app.order.order_queries import (
+    build_cart_query,
+    build_cart_insert_statement,
+    build_default_address_query,
+    build_order_history_query,
+    build_order_page,
+    build_cart_upsert_statement,
+    build_cart_line_query,
+    build_order_totals_update_statement,
+    build_order_totals_query,
+    build_locked_cart_query,
+    build_order_product_lock_query,
+    build_stock_deduction_statement,
+    build_shortfall_query,
+    shortfall_detail,
+    CART_STATUS,
+    COMPLETED_STATUS,
+)
+from app.jobs.handlers import build_order_fulfillment_job
+from app.jobs.sales_rollup import build_sales_rollup_job
+from app.order.reservation_queries import (
+    build_reservation_change_statement,
+    build_reservation_delete_statement,
+    reservation_expiry,
+    shortage_detail,
+)
 
 logger = logging.getLogger(__name__)
 
+# SQLSTATEs of the integrity errors a cart insert can run into
+FOREIGN_KEY_VIOLATION = "23503"
+UNIQUE_VIOLATION = "23505"
+
+
+def integrity_error_code(error: IntegrityError) -> Optional[str]:
+    """
+    Returns the SQLSTATE of an integrity error for both psycopg2 and asyncpg.
+
+    Args:
+        error (IntegrityError): The error raised by SQLAlchemy.
+
+    Returns:
+        Optional[str]: The five-character SQLSTATE, if the driver reports one.
+    """
+    return getattr(error.orig, "pgcode", None) or getattr(error.orig, "sqlstate", None)
+
 
 def user_exists_by_id(db: Session, user_id: int) -> bool:
     """
@@ -50,68 +96,134 @@ def validate_quantity(quantity: int):
         raise HTTPException(status_code=400, detail="Quantity must be greater than 0")
 
 
-def reduce_stock_on_checkout(db: Session, order: Order, levels=None):
+def assign_order_addresses(db: Session, order: Order):
+    """
+    Fills in missing shipping and billing addresses of an order from the user's addresses.
+
+    Args:
+        db (Session): The active SQLAlchemy database session.
+        order (Order): The locked cart order.
+
+    Raises:
+        HTTPException: 400 if the user has no address to ship or bill to. The transaction is rolled back.
     """
-    Deducts product quantities from inventory for all items in a given order.
+    if order.shipping_address_id is None:
+        order.shipping_address_id = db.execute(build_default_address_query(order.user_id, shipping=True)).scalar()
+    if order.billing_address_id is None:
+        order.billing_address_id = db.execute(build_default_address_query(order.user_id, shipping=False)).scalar()
+    if order.shipping_address_id is None or order.billing_address_id is None:
+        db.rollback()
+        raise HTTPException(status_code=400, detail="Please add an address before checking out")
+
 
-    This function checks if each product in the order has enough stock.
-    If stock is sufficient, it reduces the stock by the ordered quantity.
-    If not, it raises an appropriate HTTPException.
+def reduce_stock_on_checkout(db: Session, order: Order):
+    """
+    Converts the reservations of an order into stock deductions.
+
+    The product rows are locked in id order, then a single conditional UPDATE
+    deducts the ordered quantities and releases what the order held. Lines that
+    are fully reserved always succeed; lines whose reservation expired only
+    succeed if enough unreserved stock is left. If any item is short, the
+    transaction is rolled back and a per-item shortfall report is raised. The
+    caller commits on success, together with its own changes.
 
     Args:
         db (Session): The active SQLAlchemy database session.
         order (Order): The order instance whose items are to be processed.
 
     Raises:
-        HTTPException: If a product does not exist or if the available stock
-                           is insufficient for any of the order items.
+        HTTPException: 409 with a shortfall report if a product does not exist
+                           or its available stock is insufficient for any of the order items.
     """
+    locked = db.execute(build_order_product_lock_query(order.id)).all()
+    deducted_ids = set(db.execute(build_stock_deduction_statement(order.id)).scalars().all())
+    # Only an incomplete deduction needs the shortfall report
+    if locked and len(deducted_ids) == locked[0].product_count:
+        shortfalls = []
+    else:
+        shortfalls = db.execute(build_shortfall_query(order.id, deducted_ids)).all()
+    if shortfalls:
+        db.rollback()
+        raise HTTPException(status_code=409, detail=shortfall_detail(shortfalls))
+
+    db.execute(build_reservation_delete_statement(order.id))
+    logger.info(f"Stock reduced for order {order.id}")
 
-    for item in order.items:
-        product = db.query(Product).filter(Product.id == item.product_id).first()
 
-        if not product:
-            raise HTTPException(status_code=404, detail=f"Product with ID {item.product_id} not found.")
+def reserve_stock(db: Session, order_id: int, product_id: int, quantity: int):
+    """
+    Sets the quantity a cart line holds of a product and restarts its time to live.
 
-        if product.stock < item.quantity:
-            raise HTTPException(
-                status_code=409,
-                detail=f"Not enough stock for product '{product.name}'. Available: {product.stock}, Required: {item.quantity}"
-            )
+    The lock of the product, the check against the available stock (stock minus
+    all active reservations), the change of the reserved counter and the upsert
+    of the reservation run as a single statement, so they cannot race other
+    carts or the sweeper. Only the difference to the quantity already held has
+    to be available. A quantity of 0 releases the reservation.
 
-        product.stock -= item.quantity
+    Args:
+        db (Session): The active SQLAlchemy database session.
+        order_id (int): ID of the cart order.
+        product_id (int): ID of the product.
+        quantity (int): The new quantity of the cart line.
 
-    db.commit()
-    logger.info(f"Stock reduced for order {order.id}")
+    Raises:
+        HTTPException: 404 if the product does not exist, 409 if the additional
+                           quantity is not available. The transaction is rolled back.
+    """
+    change = db.execute(build_reservation_change_statement(order_id, product_id, quantity, reservation_expiry())).first()
+    if change is None:
+        db.rollback()
+        raise HTTPException(status_code=404, detail="Product not found")
+    if not change.granted:
+        db.rollback()
+        available = max(change.stock - change.reserved + change.held, 0)
+        raise HTTPException(status_code=409, detail=shortage_detail(change.name, available))
 
 
-def get_or_create_cart_order(db: Session, user_id: int) -> Order:
+def ensure_cart_order(db: Session, user_id: int) -> bool:
     """
-    Retrieves an existing cart order or creates a new one for the user.
+    Makes sure the user has an open cart order, creating it if necessary.
+
+    The insert runs in a savepoint, so a foreign key violation for an unknown
+    user or a concurrently created cart does not abort the surrounding transaction.
 
     Args:
         db (Session): SQLAlchemy session.
         user_id (int): ID of the user.
 
     Returns:
-        Order: Existing or newly created cart order.
+        bool: True if the user has an open cart, False if the user does not exist.
+
+    Raises:
+        IntegrityError: For any other integrity violation.
     """
+    cart_query = build_cart_query(user_id)
+    if db.execute(cart_query).first() is not None:
+        return True
     try:
-        cart_order = db.query(Order).filter(Order.user_id == user_id, Order.status == "im_warenkorb").first()
-        if cart_order:
-            return cart_order
-        new_order = Order(user_id=user_id, date=datetime.utcnow(), status="im_warenkorb")
-        db.add(new_order)
-        db.flush()
-        return new_order
-    except Exception as error:
-        logger.error(f"Error getting or creating cart order: {error}")
-        raise HTTPException(status_code=500, detail="Error processing cart order")
+        with db.begin_nested():
+            db.execute(build_cart_insert_statement(user_id))
+        return True
+    except IntegrityError as error:
+        code = integrity_error_code(error)
+        if code == FOREIGN_KEY_VIOLATION:
+            return False
+        if code == UNIQUE_VIOLATION:
+            # A concurrent request opened the cart first
+            return db.execute(cart_query).first() is not None
+        raise
+
 
 def add_to_cart(db: Session, user_id: int, product_id: int, quantity: int):
     """
     Adds a product to the user's cart. Updates quantity if already present.
 
+    The common case of an existing cart costs a single upsert statement. Only if
+    it affects no row is the cart created or the missing user/product reported.
+    The new line quantity is then reserved; if it is not available, nothing is
+    added and a 409 with the available quantity is raised. The order totals are
+    increased in the same transaction.
+
     Args:
         db (Session): SQLAlchemy session.
         user_id (int): ID of the user.
@@ -122,39 +234,37 @@ def add_to_cart(db: Session, user_id: int, product_id: int, quantity: int):
         dict: Confirmation message.
     """
     try:
-        if not user_exists_by_id(db, user_id):
-            raise HTTPException(status_code=404, detail="User not found")
-        if not product_exists_by_id(db, product_id):
-            raise HTTPException(status_code=404, detail="Product not found")
-
         validate_quantity(quantity)
 
-        order = get_or_create_cart_order(db, user_id)
-        existing_item = db.query(OrderItem).filter(OrderItem.order_id == order.id, OrderItem.product_id == product_id).first()
-        product = db.query(Product).filter(Product.id == product_id).first()
-
-        if existing_item:
-            existing_item.quantity += quantity
-        else:
-            new_item = OrderItem(
-                order_id=order.id,
-                product_id=product_id,
-                quantity=quantity,
-                unit_price=product.price
-            )
-            db.add(new_item)
+        upsert = build_cart_upsert_statement(user_id, product_id, quantity)
+        line = db.execute(upsert).first()
+        if line is None:
+            # No open cart yet, or the product does not exist
+            if not ensure_cart_order(db, user_id):
+                db.rollback()
+                raise HTTPException(status_code=404, detail="User not found")
+            line = db.execute(upsert).first()
+            if line is None:
+                db.rollback()
+                raise HTTPException(status_code=404, detail="Product not found")
+
+        # Lock the order before the product, in the same order as checkout
+        db.execute(build_order_totals_update_statement(line.order_id, quantity * line.unit_price, quantity))
+        # Hold the whole line quantity for this cart, or fail before anything is committed
+        reserve_stock(db, line.order_id, product_id, line.quantity)
 
         db.commit()
         return {"message": "Product added to cart."}
     except HTTPException:
         raise
     except Exception as error:
+        db.rollback()
         logger.error(f"Error adding to cart: {error}")
         raise HTTPException(status_code=500, detail="Error adding to cart")
 
 def update_cart_item(db: Session, user_id: int, product_id: int, quantity: int):
     """
-    Updates the quantity of a product in the user's cart.
+    Updates the quantity of a product in the user's cart and adjusts its reservation and the order totals.
 
     Args:
         db (Session): SQLAlchemy session.
@@ -168,11 +278,17 @@ def update_cart_item(db: Session, user_id: int, product_id: int, quantity: int):
     try:
         validate_quantity(quantity)
 
-        order = get_or_create_cart_order(db, user_id)
-        item = db.query(OrderItem).filter(OrderItem.order_id == order.id, OrderItem.product_id == product_id).first()
+        order_id = db.execute(build_cart_query(user_id)).scalar()
+        if order_id is None:
+            raise HTTPException(status_code=404, detail="Product not in cart")
+        item = db.execute(build_cart_line_query(order_id, product_id)).scalars().first()
         if not item:
             raise HTTPException(status_code=404, detail="Product not in cart")
+        delta = quantity - item.quantity
         item.quantity = quantity
+        db.flush()
+        db.execute(build_order_totals_update_statement(order_id, delta * item.unit_price, delta))
+        reserve_stock(db, order_id, product_id, quantity)
         db.commit()
         return {"message": "Cart item updated."}
     except HTTPException:
@@ -183,7 +299,7 @@ def update_cart_item(db: Session, user_id: int, product_id: int, quantity: int):
 
 def remove_from_cart(db: Session, user_id: int, product_id: int):
     """
-    Removes a product from the user's cart.
+    Removes a product from the user's cart, releases its reservation and updates the order totals.
 
     Args:
         db (Session): SQLAlchemy session.
@@ -194,11 +310,16 @@ def remove_from_cart(db: Session, user_id: int, product_id: int):
         dict: Confirmation message.
     """
     try:
-        order = get_or_create_cart_order(db, user_id)
-        item = db.query(OrderItem).filter(OrderItem.order_id == order.id, OrderItem.product_id == product_id).first()
+        order_id = db.execute(build_cart_query(user_id)).scalar()
+        if order_id is None:
+            raise HTTPException(status_code=404, detail="Product not in cart")
+        item = db.execute(build_cart_line_query(order_id, product_id)).scalars().first()
         if not item:
             raise HTTPException(status_code=404, detail="Product not in cart")
+        db.execute(build_order_totals_update_statement(order_id, -item.quantity * item.unit_price, -item.quantity))
         db.delete(item)
+        db.flush()
+        reserve_stock(db, order_id, product_id, 0)
         db.commit()
         return {"message": "Product removed from cart."}
     except HTTPException:
@@ -231,6 +352,8 @@ def get_cart(db: Session, user_id: int):
 def checkout_cart(db: Session, user_id: int):
     """
     Finalizes the user's cart by reducing product stock and marking the order as completed.
+    Stock deduction, status change and the jobs for invoice, shipment and sales rollups
+    are committed in one transaction.
 
     Args:
         db (Session): SQLAlchemy session.
@@ -240,40 +363,63 @@ def checkout_cart(db: Session, user_id: int):
         dict: Confirmation message.
     """
     try:
-        order = db.query(Order).filter(Order.user_id == user_id, Order.status == "im_warenkorb").first()
+        order = db.execute(build_locked_cart_query(user_id)).scalars().first()
         if not order:
             raise HTTPException(status_code=404, detail="No cart to checkout")
 
+        assign_order_addresses(db, order)
+
         # Reduce stock for all items in the order
         reduce_stock_on_checkout(db, order)
 
-        # Finalize order
-        order.status = "abgeschlossen"
+        # Finalize order in the same transaction as the stock deduction
+        order.status = COMPLETED_STATUS
         order.date = datetime.utcnow()
+        # Settle the stored totals from the items, so a completed order always matches them
+        totals = db.execute(build_order_totals_query(order.id)).one()
+        order.total_amount = float(totals.total_amount)
+        order.item_count = totals.item_count
+        # Invoice, shipment and the sales rollups are handled by the job worker once this commits
+        db.execute(build_order_fulfillment_job(order.id))
+        db.execute(build_sales_rollup_job(order.id))
         db.commit()
         return {"message": "Order checked out successfully"}
     except HTTPException:
+        db.rollback()
         raise
     except Exception as error:
+        db.rollback()
         logger.error(f"Error during checkout: {error}")
         raise HTTPException(status_code=500, detail="Error during checkout")
 
 
-def get_user_orders(db: Session, user_id: int):
+def get_user_orders(db: Session, user_id: int, limit: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None,
+                    date_from: Optional[datetime] = None, date_to: Optional[datetime] = None,
+                    with_items: bool = True):
     """
-    Retrieves all completed orders for a user.
+    Retrieves one page of completed orders for a user, newest first, with or without their items.
 
     Args:
         db (Session): SQLAlchemy session.
         user_id (int): ID of the user.
+        limit (int): Page size.
+        cursor (Optional[str]): Cursor returned with the previous page.
+        date_from (Optional[datetime]): Only include orders placed at or after this time.
+        date_to (Optional[datetime]): Only include orders placed before this time.
+        with_items (bool): Whether to load the items; the stored totals are always included.
 
     Returns:
-        list: List of completed orders.
+        dict: The orders of the page and the cursor for the next page.
     """
     try:
         if not user_exists_by_id(db, user_id):
             raise HTTPException(status_code=404, detail="User not found")
-        return db.query(Order).filter(Order.user_id == user_id, Order.status == "abgeschlossen").all()
+        try:
+            query = build_order_history_query(user_id, limit, cursor, date_from, date_to, with_items)
+        except ValueError as error:
+            raise HTTPException(status_code=400, detail=str(error))
+        orders = db.execute(query).scalars().all()
+        return build_order_page(orders, limit)
     except HTTPException:
         raise
     except Exception as error:
@@ -0,0 +1,119 @@
+import argparse
+import logging
+import os
+from sqlalchemy import text
+from app.database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+ORDER_TOTALS_BATCH_SIZE = int(os.getenv("ORDER_TOTALS_BATCH_SIZE", "5000"))
+# Stored amounts within this distance of the item sum count as consistent
+AMOUNT_TOLERANCE = 0.005
+
+LOCK_CHUNK = text("""
+    SELECT id FROM orders WHERE id > :last_id ORDER BY id LIMIT :batch_size FOR UPDATE
+""")
+
+SCAN_CHUNK = text("""
+    SELECT id FROM orders WHERE id > :last_id ORDER BY id LIMIT :batch_size
+""")
+
+# Stored and expected totals of every order in the id range that does not match its items
+MISMATCHES = """
+    WITH expected AS (
+        SELECT o.id,
+               round(CAST(coalesce(sum(oi.quantity * oi.unit_price), 0) AS numeric), 2) AS total_amount,
+               coalesce(sum(oi.quantity), 0) AS item_count
+        FROM orders o
+        LEFT JOIN order_items oi ON oi.order_id = o.id
+        WHERE o.id > :last_id AND o.id <= :max_id
+        GROUP BY o.id
+    )
+"""
+
+CHECK_CHUNK = text(MISMATCHES + """
+    SELECT o.id, o.total_amount, o.item_count,
+           e.total_amount AS expected_total_amount, e.item_count AS expected_item_count
+    FROM orders o
+    JOIN expected e ON e.id = o.id
+    WHERE abs(o.total_amount - e.total_amount) > :tolerance OR o.item_count <> e.item_count
+    ORDER BY o.id
+""")
+
+REPAIR_CHUNK = text(MISMATCHES + """
+    UPDATE orders o
+    SET total_amount = e.total_amount, item_count = e.item_count, version = o.version + 1
+    FROM expected e
+    WHERE o.id = e.id
+      AND (abs(o.total_amount - e.total_amount) > :tolerance OR o.item_count <> e.item_count)
+    RETURNING o.id
+""")
+
+
+def check_order_totals(repair: bool = False, batch_size: int = ORDER_TOTALS_BATCH_SIZE) -> dict:
+    """
+    Compares the stored totals of all orders with the sums over their items.
+
+    Orders are processed in id-ordered chunks, one short transaction each. When
+    repairing, the orders of a chunk are locked first and the totals are then
+    recomputed in a second statement, so cart changes committed in between are
+    included and changes still running add their delta on top of the repaired value.
+
+    Args:
+        repair (bool): Overwrite mismatching totals with the sums over the items.
+        batch_size (int): Number of orders per chunk.
+
+    Returns:
+        dict: Number of checked orders, number of mismatches and, without repair,
+        the first mismatching orders with stored and expected values.
+    """
+    report = {"checked": 0, "mismatches": 0, "repaired": repair, "examples": []}
+    db = SessionLocal()
+    try:
+        last_id = 0
+        while True:
+            ids = db.execute(
+                LOCK_CHUNK if repair else SCAN_CHUNK, {"last_id": last_id, "batch_size": batch_size}
+            ).scalars().all()
+            if not ids:
+                db.rollback()
+                break
+            params = {"last_id": last_id, "max_id": ids[-1], "tolerance": AMOUNT_TOLERANCE}
+            if repair:
+                mismatches = db.execute(REPAIR_CHUNK, params).all()
+                db.commit()
+            else:
+                mismatches = db.execute(CHECK_CHUNK, params).all()
+                db.rollback()
+                report["examples"].extend(
+                    {
+                        "order_id": row.id,
+                        "total_amount": row.total_amount,
+                        "item_count": row.item_count,
+                        "expected_total_amount": float(row.expected_total_amount),
+                        "expected_item_count": row.expected_item_count
+                    }
+                    for row in mismatches[:max(0, 20 - len(report["examples"]))]
+                )
+            report["checked"] += len(ids)
+            report["mismatches"] += len(mismatches)
+            last_id = ids[-1]
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+    logger.info(f"Checked totals of {report['checked']} orders: {report['mismatches']} mismatches"
+                + (" repaired" if repair else ""))
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check the stored order totals against the order items.")
+    parser.add_argument("--repair", action="store_true", help="Overwrite mismatching totals")
+    parser.add_argument("--batch-size", type=int, default=ORDER_TOTALS_BATCH_SIZE, help="Orders per chunk")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    print(check_order_totals(args.repair, args.batch_size))
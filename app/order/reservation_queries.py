@@ -0,0 +1,188 @@
+import os
+from datetime import datetime, timedelta
+from typing import Optional, Sequence
+from sqlalchemy import select, update, delete, func, literal, or_, Select, Update, Delete
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from app.models import Product, StockReservation
+
+RESERVATION_TTL = timedelta(seconds=int(os.getenv("RESERVATION_TTL_SECONDS", "900")))
+
+
+def reservation_expiry(now: Optional[datetime] = None) -> datetime:
+    """
+    Returns the expiry time for a reservation created or refreshed now.
+
+    Args:
+        now (Optional[datetime]): The current UTC time. Defaults to datetime.utcnow().
+
+    Returns:
+        datetime: The naive UTC expiry timestamp.
+    """
+    return (now or datetime.utcnow()) + RESERVATION_TTL
+
+
+def build_reservation_change_statement(order_id: int, product_id: int, quantity: int,
+                                       expires_at: datetime) -> Select:
+    """
+    Builds one statement that sets an order's reservation of a product, if the stock allows it.
+
+    The product row is locked first and the order's current reservation is read
+    under a row lock joined to it, so a reservation released by the sweeper in
+    the meantime counts as not held. Only the difference to the quantity already
+    held has to be available; releases always succeed. If the change is granted,
+    the `reserved` counter is adjusted and the reservation is upserted with a new
+    time to live (or deleted for a quantity of 0) in the same statement. The
+    product's `updated_at` and `version` stay untouched, so cached product pages
+    and admin edits are not invalidated by every cart change.
+
+    Args:
+        order_id (int): ID of the cart order.
+        product_id (int): ID of the product.
+        quantity (int): The new quantity of the cart line.
+        expires_at (datetime): When the reservation lapses.
+
+    Returns:
+        Select: One row with name, stock, reserved (before the change), held and
+        granted, or no row if the product does not exist.
+    """
+    product = (
+        select(Product.id, Product.name, Product.stock, Product.reserved)
+        .where(Product.id == product_id)
+        .with_for_update(key_share=True)
+        .cte("product")
+    )
+    line = (
+        select(StockReservation.quantity)
+        .where(StockReservation.order_id == order_id, StockReservation.product_id == product.c.id)
+        .with_for_update(of=StockReservation)
+        .cte("line")
+    )
+    held = select(func.coalesce(func.sum(line.c.quantity), 0).label("quantity")).cte("held")
+    delta = literal(quantity) - held.c.quantity
+    granted = or_(delta <= 0, delta <= product.c.stock - product.c.reserved)
+
+    counter = (
+        update(Product)
+        .where(Product.id == product.c.id, delta != 0, granted)
+        .values(reserved=func.greatest(Product.reserved + delta, 0))
+        .returning(Product.id)
+        .cte("counter")
+    )
+    if quantity:
+        statement = pg_insert(StockReservation).from_select(
+            ["order_id", "product_id", "quantity", "expires_at"],
+            select(literal(order_id), product.c.id, literal(quantity), literal(expires_at)).where(granted)
+        )
+        reservation = statement.on_conflict_do_update(
+            index_elements=[StockReservation.order_id, StockReservation.product_id],
+            set_={"quantity": statement.excluded.quantity, "expires_at": statement.excluded.expires_at}
+        )
+    else:
+        reservation = delete(StockReservation).where(
+            StockReservation.order_id == order_id, StockReservation.product_id == product_id
+        )
+    reservation = reservation.returning(StockReservation.product_id).cte("reservation")
+
+    return select(
+        product.c.name,
+        product.c.stock,
+        product.c.reserved,
+        held.c.quantity.label("held"),
+        granted.label("granted")
+    ).add_cte(counter, reservation)
+
+
+def build_reservation_delete_statement(order_id: int, product_id: Optional[int] = None) -> Delete:
+    """
+    Builds a DELETE for the reservations of an order, or of one product within it.
+
+    Args:
+        order_id (int): ID of the order.
+        product_id (Optional[int]): Only delete the reservation of this product.
+
+    Returns:
+        Delete: The delete statement.
+    """
+    statement = delete(StockReservation).where(StockReservation.order_id == order_id)
+    if product_id is not None:
+        statement = statement.where(StockReservation.product_id == product_id)
+    return statement.execution_options(synchronize_session=False)
+
+
+def build_expired_products_query(now: datetime, batch_size: int) -> Select:
+    """
+    Builds a query that locks a batch of products with expired reservations.
+
+    Rows locked by a running checkout or cart change are skipped, so the sweeper
+    never waits on shoppers and several sweepers can run side by side.
+
+    Args:
+        now (datetime): The current UTC time.
+        batch_size (int): Maximum number of products per batch.
+
+    Returns:
+        Select: The ids of the locked products.
+    """
+    expired = (
+        select(StockReservation.product_id)
+        .where(StockReservation.expires_at < now)
+        .distinct()
+        .limit(batch_size)
+    )
+    return (
+        select(Product.id)
+        .where(Product.id.in_(expired))
+        .order_by(Product.id)
+        .with_for_update(key_share=True, skip_locked=True)
+    )
+
+
+def build_release_expired_statement(product_ids: Sequence[int], now: datetime) -> Update:
+    """
+    Builds one statement that deletes the expired reservations of the given
+    (already locked) products and gives their quantities back to availability.
+
+    Args:
+        product_ids (Sequence[int]): Products locked by build_expired_products_query.
+        now (datetime): The current UTC time.
+
+    Returns:
+        Update: The release statement returning the released quantity per product.
+    """
+    released = (
+        delete(StockReservation)
+        .where(StockReservation.product_id.in_(list(product_ids)), StockReservation.expires_at < now)
+        .returning(StockReservation.product_id, StockReservation.quantity)
+        .cte("released")
+    )
+    totals = (
+        select(released.c.product_id, func.sum(released.c.quantity).label("quantity"))
+        .group_by(released.c.product_id)
+        .subquery("totals")
+    )
+    return (
+        update(Product)
+        .where(Product.id == totals.c.product_id)
+        .values(
+            reserved=func.greatest(Product.reserved - totals.c.quantity, 0)
+        )
+        .returning(Product.id, totals.c.quantity)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def shortage_detail(name: str, available: int) -> dict:
+    """
+    Formats the detail of a 409 response for a reservation that cannot be covered.
+
+    Args:
+        name (str): Name of the product.
+        available (int): Quantity still available to this cart line.
+
+    Returns:
+        dict: A message and the available quantity.
+    """
+    return {
+        "message": f"Only {available} units of '{name}' are available.",
+        "available": available
+    }
@@ -0,0 +1,96 @@
+import logging
+import os
+import threading
+from datetime import datetime
+from typing import Optional
+from app.database import SessionLocal
+from app.order.reservation_queries import build_expired_products_query, build_release_expired_statement
+
+logger = logging.getLogger(__name__)
+
+RESERVATION_SWEEP_INTERVAL = int(os.getenv("RESERVATION_SWEEP_INTERVAL", "30"))
+RESERVATION_SWEEP_BATCH_SIZE = int(os.getenv("RESERVATION_SWEEP_BATCH_SIZE", "500"))
+
+
+class ReservationSweeper:
+    """
+    Background job that releases expired cart reservations.
+
+    Each batch locks up to `batch_size` products with expired reservations
+    (skipping products a shopper is currently working on), deletes those
+    reservations and lowers the reserved counters in one statement, and commits.
+    Batches repeat until no expired reservations are left. Every worker runs its
+    own sweeper; SKIP LOCKED lets them share the work without blocking each other.
+    """
+
+    def __init__(self, interval: int = RESERVATION_SWEEP_INTERVAL, batch_size: int = RESERVATION_SWEEP_BATCH_SIZE):
+        """
+        Initializes the sweeper.
+
+        Args:
+            interval (int): Seconds between sweeps; 0 disables the background thread.
+            batch_size (int): Maximum number of products released per transaction.
+        """
+        self.interval = interval
+        self.batch_size = batch_size
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def sweep(self) -> int:
+        """
+        Releases all reservations that have expired by now.
+
+        Returns:
+            int: Total quantity given back to availability.
+        """
+        released = 0
+        db = SessionLocal()
+        try:
+            while not self._stop_event.is_set():
+                now = datetime.utcnow()
+                product_ids = db.execute(build_expired_products_query(now, self.batch_size)).scalars().all()
+                if not product_ids:
+                    db.rollback()
+                    break
+                rows = db.execute(build_release_expired_statement(product_ids, now)).all()
+                db.commit()
+                released += sum(row.quantity for row in rows)
+                if len(product_ids) < self.batch_size:
+                    break
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+        if released:
+            logger.info(f"Released {released} expired reserved units")
+        return released
+
+    def _run(self) -> None:
+        while not self._stop_event.wait(self.interval):
+            try:
+                self.sweep()
+            except Exception as error:
+                logger.warning(f"Reservation sweep failed: {error}")
+
+    def start(self) -> None:
+        """
+        Starts the background sweep thread.
+        """
+        if self.interval > 0 and (self._thread is None or not self._thread.is_alive()):
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._run, name="reservation-sweeper", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        """
+        Stops the background sweep thread.
+        """
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+            self._thread = None
+
+
+reservation_sweeper = ReservationSweeper()
@@ -0,0 +1,65 @@
+import base64
+import json
+import math
+from datetime import datetime
+from typing import Sequence
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+def encode_cursor(values: Sequence) -> str:
+    """
+    Encodes the sort key values of the last row of a page as an opaque cursor.
+
+    Args:
+        values (Sequence): The sort key values, e.g. (price, id).
+
+    Returns:
+        str: A URL-safe cursor string.
+    """
+    raw = json.dumps(list(values), separators=(",", ":"), default=str)
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def _cursor_value(value, key_type: type):
+    """
+    Checks one decoded cursor value against the type of its sort key and converts it.
+    """
+    if key_type is datetime:
+        if isinstance(value, str):
+            try:
+                return datetime.fromisoformat(value)
+            except ValueError:
+                pass
+    elif key_type is float:
+        if isinstance(value, (int, float)) and not isinstance(value, bool) and math.isfinite(value):
+            return float(value)
+    elif isinstance(value, key_type) and not isinstance(value, bool):
+        return value
+    raise ValueError("Cursor does not match the requested sort order")
+
+
+def decode_cursor(cursor: str, key_types: Sequence[type]) -> list:
+    """
+    Decodes a cursor created by encode_cursor.
+
+    Args:
+        cursor (str): The cursor string from the client.
+        key_types (Sequence[type]): Python types of the sort keys, e.g. (float, int);
+            datetime values are parsed from their ISO format.
+
+    Returns:
+        list: The decoded sort key values, converted to the key types.
+
+    Raises:
+        ValueError: If the cursor is malformed or does not match the sort order.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (ValueError, UnicodeError) as error:
+        raise ValueError(f"Invalid cursor: {error}")
+    if not isinstance(values, list) or len(values) != len(key_types):
+        raise ValueError("Cursor does not match the requested sort order")
+    return [_cursor_value(value, key_type) for value, key_type in zip(values, key_types)]
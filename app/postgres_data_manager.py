@@ -1,8 +1,11 @@
 from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm.exc import StaleDataError
+from sqlalchemy.orm import Session
 from app.database import SessionLocal
-from typing import Union, Tuple
+from typing import Optional, Union, Tuple
 from app.models import User, Product, Order, OrderItem, Invoice, Reminder, Shipment
 from app.data_manager_interface import DataManagerInterface
+from app.concurrency import ConcurrentUpdateError
 
 
 class PostgresDataManager(DataManagerInterface):
@@ -11,11 +14,27 @@ class PostgresDataManager(DataManagerInterface):
     Provides generic methods for committing transactions and performing CRUD operations.
     """
 
-    def __init__(self):
+    def __init__(self, db: Optional[Session] = None):
         """
-        Initializes the database session using SQLAlchemy's SessionLocal factory.
+        Initializes the data manager with a database session.
+
+        Args:
+            db (Optional[Session]): The session to work with. If omitted, a new session
+                is created via SessionLocal and must be released with close().
+        """
+        self.db = db if db is not None else SessionLocal()
+
+    def rollback(self) -> None:
+        """
+        Rolls back all uncommitted changes of the current session.
         """
-        self.db = SessionLocal()
+        self.db.rollback()
+
+    def close(self) -> None:
+        """
+        Closes the session and returns its connection to the pool.
+        """
+        self.db.close()
 
     def commit_only(self) -> Tuple[Union[str, dict], int]:
         """
@@ -24,10 +43,16 @@ class PostgresDataManager(DataManagerInterface):
         Returns:
             Tuple containing an empty string and 200 on success,
             or an error message and 500 on failure.
+
+        Raises:
+            ConcurrentUpdateError: If a versioned row was changed by another transaction since it was read.
         """
         try:
             self.db.commit()
             return "", 200
+        except StaleDataError as error:
+            self.db.rollback()
+            raise ConcurrentUpdateError(str(error))
         except SQLAlchemyError:
             self.db.rollback()
             return {'error': 'Sorry, something went wrong while processing your request. Please try again in a few moments.'}, 500
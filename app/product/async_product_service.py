@@ -0,0 +1,361 @@
+from app.models import Product, StockBatch
+from typing import Tuple, List, Optional, Union
+from app.data_manager_interface import DataManagerInterface
+from app.product.product_service import create_product_image_folder, delete_product_image_folder, version_mismatch
+from app.product.product_queries import (
+    build_product_listing_query,
+    build_page,
+    parse_fields,
+    build_stock_adjustment_statement,
+    build_product_search_query,
+    build_search_page,
+    STOCK_BATCH_CHUNK_SIZE,
+)
+from app.product.product_schemas import StockAdjustment
+from app.product.product_suggest import suggest_index
+from app.concurrency import retry_on_conflict, ConcurrentUpdateError, CONFLICT_RESPONSE
+from fastapi import HTTPException
+from datetime import datetime
+from sqlalchemy import select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+async def product_exists_by_name(db: AsyncSession, name: str) -> bool:
+    """
+    Checks whether a product with the given name exists in the database.
+
+    Args:
+        db (AsyncSession): The active SQLAlchemy async database session.
+        name (str): The name of the product to check.
+
+    Returns:
+        bool: True if a product with the specified name exists, False otherwise.
+    """
+    result = await db.execute(select(Product.id).where(Product.name == name).limit(1))
+    return result.first() is not None
+
+
+async def product_exists_by_id(db: AsyncSession, product_id: int) -> bool:
+    """
+    Checks whether a product with the given ID exists in the database.
+
+    Args:
+        db (AsyncSession): The active SQLAlchemy async database session.
+        product_id (int): The ID of the product to check.
+
+    Returns:
+        bool: True if a product with the specified ID exists, False otherwise.
+    """
+    result = await db.execute(select(Product.id).where(Product.id == product_id))
+    return result.first() is not None
+
+
+class AsyncProductService:
+    """
+    Async counterpart of ProductService for the asyncpg backend.
+    Offers the same operations as coroutines on an AsyncPostgresDataManager.
+    """
+
+    def __init__(self, data_manager: DataManagerInterface):
+        """
+        Initializes the AsyncProductService with an async data manager.
+
+        Args:
+            data_manager (DataManagerInterface): Async interface used for interacting with the database.
+        """
+        self.data_manager = data_manager
+
+    async def create_product(self, name: str, unit: str, price: float, description: str, stock: int) -> Tuple[dict, int]:
+        """
+        Creates a new product and its corresponding image folder if the product does not already exist.
+
+        Args:
+            name (str): The product name.
+            unit (str): Unit of measurement (e.g., "piece", "box").
+            price (float): Price of the product.
+            description (str): Product description.
+            stock (int): Available stock quantity.
+
+        Returns:
+            Tuple[dict, int]: A success or error message with an HTTP status code.
+        """
+        try:
+            if await product_exists_by_name(self.data_manager.db, name):
+                return {"error": "A product with this name already exists."}, 409
+
+            folder_path = create_product_image_folder(name)
+            new_product = Product(
+                name=name,
+                unit=unit,
+                price=price,
+                description=description,
+                stock=stock,
+                image_path=folder_path
+            )
+            result = await self.data_manager.add_element(new_product)
+            if result[1] == 200:
+                suggest_index.add(new_product.id, new_product.name)
+            return result
+
+        except OSError as e:
+            return {"error": f"Could not create folder for product image: {e}"}, 500
+        except Exception:
+            return {"error": "Unexpected error while creating product."}, 500
+
+    async def get_product_by_id(self, product_id: int) -> Union[Product, Tuple[dict, int]]:
+        """
+        Retrieves a product by its ID.
+
+        Args:
+            product_id (int): ID of the product.
+
+        Returns:
+            Union[Product, Tuple[dict, int]]: The product object or an error message with status code.
+        """
+        product = await self.data_manager.get_by_id(Product, product_id)
+        if not product:
+            return {"error": "Product not found"}, 404
+        return product
+
+    async def get_all_products(self) -> Union[List[Product], Tuple[dict, int]]:
+        """
+        Retrieves all products.
+
+        Returns:
+            Union[List[Product], Tuple[dict, int]]: A list of product objects or an error message with status code.
+        """
+        return await self.data_manager.get_all(Product)
+
+    async def list_products(self, limit: int, sort: str = "id", cursor: Optional[str] = None,
+                            min_price: Optional[float] = None, max_price: Optional[float] = None,
+                            in_stock: bool = False, name_prefix: Optional[str] = None,
+                            fields: Optional[str] = None) -> Union[dict, Tuple[dict, int]]:
+        """
+        Retrieves one keyset-paginated page of products.
+
+        Args:
+            limit (int): Page size.
+            sort (str): Sort order, "id" or "price".
+            cursor (Optional[str]): Cursor returned with the previous page.
+            min_price (Optional[float]): Lower price bound.
+            max_price (Optional[float]): Upper price bound.
+            in_stock (bool): Only include products that are in stock.
+            name_prefix (Optional[str]): Only include products whose name starts with this prefix.
+            fields (Optional[str]): Comma-separated columns to return. Defaults to the shop grid fields.
+
+        Returns:
+            Union[dict, Tuple[dict, int]]: The page with its next cursor or an error message with status code.
+        """
+        try:
+            selected = parse_fields(fields)
+            query = build_product_listing_query(limit, sort, cursor, min_price, max_price,
+                                                in_stock, name_prefix, selected)
+        except ValueError as error:
+            return {"error": str(error)}, 400
+
+        rows = (await self.data_manager.db.execute(query)).all()
+        return build_page(rows, limit, sort, selected)
+
+    async def search_products(self, q: str, limit: int, cursor: Optional[str] = None, in_stock: bool = False,
+                              fields: Optional[str] = None) -> Union[dict, Tuple[dict, int]]:
+        """
+        Retrieves one page of products matching a full-text search, best matches first.
+
+        Args:
+            q (str): Search text over product names and descriptions.
+            limit (int): Page size.
+            cursor (Optional[str]): Cursor returned with the previous page.
+            in_stock (bool): Only include products that are in stock.
+            fields (Optional[str]): Comma-separated columns to return. Defaults to the shop grid fields.
+
+        Returns:
+            Union[dict, Tuple[dict, int]]: The ranked page with its next cursor or an error message with status code.
+        """
+        try:
+            selected = parse_fields(fields)
+            query = build_product_search_query(q, limit, cursor, in_stock, selected)
+        except ValueError as error:
+            return {"error": str(error)}, 400
+
+        rows = (await self.data_manager.db.execute(query)).all()
+        return build_search_page(rows, limit, selected)
+
+    async def get_product_version(self, product_id: int):
+        """
+        Looks up only the id, update timestamp and reserved quantity of a product for conditional requests.
+        Cart reservations change the availability without moving the update timestamp.
+
+        Args:
+            product_id (int): ID of the product.
+
+        Returns:
+            Optional[Row]: A row with `id`, `updated_at` and `reserved`, or None if the product does not exist.
+        """
+        return (await self.data_manager.db.execute(
+            select(Product.id, Product.updated_at, Product.reserved).where(Product.id == product_id)
+        )).first()
+
+    async def list_product_versions(self, limit: int, sort: str = "id", cursor: Optional[str] = None,
+                                    min_price: Optional[float] = None, max_price: Optional[float] = None,
+                                    in_stock: bool = False, name_prefix: Optional[str] = None) -> Union[list, Tuple[dict, int]]:
+        """
+        Runs the listing query for one page with only the id, update timestamp and reserved columns.
+        Used to validate cached pages before the full rows are loaded.
+
+        Args:
+            limit (int): Page size.
+            sort (str): Sort order, "id" or "price".
+            cursor (Optional[str]): Cursor returned with the previous page.
+            min_price (Optional[float]): Lower price bound.
+            max_price (Optional[float]): Upper price bound.
+            in_stock (bool): Only include products that are in stock.
+            name_prefix (Optional[str]): Only include products whose name starts with this prefix.
+
+        Returns:
+            Union[list, Tuple[dict, int]]: Version rows of the page or an error message with status code.
+        """
+        try:
+            query = build_product_listing_query(limit, sort, cursor, min_price, max_price,
+                                                in_stock, name_prefix, ("id", "updated_at", "reserved"))
+        except ValueError as error:
+            return {"error": str(error)}, 400
+        return (await self.data_manager.db.execute(query)).all()
+
+    async def adjust_stock_batch(self, batch_id: str, items: List[StockAdjustment]) -> Union[dict, Tuple[dict, int]]:
+        """
+        Applies a warehouse batch of absolute or relative stock values in one transaction.
+
+        The batch ID is claimed first; a replay of an already applied batch returns
+        the stored result without touching any product. Adjustments are applied with
+        one UPDATE ... FROM (VALUES ...) per chunk.
+
+        Args:
+            batch_id (str): Unique ID of the batch.
+            items (List[StockAdjustment]): Stock values or deltas per product.
+
+        Returns:
+            Union[dict, Tuple[dict, int]]: Updated count, unknown and rejected product IDs,
+            or an error message with status code.
+        """
+        db = self.data_manager.db
+        claimed = (await db.execute(
+            pg_insert(StockBatch)
+            .values(batch_id=batch_id, item_count=len(items), created_at=datetime.utcnow())
+            .on_conflict_do_nothing()
+            .returning(StockBatch.batch_id)
+        )).first()
+        if claimed is None:
+            stored = await db.get(StockBatch, batch_id)
+            if stored is None or stored.result is None:
+                return {"error": "Batch is being processed."}, 409
+            return {**stored.result, "replayed": True}
+
+        adjustments = [
+            (item.product_id, item.stock if item.stock is not None else item.delta, item.stock is not None)
+            for item in items
+        ]
+        updated_ids = set()
+        for start in range(0, len(adjustments), STOCK_BATCH_CHUNK_SIZE):
+            chunk = adjustments[start:start + STOCK_BATCH_CHUNK_SIZE]
+            updated_ids.update((await db.execute(build_stock_adjustment_statement(chunk))).scalars().all())
+
+        # Products that were not updated either do not exist or would have gone below their reservations
+        missing = [product_id for product_id, _, _ in adjustments if product_id not in updated_ids]
+        existing = set()
+        for start in range(0, len(missing), STOCK_BATCH_CHUNK_SIZE):
+            chunk = missing[start:start + STOCK_BATCH_CHUNK_SIZE]
+            existing.update((await db.execute(select(Product.id).where(Product.id.in_(chunk)))).scalars().all())
+
+        result = {
+            "batch_id": batch_id,
+            "updated": len(updated_ids),
+            "unknown_ids": [product_id for product_id in missing if product_id not in existing],
+            "rejected_ids": [product_id for product_id in missing if product_id in existing],
+            "replayed": False
+        }
+        await db.execute(update(StockBatch).where(StockBatch.batch_id == batch_id).values(result=result))
+        message, status = await self.data_manager.commit_only()
+        if status != 200:
+            return message, status
+        return result
+
+    async def update_product(self, product_id: int, expected_version: int, **kwargs) -> Tuple[Union[str, dict], int]:
+        """
+        Updates an existing product's attributes.
+
+        The client sends the version it last read. If the product has changed since,
+        the update is rejected with 409 instead of overwriting the newer values;
+        the client reloads the product and decides again.
+
+        Args:
+            product_id (int): ID of the product to update.
+            expected_version (int): The product version the client's changes are based on.
+            **kwargs: Attributes to update as key-value pairs.
+
+        Returns:
+            Tuple[Union[str, dict], int]: A success or error message with an HTTP status code;
+            409 if the new stock would not cover the units already reserved in carts.
+        """
+        product = await self.data_manager.get_by_id(Product, product_id)
+        if not product:
+            return {"error": "Product not found."}, 404
+        if product.version != expected_version:
+            return version_mismatch(product.version)
+
+        stock = kwargs.get("stock")
+        if stock is not None and stock < product.reserved:
+            return {"error": f"Stock cannot be set below the {product.reserved} units reserved in carts."}, 409
+
+        for key, value in kwargs.items():
+            if hasattr(product, key) and value is not None:
+                setattr(product, key, value)
+        try:
+            result = await self.data_manager.commit_only()
+        except ConcurrentUpdateError:
+            return CONFLICT_RESPONSE
+        if result[1] == 200 and kwargs.get("name") is not None:
+            suggest_index.add(product_id, kwargs["name"])
+        return result
+
+    @retry_on_conflict
+    async def delete_product(self, product_id: int) -> Tuple[Union[str, dict], int]:
+        """
+        Deletes a product by its ID.
+
+        Args:
+            product_id (int): ID of the product to delete.
+
+        Returns:
+            Tuple[Union[str, dict], int]: A success or error message with an HTTP status code.
+        """
+        product = await self.data_manager.get_by_id(Product, product_id)
+        if not product:
+            return {"error": "Product not found."}, 404
+
+        delete_product_image_folder(product.name)
+        result = await self.data_manager.delete_element(product)
+        if result[1] == 200:
+            suggest_index.remove(product_id)
+        return result
+
+    async def check_product_stock(self, product_id, requested_quantity: int):
+        """
+        Validates whether the product has sufficient stock for the requested quantity.
+
+        Args:
+            product_id (int): ID of the product to check.
+            requested_quantity (int): The quantity the user wants to purchase.
+
+        Raises:
+            HTTPException: If the product is out of stock or not enough is available.
+        """
+        product = await self.data_manager.get_by_id(Product, product_id)
+        if product.stock == 0:
+            raise HTTPException(status_code=400, detail=f"Product '{product.name}' is currently out of stock.")
+
+        if product.stock < requested_quantity:
+            raise HTTPException(
+                status_code=409,
+                detail=f"Only {product.stock} units of '{product.name}' are available. Do you want to proceed with that amount?"
+            )
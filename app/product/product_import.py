@@ -0,0 +1,245 @@
+import csv
+import io
+import json
+import logging
+import os
+from typing import IO, Iterator, List, Literal, Tuple
+from pydantic import ValidationError
+from app.database import engine
+from app.product.product_schemas import ProductCreate
+from app.product.product_service import product_image_folder_path
+
+logger = logging.getLogger(__name__)
+
+IMPORT_CHUNK_SIZE = int(os.getenv("PRODUCT_IMPORT_CHUNK_SIZE", "5000"))
+# Maximum number of row errors returned in a report; further errors are only counted
+MAX_REPORTED_ERRORS = 1000
+# Serializes concurrent imports so two feeds cannot insert the same new name twice
+IMPORT_LOCK_KEY = 0x70726F64
+
+ImportFormat = Literal["csv", "ndjson"]
+ConflictPolicy = Literal["update", "skip"]
+
+STAGING_COLUMNS = ("row_no", "name", "unit", "price", "description", "stock", "image_path")
+
+CREATE_STAGING_TABLE = """
+    CREATE TEMP TABLE IF NOT EXISTS product_import_staging (
+        row_no integer NOT NULL,
+        name varchar NOT NULL,
+        unit varchar NOT NULL,
+        price double precision NOT NULL,
+        description varchar NOT NULL,
+        stock integer NOT NULL,
+        image_path varchar
+    ) ON COMMIT DELETE ROWS
+"""
+
+# The last row wins if a name occurs several times within one chunk. Product names are
+# not unique, so updates are counted per staged name rather than per product row. The
+# new stock never drops below the quantity held by cart reservations; such rows are
+# counted as clamped.
+MERGE_UPDATE = """
+    WITH src AS (
+        SELECT DISTINCT ON (name) * FROM product_import_staging ORDER BY name, row_no DESC
+    ),
+    updated AS (
+        UPDATE products p
+        SET unit = s.unit, price = s.price, description = s.description, stock = GREATEST(s.stock, p.reserved),
+            updated_at = now() AT TIME ZONE 'utc', version = p.version + 1
+        FROM src s
+        WHERE p.name = s.name
+        RETURNING s.name, s.stock < p.reserved AS clamped
+    ),
+    inserted AS (
+        INSERT INTO products (name, unit, price, description, stock, image_path, created_at, updated_at)
+        SELECT s.name, s.unit, s.price, s.description, s.stock, s.image_path,
+               now() AT TIME ZONE 'utc', now() AT TIME ZONE 'utc'
+        FROM src s
+        WHERE NOT EXISTS (SELECT 1 FROM products p WHERE p.name = s.name)
+        RETURNING name
+    )
+    SELECT (SELECT count(DISTINCT name) FROM updated),
+           (SELECT count(DISTINCT name) FROM updated WHERE clamped),
+           (SELECT count(*) FROM inserted),
+           ARRAY(SELECT name FROM inserted)
+"""
+
+MERGE_SKIP = """
+    WITH src AS (
+        SELECT DISTINCT ON (name) * FROM product_import_staging ORDER BY name, row_no DESC
+    ),
+    inserted AS (
+        INSERT INTO products (name, unit, price, description, stock, image_path, created_at, updated_at)
+        SELECT s.name, s.unit, s.price, s.description, s.stock, s.image_path,
+               now() AT TIME ZONE 'utc', now() AT TIME ZONE 'utc'
+        FROM src s
+        WHERE NOT EXISTS (SELECT 1 FROM products p WHERE p.name = s.name)
+        RETURNING name
+    )
+    SELECT 0, 0, (SELECT count(*) FROM inserted), ARRAY(SELECT name FROM inserted)
+"""
+
+
+def iter_records(stream: IO[bytes], file_format: ImportFormat) -> Iterator[Tuple[int, object]]:
+    """
+    Reads a CSV or NDJSON file record by record without loading it into memory.
+
+    Args:
+        stream (IO[bytes]): The binary file stream.
+        file_format (ImportFormat): "csv" (with header row) or "ndjson" (one JSON object per line).
+
+    Yields:
+        Tuple[int, object]: The 1-based row number and the raw record, or an
+        exception instance if the line could not be parsed.
+    """
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    if file_format == "csv":
+        for row_no, record in enumerate(csv.DictReader(text), start=1):
+            yield row_no, record
+        return
+
+    for row_no, line in enumerate(text, start=1):
+        if not line.strip():
+            continue
+        try:
+            yield row_no, json.loads(line)
+        except ValueError as error:
+            yield row_no, error
+
+
+def create_product_image_folders(names: List[str]) -> int:
+    """
+    Creates the image folders for a batch of newly imported products.
+
+    Args:
+        names (List[str]): Names of the inserted products.
+
+    Returns:
+        int: Number of folders that could not be created.
+    """
+    failures = 0
+    for folder_path in {product_image_folder_path(name) for name in names}:
+        try:
+            os.makedirs(folder_path, exist_ok=True)
+        except OSError as error:
+            failures += 1
+            logger.error(f"Failed to create folder '{folder_path}': {error}")
+    return failures
+
+
+class ProductImporter:
+    """
+    Streams products from a CSV or NDJSON file into the database.
+
+    Rows are validated with ProductCreate and collected in chunks. Each chunk is
+    loaded through PostgreSQL COPY into a temporary staging table and merged into
+    `products` by name in a single statement, then committed. Only one chunk is
+    held in memory at a time, so memory use does not depend on the file size.
+    """
+
+    def __init__(self, on_conflict: ConflictPolicy = "skip", chunk_size: int = IMPORT_CHUNK_SIZE):
+        """
+        Initializes the importer.
+
+        Args:
+            on_conflict (ConflictPolicy): "update" overwrites products with the same name (the stock
+                not below their reserved quantity), "skip" keeps them.
+            chunk_size (int): Number of valid rows loaded and committed per chunk.
+        """
+        self.on_conflict = on_conflict
+        self.chunk_size = chunk_size
+        self.report = {
+            "rows": 0,
+            "inserted": 0,
+            "updated": 0,
+            "clamped": 0,
+            "skipped": 0,
+            "invalid": 0,
+            "folder_errors": 0,
+            "errors": []
+        }
+
+    def _add_error(self, row_no: int, message: str) -> None:
+        self.report["invalid"] += 1
+        if len(self.report["errors"]) < MAX_REPORTED_ERRORS:
+            self.report["errors"].append({"row": row_no, "error": message})
+
+    def _flush(self, connection, chunk: List[tuple]) -> None:
+        """
+        Copies one chunk into the staging table, merges it into products and commits.
+        """
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(chunk)
+        buffer.seek(0)
+
+        cursor = connection.cursor()
+        try:
+            cursor.execute("SELECT pg_advisory_xact_lock(%s)", (IMPORT_LOCK_KEY,))
+            cursor.copy_expert(
+                f"COPY product_import_staging ({', '.join(STAGING_COLUMNS)}) FROM STDIN WITH (FORMAT csv)",
+                buffer
+            )
+            cursor.execute(MERGE_UPDATE if self.on_conflict == "update" else MERGE_SKIP)
+            updated, clamped, inserted, inserted_names = cursor.fetchone()
+            connection.commit()
+        except Exception:
+            connection.rollback()
+            raise
+        finally:
+            cursor.close()
+
+        self.report["updated"] += updated
+        self.report["clamped"] += clamped
+        self.report["inserted"] += inserted
+        self.report["skipped"] += len(chunk) - updated - inserted
+        self.report["folder_errors"] += create_product_image_folders(inserted_names)
+
+    def run(self, stream: IO[bytes], file_format: ImportFormat) -> dict:
+        """
+        Imports all rows of a file.
+
+        Args:
+            stream (IO[bytes]): The binary file stream.
+            file_format (ImportFormat): "csv" or "ndjson".
+
+        Returns:
+            dict: Counts of inserted, updated, skipped and invalid rows, of updates whose stock was
+            raised to the reserved quantity (clamped), and the per-row errors.
+        """
+        connection = engine.raw_connection()
+        try:
+            cursor = connection.cursor()
+            cursor.execute(CREATE_STAGING_TABLE)
+            cursor.close()
+            connection.commit()
+
+            chunk: List[tuple] = []
+            for row_no, record in iter_records(stream, file_format):
+                self.report["rows"] += 1
+                if isinstance(record, Exception):
+                    self._add_error(row_no, f"Invalid JSON: {record}")
+                    continue
+                try:
+                    product = ProductCreate.model_validate(record)
+                except ValidationError as error:
+                    self._add_error(row_no, "; ".join(
+                        f"{'.'.join(str(part) for part in detail['loc'])}: {detail['msg']}"
+                        for detail in error.errors()
+                    ))
+                    continue
+
+                chunk.append((row_no, product.name, product.unit, product.price, product.description,
+                              product.stock, product_image_folder_path(product.name)))
+                if len(chunk) >= self.chunk_size:
+                    self._flush(connection, chunk)
+                    chunk = []
+
+            if chunk:
+                self._flush(connection, chunk)
+        finally:
+            connection.close()
+
+        logger.info(f"Product import finished: {self.report['inserted']} inserted, "
+                    f"{self.report['updated']} updated, {self.report['skipped']} skipped, "
+                    f"{self.report['invalid']} invalid")
+        return self.report
@@ -0,0 +1,215 @@
+from datetime import datetime
+from typing import Optional, Sequence, Tuple
+from sqlalchemy import select, update, values, column, case, tuple_, func, cast, literal, Integer, Boolean, Float, Select, Update
+from sqlalchemy.dialects.postgresql import REGCONFIG
+from app.models import Product
+from app.pagination import encode_cursor, decode_cursor
+
+# Columns the shop grid needs; description and timestamps are only loaded on request
+LISTING_FIELDS = ("id", "name", "unit", "price", "stock", "available", "image_path")
+SELECTABLE_FIELDS = LISTING_FIELDS + ("description", "created_at", "updated_at")
+SORT_KEYS = {
+    "id": ("id",),
+    "price": ("price", "id"),
+}
+STOCK_BATCH_CHUNK_SIZE = 1000
+# Text search configurations the search vector is built with (see models.PRODUCT_SEARCH_VECTOR)
+SEARCH_CONFIGS = ("german", "english")
+# ts_rank normalization 1: divide by 1 + log(document length), so long descriptions do not dominate
+SEARCH_RANK_NORMALIZATION = 1
+
+
+def parse_fields(fields: Optional[str]) -> Tuple[str, ...]:
+    """
+    Parses a comma-separated sparse field selection.
+
+    Args:
+        fields (Optional[str]): Requested field names, e.g. "id,name,price". Defaults to the grid fields.
+
+    Returns:
+        Tuple[str, ...]: The validated field names.
+
+    Raises:
+        ValueError: If an unknown field is requested.
+    """
+    if not fields:
+        return LISTING_FIELDS
+    requested = tuple(dict.fromkeys(name.strip() for name in fields.split(",") if name.strip()))
+    unknown = [name for name in requested if name not in SELECTABLE_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    return requested or LISTING_FIELDS
+
+
+def build_product_listing_query(limit: int, sort: str = "id", cursor: Optional[str] = None,
+                                min_price: Optional[float] = None, max_price: Optional[float] = None,
+                                in_stock: bool = False, name_prefix: Optional[str] = None,
+                                fields: Sequence[str] = LISTING_FIELDS) -> Select:
+    """
+    Builds a keyset-paginated product listing query.
+
+    The query seeks past the cursor on the sort key instead of using OFFSET, so
+    every page costs the same regardless of its position in the catalog. One
+    extra row is fetched to detect whether a next page exists.
+
+    Args:
+        limit (int): Page size.
+        sort (str): Sort order, "id" or "price" (ties broken by id).
+        cursor (Optional[str]): Cursor of the previous page.
+        min_price (Optional[float]): Lower price bound (inclusive).
+        max_price (Optional[float]): Upper price bound (inclusive).
+        in_stock (bool): Only return products with unreserved stock left.
+        name_prefix (Optional[str]): Only return products whose name starts with this prefix.
+        fields (Sequence[str]): Columns to select.
+
+    Returns:
+        Select: The listing statement.
+
+    Raises:
+        ValueError: If the sort order or cursor is invalid.
+    """
+    if sort not in SORT_KEYS:
+        raise ValueError(f"Unsupported sort order '{sort}'")
+    sort_columns = [getattr(Product, name) for name in SORT_KEYS[sort]]
+    selected = list(dict.fromkeys(tuple(fields) + SORT_KEYS[sort]))
+
+    query = select(*[getattr(Product, name) for name in selected])
+    if min_price is not None:
+        query = query.where(Product.price >= min_price)
+    if max_price is not None:
+        query = query.where(Product.price <= max_price)
+    if in_stock:
+        query = query.where(Product.available > 0)
+    if name_prefix:
+        query = query.where(Product.name.startswith(name_prefix, autoescape=True))
+    if cursor:
+        values = decode_cursor(cursor, [column.type.python_type for column in sort_columns])
+        query = query.where(tuple_(*sort_columns) > tuple_(*values))
+
+    return query.order_by(*sort_columns).limit(limit + 1)
+
+
+def build_page(rows: list, limit: int, sort: str, fields: Sequence[str]) -> dict:
+    """
+    Turns the rows of a listing query into a page with the cursor for the next page.
+
+    Args:
+        rows (list): Result rows of build_product_listing_query (up to limit + 1).
+        limit (int): Page size.
+        sort (str): Sort order used for the query.
+        fields (Sequence[str]): Fields requested by the client.
+
+    Returns:
+        dict: The page items and the next cursor (None on the last page).
+    """
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    items = [{name: row._mapping[name] for name in fields} for row in rows]
+    next_cursor = None
+    if has_more and rows:
+        next_cursor = encode_cursor([rows[-1]._mapping[name] for name in SORT_KEYS[sort]])
+    return {"items": items, "next_cursor": next_cursor}
+
+
+def _search_query_expression(q: str):
+    """
+    Combines the web-search style query parsed with every configuration, so a
+    term matches whether it was stemmed as German or English.
+    """
+    parsed = [func.websearch_to_tsquery(literal(config).cast(REGCONFIG), q) for config in SEARCH_CONFIGS]
+    expression = parsed[0]
+    for other in parsed[1:]:
+        expression = expression.op("||")(other)
+    return expression
+
+
+def build_product_search_query(q: str, limit: int, cursor: Optional[str] = None, in_stock: bool = False,
+                               fields: Sequence[str] = LISTING_FIELDS) -> Select:
+    """
+    Builds a ranked, keyset-paginated full-text search over product names and descriptions.
+
+    Matches are found through the GIN index on the generated `search_vector` column
+    and ordered by relevance (names weigh more than descriptions), ties broken by
+    id. The cursor holds the rank and id of the last row of the previous page.
+
+    Args:
+        q (str): Search text; supports quoted phrases, "or" and "-" exclusions.
+        limit (int): Page size.
+        cursor (Optional[str]): Cursor of the previous page.
+        in_stock (bool): Only return products with unreserved stock left.
+        fields (Sequence[str]): Columns to select.
+
+    Returns:
+        Select: The search statement, including a `rank` column.
+
+    Raises:
+        ValueError: If the cursor is invalid.
+    """
+    tsquery = _search_query_expression(q)
+    rank = cast(func.ts_rank(Product.search_vector, tsquery, SEARCH_RANK_NORMALIZATION), Float)
+    selected = list(dict.fromkeys(tuple(fields) + ("id",)))
+
+    query = (
+        select(*[getattr(Product, name) for name in selected], rank.label("rank"))
+        .where(Product.search_vector.bool_op("@@")(tsquery))
+    )
+    if in_stock:
+        query = query.where(Product.available > 0)
+    if cursor:
+        last_rank, last_id = decode_cursor(cursor, (float, int))
+        query = query.where(tuple_(rank, Product.id) < tuple_(literal(last_rank, Float), last_id))
+
+    return query.order_by(rank.desc(), Product.id.desc()).limit(limit + 1)
+
+
+def build_search_page(rows: list, limit: int, fields: Sequence[str]) -> dict:
+    """
+    Turns the rows of a search query into a page with the cursor for the next page.
+
+    Args:
+        rows (list): Result rows of build_product_search_query (up to limit + 1).
+        limit (int): Page size.
+        fields (Sequence[str]): Fields requested by the client.
+
+    Returns:
+        dict: The page items with their rank and the next cursor (None on the last page).
+    """
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    items = [{**{name: row._mapping[name] for name in fields}, "rank": row.rank} for row in rows]
+    next_cursor = encode_cursor([rows[-1].rank, rows[-1].id]) if has_more and rows else None
+    return {"items": items, "next_cursor": next_cursor}
+
+
+def build_stock_adjustment_statement(adjustments: Sequence[Tuple[int, int, bool]]) -> Update:
+    """
+    Builds one UPDATE ... FROM (VALUES ...) that applies a chunk of stock adjustments.
+
+    Absolute values replace the stock (like reset_product_stock), deltas are added
+    to it (like increase_product_stock). An adjustment that would leave less stock
+    than active cart reservations hold (and so also a negative stock) is not
+    applied, since reserved lines must stay coverable at checkout. The ids of the
+    updated products are returned.
+
+    Args:
+        adjustments (Sequence[Tuple[int, int, bool]]): (product_id, value, is_absolute) triples.
+
+    Returns:
+        Update: The adjustment statement.
+    """
+    adjustment = values(
+        column("product_id", Integer), column("value", Integer), column("absolute", Boolean),
+        name="adjustment"
+    ).data(list(adjustments))
+    new_stock = case((adjustment.c.absolute, adjustment.c.value), else_=Product.stock + adjustment.c.value)
+    return (
+        update(Product)
+        .where(Product.id == adjustment.c.product_id, new_stock >= Product.reserved)
+        .values(
+            stock=new_stock,
+            updated_at=datetime.utcnow(),
+            version=Product.version + 1
+        )
+        .returning(Product.id)
+        .execution_options(synchronize_session=False)
+    )
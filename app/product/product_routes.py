@@ -1,72 +1,171 @@
-from fastapi import APIRouter, HTTPException, Depends
-from app.postgres_data_manager import PostgresDataManager
+from typing import List, Literal, Optional
+from fastapi import APIRouter, HTTPException, Depends, Query, Request, Response
+from app.dependencies import get_data_manager, run_service, USE_ASYNC_DB
 from app.product.product_service import ProductService
-from app.product.product_schemas import ProductCreate, ProductUpdate
+from app.product.async_product_service import AsyncProductService
+from app.product.product_schemas import (
+    ProductCreate,
+    ProductUpdate,
+    StockBatch,
+    ProductResponse,
+    ProductPage,
+    ProductSearchPage,
+    ProductSuggestion,
+    StockBatchResult,
+)
+from app.schemas import MessageResponse
+from app.product.product_suggest import suggest_index, SUGGEST_DEFAULT_LIMIT, SUGGEST_MAX_LIMIT
+from app.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from app.http_caching import validators_for_rows, is_not_modified, not_modified_response, set_validators
 from app.data_manager_interface import DataManagerInterface
 
 router = APIRouter()
 
-def get_data_manager():
-    return PostgresDataManager()
+async def get_product_service(data_manager: DataManagerInterface = Depends(get_data_manager)):
+    if USE_ASYNC_DB:
+        return AsyncProductService(data_manager)
+    return ProductService(data_manager)
 
-@router.get("/", summary="Get all products")
-def get_all_products(data_manager: DataManagerInterface = Depends(get_data_manager)):
+@router.get("/", response_model=ProductPage, response_model_exclude_unset=True,
+            summary="Get products page by page")
+async def get_all_products(
+    request: Request,
+    response: Response,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    sort: Literal["id", "price"] = "id",
+    min_price: Optional[float] = Query(None, ge=0),
+    max_price: Optional[float] = Query(None, ge=0),
+    in_stock: bool = False,
+    name_prefix: Optional[str] = Query(None, min_length=1),
+    fields: Optional[str] = Query(None, description="Comma-separated fields, e.g. id,name,price"),
+    product_service=Depends(get_product_service)
+):
+    """
+    Retrieve available products using keyset pagination, optional filters and sparse fields.
+    Supports conditional requests via If-None-Match.
+    """
+    versions = await run_service(product_service.list_product_versions, limit, sort, cursor, min_price,
+                                 max_price, in_stock, name_prefix)
+    if isinstance(versions, tuple):
+        raise HTTPException(status_code=versions[1], detail=versions[0]["error"])
+    # Reservations change `available` without moving updated_at, so there is no Last-Modified;
+    # the reserved quantities are part of the ETag instead
+    etag, _ = validators_for_rows(versions, "products", fields)
+    if is_not_modified(request, etag, None):
+        return not_modified_response(etag, None)
+
+    result = await run_service(product_service.list_products, limit, sort, cursor, min_price,
+                               max_price, in_stock, name_prefix, fields)
+    if isinstance(result, tuple):
+        raise HTTPException(status_code=result[1], detail=result[0]["error"])
+    set_validators(response, etag, None)
+    return result
+
+@router.get("/search", response_model=ProductSearchPage, response_model_exclude_unset=True,
+            summary="Search products by name and description")
+async def search_products(
+    q: str = Query(..., min_length=1, max_length=200, description="Search text; supports \"phrases\", or, -exclusions"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    in_stock: bool = False,
+    fields: Optional[str] = Query(None, description="Comma-separated fields, e.g. id,name,price"),
+    product_service=Depends(get_product_service)
+):
+    """
+    Full-text search over product names and descriptions with German and English stemming.
+    Results are ranked by relevance and paginated with the same cursor scheme as the listing.
+    """
+    result = await run_service(product_service.search_products, q, limit, cursor, in_stock, fields)
+    if isinstance(result, tuple):
+        raise HTTPException(status_code=result[1], detail=result[0]["error"])
+    return result
+
+@router.get("/suggest", response_model=List[ProductSuggestion], summary="Autocomplete product names")
+async def suggest_products(
+    q: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(SUGGEST_DEFAULT_LIMIT, ge=1, le=SUGGEST_MAX_LIMIT)
+):
     """
-    Retrieve all available products.
+    Return products whose name starts with the typed text, case-insensitive and in alphabetical order.
+    Served from an in-memory index without a database query.
     """
-    product_service = ProductService(data_manager)
-    result = product_service.get_all_products()
+    return suggest_index.suggest(q, limit)
+
+@router.post("/stock/batch", response_model=StockBatchResult, summary="Apply a batch of stock values or deltas")
+async def adjust_stock_batch(batch: StockBatch, product_service=Depends(get_product_service)):
+    """
+    Apply absolute stock values or deltas for many products at once, e.g. from a warehouse sync.
+    Replaying a batch with the same batch_id returns the original result without applying it again.
+    """
+    result = await run_service(product_service.adjust_stock_batch, batch.batch_id, batch.items)
     if isinstance(result, tuple):
         raise HTTPException(status_code=result[1], detail=result[0]["error"])
     return result
 
-@router.get("/{product_id}", summary="Get product by ID")
-def get_product(product_id: int, data_manager: DataManagerInterface = Depends(get_data_manager)):
+@router.get("/{product_id}", response_model=ProductResponse, summary="Get product by ID")
+async def get_product(
+    product_id: int,
+    request: Request,
+    response: Response,
+    product_service=Depends(get_product_service)
+):
     """
     Retrieve a specific product by its ID.
+    Supports conditional requests via If-None-Match.
     """
-    product_service = ProductService(data_manager)
-    result = product_service.get_product_by_id(product_id)
+    version = await run_service(product_service.get_product_version, product_id)
+    if version is None:
+        raise HTTPException(status_code=404, detail="Product not found")
+    # No Last-Modified: `available` changes with reservations, which are covered by the ETag only
+    etag, _ = validators_for_rows([version], "product")
+    if is_not_modified(request, etag, None):
+        return not_modified_response(etag, None)
+
+    result = await run_service(product_service.get_product_by_id, product_id)
     if isinstance(result, tuple):
         raise HTTPException(status_code=result[1], detail=result[0]["error"])
+    set_validators(response, etag, None)
     return result
 
-@router.post("/", summary="Create a new product")
-def create_product(
+@router.post("/", response_model=MessageResponse, summary="Create a new product")
+async def create_product(
     product: ProductCreate,
-    data_manager: DataManagerInterface = Depends(get_data_manager)
+    product_service=Depends(get_product_service)
 ):
     """
     Create a new product using validated input data.
     """
-    product_service = ProductService(data_manager)
-    result = product_service.create_product(**product.model_dump())
+    result = await run_service(product_service.create_product, **product.model_dump())
     if isinstance(result, tuple) and result[1] != 200:
         raise HTTPException(status_code=result[1], detail=result[0]["error"])
     return {"message": "Product created successfully"}
 
-@router.put("/{product_id}", summary="Update an existing product")
-def update_product(
+@router.put("/{product_id}", response_model=MessageResponse, summary="Update an existing product")
+async def update_product(
     product_id: int,
     product_data: ProductUpdate,
-    data_manager: DataManagerInterface = Depends(get_data_manager)
+    product_service=Depends(get_product_service)
 ):
     """
     Update an existing product by ID using partial or full input data.
+    The version read with the product must be sent along; if the product
+    was changed since, the update is rejected with 409. The same applies to
+    a stock below the quantity currently reserved in carts.
     """
-    product_service = ProductService(data_manager)
-    result = product_service.update_product(product_id, **product_data.model_dump(exclude_unset=True))
+    changes = product_data.model_dump(exclude_unset=True)
+    expected_version = changes.pop("version")
+    result = await run_service(product_service.update_product, product_id, expected_version, **changes)
     if isinstance(result, tuple) and result[1] != 200:
         raise HTTPException(status_code=result[1], detail=result[0]["error"])
     return {"message": "Product updated successfully"}
 
-@router.delete("/{product_id}", summary="Delete a product")
-def delete_product(product_id: int, data_manager: DataManagerInterface = Depends(get_data_manager)):
+@router.delete("/{product_id}", response_model=MessageResponse, summary="Delete a product")
+async def delete_product(product_id: int, product_service=Depends(get_product_service)):
     """
     Delete a product by its ID.
     """
-    product_service = ProductService(data_manager)
-    result = product_service.delete_product(product_id)
+    result = await run_service(product_service.delete_product, product_id)
     if isinstance(result, tuple) and result[1] != 200:
         raise HTTPException(status_code=result[1], detail=result[0]["error"])
     return {"message": "Product deleted successfully"}
@@ -1,5 +1,6 @@
-from pydantic import BaseModel, Field
-from typing import Optional
+from pydantic import BaseModel, Field, field_validator, model_validator
+from datetime import datetime
+from typing import Optional, List
 
 
 class ProductCreate(BaseModel):
@@ -16,3 +17,90 @@ class ProductUpdate(BaseModel):
     price: Optional[float] = Field(None, ge=0, description="Price must be non-negative")
     description: Optional[str] = None
     stock: Optional[int] = Field(None, ge=0, description="Stock must be non-negative")
+    version: int = Field(..., ge=1, description="Version of the product the changes are based on")
+
+
+class StockAdjustment(BaseModel):
+    product_id: int
+    stock: Optional[int] = Field(None, ge=0, description="Absolute stock value")
+    delta: Optional[int] = Field(None, description="Relative stock change")
+
+    @model_validator(mode="after")
+    def validate_stock_or_delta(self):
+        if (self.stock is None) == (self.delta is None):
+            raise ValueError("Exactly one of 'stock' or 'delta' must be given")
+        return self
+
+
+class StockBatch(BaseModel):
+    batch_id: str = Field(..., min_length=1, max_length=100, description="Unique ID making the batch idempotent")
+    items: List[StockAdjustment] = Field(..., min_length=1, max_length=100000)
+
+    @field_validator("items")
+    @classmethod
+    def validate_unique_products(cls, items: List[StockAdjustment]):
+        product_ids = [item.product_id for item in items]
+        if len(product_ids) != len(set(product_ids)):
+            raise ValueError("Each product may only appear once per batch")
+        return items
+
+
+class ProductResponse(BaseModel):
+    id: int
+    name: str
+    unit: str
+    price: float
+    description: str
+    stock: int
+    available: int
+    image_path: Optional[str] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    version: int
+
+    class Config:
+        from_attributes = True
+
+
+class ProductListItem(BaseModel):
+    """
+    Product in a listing or search page. Only the requested fields are set,
+    so routes return it with `response_model_exclude_unset`.
+    """
+    id: Optional[int] = None
+    name: Optional[str] = None
+    unit: Optional[str] = None
+    price: Optional[float] = None
+    stock: Optional[int] = None
+    available: Optional[int] = None
+    image_path: Optional[str] = None
+    description: Optional[str] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+
+class ProductPage(BaseModel):
+    items: List[ProductListItem]
+    next_cursor: Optional[str] = None
+
+
+class ProductSearchItem(ProductListItem):
+    rank: float
+
+
+class ProductSearchPage(BaseModel):
+    items: List[ProductSearchItem]
+    next_cursor: Optional[str] = None
+
+
+class ProductSuggestion(BaseModel):
+    id: int
+    name: str
+
+
+class StockBatchResult(BaseModel):
+    batch_id: str
+    updated: int
+    unknown_ids: List[int]
+    rejected_ids: List[int]
+    replayed: bool
@@ -1,4 +1,4 @@
-from app.models import Product
+from app.models import Product, StockBatch
 from typing import Tuple, Optional, List, Union
 from app.data_manager_interface import DataManagerInterface
 from fastapi import HTTPException
@@ -6,7 +6,38 @@ import os
 import re
 import shutil
 import logging
+from datetime import datetime
+from sqlalchemy import select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.orm import Session
+from app.product.product_queries import (
+    build_product_listing_query,
+    build_page,
+    parse_fields,
+    build_stock_adjustment_statement,
+    build_product_search_query,
+    build_search_page,
+    STOCK_BATCH_CHUNK_SIZE,
+)
+from app.product.product_schemas import StockAdjustment
+from app.product.product_suggest import suggest_index
+from app.concurrency import retry_on_conflict, ConcurrentUpdateError, CONFLICT_RESPONSE
+
+logger = logging.getLogger(__name__)
+
+
+def product_image_folder_path(product_name: str) -> str:
+    """
+    Builds the sanitized image folder path for a product name without touching the filesystem.
+
+    Args:
+        product_name (str): The name of the product.
+
+    Returns:
+        str: The folder path under 'static/product_images/'.
+    """
+    safe_name = re.sub(r'\W+', '_', product_name.strip()).lower()
+    return os.path.join("static", "product_images", safe_name)
 
 
 def create_product_image_folder(product_name: str) -> str:
@@ -26,8 +57,7 @@ def create_product_image_folder(product_name: str) -> str:
     Raises:
         Exception: If an error occurs while creating the folder.
     """
-    safe_name = re.sub(r'\W+', '_', product_name.strip()).lower()
-    folder_path = os.path.join("static", "product_images", safe_name)
+    folder_path = product_image_folder_path(product_name)
 
     try:
         if not os.path.exists(folder_path):
@@ -56,8 +86,7 @@ def delete_product_image_folder(product_name: str):
         - Warning log if the folder does not exist.
         - Error log if an exception occurs during deletion.
     """
-    safe_name = re.sub(r'\W+', '_', product_name.strip()).lower()
-    folder_path = os.path.join("static", "product_images", safe_name)
+    folder_path = product_image_folder_path(product_name)
 
     try:
         if os.path.exists(folder_path):
@@ -97,6 +126,22 @@ def product_exists_by_id(db: Session, product_id: int) -> bool:
     return db.query(Product).filter(Product.id == product_id).first() is not None
 
 
+def version_mismatch(current_version: int) -> Tuple[dict, int]:
+    """
+    Builds the 409 response for an update based on an outdated product version.
+
+    Args:
+        current_version (int): The version the product has now.
+
+    Returns:
+        Tuple[dict, int]: The error message with the current version and status 409.
+    """
+    return {
+        "error": f"The product was changed in the meantime (now version {current_version}). "
+                 f"Please reload it and apply your changes again."
+    }, 409
+
+
 class ProductService:
     """
     Service class responsible for managing product-related operations.
@@ -139,7 +184,10 @@ class ProductService:
                 stock=stock,
                 image_path=folder_path
             )
-            return self.data_manager.add_element(new_product)
+            result = self.data_manager.add_element(new_product)
+            if result[1] == 200:
+                suggest_index.add(new_product.id, new_product.name)
+            return result
 
         except OSError as e:
             return {"error": f"Could not create folder for product image: {e}"}, 500
@@ -170,26 +218,198 @@ class ProductService:
         """
         return self.data_manager.get_all(Product)
 
-    def update_product(self, product_id: int, **kwargs) -> Tuple[Union[str, dict], int]:
+    def list_products(self, limit: int, sort: str = "id", cursor: Optional[str] = None,
+                      min_price: Optional[float] = None, max_price: Optional[float] = None,
+                      in_stock: bool = False, name_prefix: Optional[str] = None,
+                      fields: Optional[str] = None) -> Union[dict, Tuple[dict, int]]:
+        """
+        Retrieves one keyset-paginated page of products.
+
+        Args:
+            limit (int): Page size.
+            sort (str): Sort order, "id" or "price".
+            cursor (Optional[str]): Cursor returned with the previous page.
+            min_price (Optional[float]): Lower price bound.
+            max_price (Optional[float]): Upper price bound.
+            in_stock (bool): Only include products that are in stock.
+            name_prefix (Optional[str]): Only include products whose name starts with this prefix.
+            fields (Optional[str]): Comma-separated columns to return. Defaults to the shop grid fields.
+
+        Returns:
+            Union[dict, Tuple[dict, int]]: The page with its next cursor or an error message with status code.
+        """
+        try:
+            selected = parse_fields(fields)
+            query = build_product_listing_query(limit, sort, cursor, min_price, max_price,
+                                                in_stock, name_prefix, selected)
+        except ValueError as error:
+            return {"error": str(error)}, 400
+
+        rows = self.data_manager.db.execute(query).all()
+        return build_page(rows, limit, sort, selected)
+
+    def search_products(self, q: str, limit: int, cursor: Optional[str] = None, in_stock: bool = False,
+                        fields: Optional[str] = None) -> Union[dict, Tuple[dict, int]]:
+        """
+        Retrieves one page of products matching a full-text search, best matches first.
+
+        Args:
+            q (str): Search text over product names and descriptions.
+            limit (int): Page size.
+            cursor (Optional[str]): Cursor returned with the previous page.
+            in_stock (bool): Only include products that are in stock.
+            fields (Optional[str]): Comma-separated columns to return. Defaults to the shop grid fields.
+
+        Returns:
+            Union[dict, Tuple[dict, int]]: The ranked page with its next cursor or an error message with status code.
+        """
+        try:
+            selected = parse_fields(fields)
+            query = build_product_search_query(q, limit, cursor, in_stock, selected)
+        except ValueError as error:
+            return {"error": str(error)}, 400
+
+        rows = self.data_manager.db.execute(query).all()
+        return build_search_page(rows, limit, selected)
+
+    def get_product_version(self, product_id: int):
+        """
+        Looks up only the id, update timestamp and reserved quantity of a product for conditional requests.
+        Cart reservations change the availability without moving the update timestamp.
+
+        Args:
+            product_id (int): ID of the product.
+
+        Returns:
+            Optional[Row]: A row with `id`, `updated_at` and `reserved`, or None if the product does not exist.
+        """
+        return self.data_manager.db.execute(
+            select(Product.id, Product.updated_at, Product.reserved).where(Product.id == product_id)
+        ).first()
+
+    def list_product_versions(self, limit: int, sort: str = "id", cursor: Optional[str] = None,
+                              min_price: Optional[float] = None, max_price: Optional[float] = None,
+                              in_stock: bool = False, name_prefix: Optional[str] = None) -> Union[list, Tuple[dict, int]]:
+        """
+        Runs the listing query for one page with only the id, update timestamp and reserved columns.
+        Used to validate cached pages before the full rows are loaded.
+
+        Args:
+            limit (int): Page size.
+            sort (str): Sort order, "id" or "price".
+            cursor (Optional[str]): Cursor returned with the previous page.
+            min_price (Optional[float]): Lower price bound.
+            max_price (Optional[float]): Upper price bound.
+            in_stock (bool): Only include products that are in stock.
+            name_prefix (Optional[str]): Only include products whose name starts with this prefix.
+
+        Returns:
+            Union[list, Tuple[dict, int]]: Version rows of the page or an error message with status code.
+        """
+        try:
+            query = build_product_listing_query(limit, sort, cursor, min_price, max_price,
+                                                in_stock, name_prefix, ("id", "updated_at", "reserved"))
+        except ValueError as error:
+            return {"error": str(error)}, 400
+        return self.data_manager.db.execute(query).all()
+
+    def adjust_stock_batch(self, batch_id: str, items: List[StockAdjustment]) -> Union[dict, Tuple[dict, int]]:
+        """
+        Applies a warehouse batch of absolute or relative stock values in one transaction.
+
+        The batch ID is claimed first; a replay of an already applied batch returns
+        the stored result without touching any product. Adjustments are applied with
+        one UPDATE ... FROM (VALUES ...) per chunk.
+
+        Args:
+            batch_id (str): Unique ID of the batch.
+            items (List[StockAdjustment]): Stock values or deltas per product.
+
+        Returns:
+            Union[dict, Tuple[dict, int]]: Updated count, unknown and rejected product IDs,
+            or an error message with status code.
+        """
+        db = self.data_manager.db
+        claimed = db.execute(
+            pg_insert(StockBatch)
+            .values(batch_id=batch_id, item_count=len(items), created_at=datetime.utcnow())
+            .on_conflict_do_nothing()
+            .returning(StockBatch.batch_id)
+        ).first()
+        if claimed is None:
+            stored = db.get(StockBatch, batch_id)
+            if stored is None or stored.result is None:
+                return {"error": "Batch is being processed."}, 409
+            return {**stored.result, "replayed": True}
+
+        adjustments = [
+            (item.product_id, item.stock if item.stock is not None else item.delta, item.stock is not None)
+            for item in items
+        ]
+        updated_ids = set()
+        for start in range(0, len(adjustments), STOCK_BATCH_CHUNK_SIZE):
+            chunk = adjustments[start:start + STOCK_BATCH_CHUNK_SIZE]
+            updated_ids.update(db.execute(build_stock_adjustment_statement(chunk)).scalars().all())
+
+        # Products that were not updated either do not exist or would have gone below their reservations
+        missing = [product_id for product_id, _, _ in adjustments if product_id not in updated_ids]
+        existing = set()
+        for start in range(0, len(missing), STOCK_BATCH_CHUNK_SIZE):
+            chunk = missing[start:start + STOCK_BATCH_CHUNK_SIZE]
+            existing.update(db.execute(select(Product.id).where(Product.id.in_(chunk))).scalars().all())
+
+        result = {
+            "batch_id": batch_id,
+            "updated": len(updated_ids),
+            "unknown_ids": [product_id for product_id in missing if product_id not in existing],
+            "rejected_ids": [product_id for product_id in missing if product_id in existing],
+            "replayed": False
+        }
+        db.execute(update(StockBatch).where(StockBatch.batch_id == batch_id).values(result=result))
+        message, status = self.data_manager.commit_only()
+        if status != 200:
+            return message, status
+        return result
+
+    def update_product(self, product_id: int, expected_version: int, **kwargs) -> Tuple[Union[str, dict], int]:
         """
         Updates an existing product's attributes.
 
+        The client sends the version it last read. If the product has changed since,
+        the update is rejected with 409 instead of overwriting the newer values;
+        the client reloads the product and decides again.
+
         Args:
             product_id (int): ID of the product to update.
+            expected_version (int): The product version the client's changes are based on.
             **kwargs: Attributes to update as key-value pairs.
 
         Returns:
-            Tuple[Union[str, dict], int]: A success or error message with an HTTP status code.
+            Tuple[Union[str, dict], int]: A success or error message with an HTTP status code;
+            409 if the new stock would not cover the units already reserved in carts.
         """
-        if not product_exists_by_id(self.data_manager.db, product_id):
+        product = self.data_manager.get_by_id(Product, product_id)
+        if not product:
             return {"error": "Product not found."}, 404
+        if product.version != expected_version:
+            return version_mismatch(product.version)
+
+        stock = kwargs.get("stock")
+        if stock is not None and stock < product.reserved:
+            return {"error": f"Stock cannot be set below the {product.reserved} units reserved in carts."}, 409
 
-        product = self.data_manager.get_by_id(Product, product_id)
         for key, value in kwargs.items():
             if hasattr(product, key) and value is not None:
                 setattr(product, key, value)
-        return self.data_manager.commit_only()
-
+        try:
+            result = self.data_manager.commit_only()
+        except ConcurrentUpdateError:
+            return CONFLICT_RESPONSE
+        if result[1] == 200 and kwargs.get("name") is not None:
+            suggest_index.add(product_id, kwargs["name"])
+        return result
+
+    @retry_on_conflict
     def delete_product(self, product_id: int) -> Tuple[Union[str, dict], int]:
         """
         Deletes a product by its ID.
@@ -205,7 +425,10 @@ class ProductService:
 
         product = self.data_manager.get_by_id(Product, product_id)
         delete_product_image_folder(product.name)
-        return self.data_manager.delete_element(product)
+        result = self.data_manager.delete_element(product)
+        if result[1] == 200:
+            suggest_index.remove(product_id)
+        return result
 
     def check_product_stock(self, product_id, requested_quantity: int):
         """
@@ -228,17 +451,6 @@ class ProductService:
                 detail=f"Only {product.stock} units of '{product.name}' are available. Do you want to proceed with that amount?"
             )
 
-    def reduce_product_stock(self, product_id, quantity: int):
-        """
-        Reduces the product's stock by the given quantity.
-
-        Args:
-            product (Product): The product to update.
-            quantity (int): The quantity to subtract from stock.
-        """
-        product = self.data_manager.get_by_id(Product, product_id)
-        product.stock -= quantity
-
     def increase_product_stock(self, product: Product, quantity: int):
         """
         Increases the product's stock by the given quantity.
@@ -0,0 +1,204 @@
+import bisect
+import logging
+import os
+import threading
+import time
+from typing import List, Optional, Tuple
+from sqlalchemy import select
+from app.database import SessionLocal
+from app.models import Product
+
+logger = logging.getLogger(__name__)
+
+SUGGEST_REFRESH_INTERVAL = int(os.getenv("PRODUCT_SUGGEST_REFRESH_INTERVAL", "300"))
+SUGGEST_DEFAULT_LIMIT = 10
+SUGGEST_MAX_LIMIT = 50
+
+
+def normalize_name(name: str) -> str:
+    """
+    Normalizes a product name or query for case-insensitive prefix matching.
+
+    Args:
+        name (str): The raw product name or search text.
+
+    Returns:
+        str: The casefolded name with runs of whitespace collapsed to single spaces.
+    """
+    return " ".join(name.split()).casefold()
+
+
+class ProductNameIndex:
+    """
+    In-process prefix index over product names for autocomplete.
+
+    Entries are kept as (normalized name, id, name) tuples in a sorted list, so a
+    lookup is one binary search plus a scan over at most `limit` matches and never
+    touches the database. Product changes made through the services update the
+    index incrementally; a full rebuild loads it from PostgreSQL at startup and
+    periodically afterwards, which also picks up changes made by other workers,
+    bulk imports or direct SQL.
+    """
+
+    def __init__(self, refresh_interval: int = SUGGEST_REFRESH_INTERVAL):
+        """
+        Initializes an empty index.
+
+        Args:
+            refresh_interval (int): Seconds between background rebuilds; 0 disables them.
+        """
+        self.refresh_interval = refresh_interval
+        self.loaded_at: Optional[float] = None
+
+        self._entries: List[Tuple[str, int, str]] = []
+        self._keys_by_id: dict = {}
+        # Changes applied while a rebuild reads the database, replayed onto the new entries
+        self._pending: Optional[list] = None
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._refresh_thread: Optional[threading.Thread] = None
+
+    def _insert(self, product_id: int, name: str) -> None:
+        entry = (normalize_name(name), product_id, name)
+        bisect.insort(self._entries, entry)
+        self._keys_by_id[product_id] = entry
+
+    def _remove(self, product_id: int) -> None:
+        entry = self._keys_by_id.pop(product_id, None)
+        if entry is None:
+            return
+        position = bisect.bisect_left(self._entries, entry)
+        if position < len(self._entries) and self._entries[position] == entry:
+            del self._entries[position]
+
+    def add(self, product_id: int, name: str) -> None:
+        """
+        Adds a product or replaces the name of an indexed product.
+
+        Args:
+            product_id (int): ID of the product.
+            name (str): The current product name.
+        """
+        with self._lock:
+            self._remove(product_id)
+            self._insert(product_id, name)
+            if self._pending is not None:
+                self._pending.append((product_id, name))
+
+    def remove(self, product_id: int) -> None:
+        """
+        Removes a product from the index. Unknown IDs are ignored.
+
+        Args:
+            product_id (int): ID of the deleted product.
+        """
+        with self._lock:
+            self._remove(product_id)
+            if self._pending is not None:
+                self._pending.append((product_id, None))
+
+    def suggest(self, prefix: str, limit: int = SUGGEST_DEFAULT_LIMIT) -> List[dict]:
+        """
+        Returns products whose name starts with the given prefix, in alphabetical order.
+
+        Args:
+            prefix (str): The text typed so far (case-insensitive).
+            limit (int): Maximum number of suggestions.
+
+        Returns:
+            List[dict]: Up to `limit` suggestions with `id` and `name`.
+        """
+        key = normalize_name(prefix)
+        if not key:
+            return []
+
+        suggestions = []
+        with self._lock:
+            position = bisect.bisect_left(self._entries, (key,))
+            for normalized, product_id, name in self._entries[position:position + limit]:
+                if not normalized.startswith(key):
+                    break
+                suggestions.append({"id": product_id, "name": name})
+        return suggestions
+
+    def rebuild(self) -> int:
+        """
+        Reloads the whole index from the database and swaps it in atomically.
+        Incremental changes made while the rows are read are applied on top.
+
+        Returns:
+            int: Number of indexed products.
+        """
+        with self._lock:
+            self._pending = []
+        db = SessionLocal()
+        try:
+            rows = db.execute(select(Product.id, Product.name)).all()
+        except Exception:
+            with self._lock:
+                self._pending = None
+            raise
+        finally:
+            db.close()
+
+        entries = sorted((normalize_name(name), product_id, name) for product_id, name in rows)
+        keys_by_id = {entry[1]: entry for entry in entries}
+        with self._lock:
+            pending, self._pending = self._pending, None
+            self._entries = entries
+            self._keys_by_id = keys_by_id
+            for product_id, name in pending:
+                self._remove(product_id)
+                if name is not None:
+                    self._insert(product_id, name)
+            self.loaded_at = time.time()
+        logger.info(f"Loaded {len(entries)} product names into the suggest index")
+        return len(entries)
+
+    def stats(self) -> dict:
+        """
+        Returns the size and age of the index.
+
+        Returns:
+            dict: Number of entries and the time of the last full rebuild.
+        """
+        with self._lock:
+            return {"size": len(self._entries), "loaded_at": self.loaded_at}
+
+    def _refresh_loop(self) -> None:
+        """
+        Background loop that rebuilds the index at the configured interval.
+        On failure the current entries stay in use until the next run.
+        """
+        while not self._stop_event.wait(self.refresh_interval):
+            try:
+                self.rebuild()
+            except Exception as error:
+                logger.warning(f"Suggest index rebuild failed: {error}")
+
+    def start(self) -> None:
+        """
+        Loads the index and starts the background rebuild thread.
+        A failed initial load is logged; the next background rebuild retries it.
+        """
+        try:
+            self.rebuild()
+        except Exception as error:
+            logger.error(f"Suggest index load failed: {error}")
+
+        if self.refresh_interval > 0 and (self._refresh_thread is None or not self._refresh_thread.is_alive()):
+            self._stop_event.clear()
+            self._refresh_thread = threading.Thread(target=self._refresh_loop, name="suggest-index-refresh", daemon=True)
+            self._refresh_thread.start()
+
+    def stop(self) -> None:
+        """
+        Stops the background rebuild thread.
+        """
+        self._stop_event.set()
+        if self._refresh_thread is not None:
+            self._refresh_thread.join(timeout=1)
+            self._refresh_thread = None
+
+
+suggest_index = ProductNameIndex()
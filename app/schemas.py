@@ -0,0 +1,8 @@
+from pydantic import BaseModel
+
+
+class MessageResponse(BaseModel):
+    """
+    Confirmation returned by routes that change data without returning it.
+    """
+    message: str
@@ -0,0 +1,174 @@
+from app.models import User
+from typing import Tuple, Optional, List, Union
+from app.data_manager_interface import DataManagerInterface
+from app.user.user_queries import build_user_listing_query, build_user_count_query, build_user_page
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+async def user_exists_by_email(db: AsyncSession, email: str) -> bool:
+    """
+    Checks whether a user with the given email address exists in the database.
+
+    Args:
+        db (AsyncSession): The active SQLAlchemy async database session.
+        email (str): The email address of the user to check.
+
+    Returns:
+        bool: True if a user with the given email exists, False otherwise.
+    """
+    result = await db.execute(select(User.id).where(User.email == email).limit(1))
+    return result.first() is not None
+
+
+class AsyncUserService:
+    """
+    Async counterpart of UserService for the asyncpg backend.
+    Offers the same operations as coroutines on an AsyncPostgresDataManager.
+    """
+
+    def __init__(self, data_manager: DataManagerInterface):
+        """
+        Initializes the AsyncUserService with an async data manager.
+
+        Args:
+            data_manager (DataManagerInterface): The async interface used for database operations.
+        """
+        self.data_manager = data_manager
+
+    async def create_user(self, sub: str, email: str, first_name: Optional[str] = None,
+                          last_name: Optional[str] = None, company: Optional[str] = None,
+                          birth_date: Optional[str] = None, is_admin: bool = False) -> Tuple[dict, int]:
+        """
+        Creates a new user record based on Auth0 information.
+
+        Args:
+            sub (str): Auth0 unique user identifier.
+            email (str): User email.
+            first_name (str, optional): User's first name.
+            last_name (str, optional): User's last name.
+            company (str, optional): User's company.
+            birth_date (str, optional): User's birth date.
+            is_admin (bool): Whether user has admin privileges.
+
+        Returns:
+            Tuple[dict, int]: A success or error message with an HTTP status code.
+        """
+        if await user_exists_by_email(self.data_manager.db, email):
+            return {"error": "A user with this email already exists."}, 409
+
+        new_user = User(
+            email=email,
+            first_name=first_name,
+            last_name=last_name,
+            company=company,
+            birth_date=birth_date,
+            is_admin=is_admin
+        )
+        return await self.data_manager.add_element(new_user)
+
+    async def get_user_by_id(self, user_id: int) -> Union[User, Tuple[dict, int]]:
+        """
+        Retrieves a user by their ID.
+
+        Args:
+            user_id (int): The ID of the user.
+
+        Returns:
+            Union[User, Tuple[dict, int]]: The user object or an error message with status code.
+        """
+        user = await self.data_manager.get_by_id(User, user_id)
+        if not user:
+            return {"error": "User not found"}, 404
+        return user
+
+    async def get_user_version(self, user_id: int):
+        """
+        Looks up only the id and update timestamp of a user for conditional requests.
+
+        Args:
+            user_id (int): The ID of the user.
+
+        Returns:
+            Optional[Row]: A row with `id` and `updated_at`, or None if the user does not exist.
+        """
+        return (await self.data_manager.db.execute(
+            select(User.id, User.updated_at).where(User.id == user_id)
+        )).first()
+
+    async def get_all_users(self) -> Union[List[User], Tuple[dict, int]]:
+        """
+        Retrieves all users.
+
+        Returns:
+            Union[List[User], Tuple[dict, int]]: A list of users or an error message with status code.
+        """
+        return await self.data_manager.get_all(User)
+
+    async def list_users(self, limit: int, sort: str = "id", descending: bool = False, cursor: Optional[str] = None,
+                         is_admin: Optional[bool] = None, include_total: bool = True) -> Union[dict, Tuple[dict, int]]:
+        """
+        Retrieves one keyset-paginated page of users with the admin list columns.
+
+        Args:
+            limit (int): Page size.
+            sort (str): Sort order, "id" or "created_at".
+            descending (bool): Sort newest/highest first.
+            cursor (Optional[str]): Cursor returned with the previous page.
+            is_admin (Optional[bool]): Only include admins (True) or customers (False).
+            include_total (bool): Whether to count all matching users; disable for large tables.
+
+        Returns:
+            Union[dict, Tuple[dict, int]]: The page with its next cursor or an error message with status code.
+        """
+        try:
+            query = build_user_listing_query(limit, sort, descending, cursor, is_admin)
+        except ValueError as error:
+            return {"error": str(error)}, 400
+
+        rows = (await self.data_manager.db.execute(query)).all()
+        total = None
+        if include_total:
+            total = (await self.data_manager.db.execute(build_user_count_query(is_admin))).scalar_one()
+        return build_user_page(rows, limit, sort, total)
+
+    async def update_user(self, user_id: int, **kwargs) -> Tuple[Union[str, dict], int]:
+        """
+        Updates user attributes by ID.
+
+        Args:
+            user_id (int): The ID of the user to update.
+            **kwargs: Dictionary of attributes to update.
+
+        Returns:
+            Tuple[Union[str, dict], int]: A success or error message with status code.
+        """
+        user = await self.data_manager.get_by_id(User, user_id)
+        if not user:
+            return {"error": "User not found."}, 404
+
+        for key, value in kwargs.items():
+            if hasattr(user, key) and value is not None:
+                setattr(user, key, value)
+
+        result, status = await self.data_manager.commit_only()
+        if status != 200:
+            return result, status
+
+        return {"message": "User updated successfully"}, 200
+
+    async def delete_user(self, user_id: int) -> Tuple[Union[str, dict], int]:
+        """
+        Deletes a user by ID.
+
+        Args:
+            user_id (int): The ID of the user to delete.
+
+        Returns:
+            Tuple[Union[str, dict], int]: A success or error message with status code.
+        """
+        user = await self.data_manager.get_by_id(User, user_id)
+        if not user:
+            return {"error": "User not found."}, 404
+
+        return await self.data_manager.delete_element(user)
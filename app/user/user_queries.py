@@ -0,0 +1,82 @@
+from typing import Optional
+from sqlalchemy import select, func, tuple_, Select
+from app.models import User
+from app.pagination import encode_cursor, decode_cursor
+
+# Columns shown in the admin user list; birth dates and addresses are not loaded
+USER_LIST_FIELDS = ("id", "first_name", "last_name", "email", "company", "is_admin", "created_at")
+SORT_KEYS = {
+    "id": ("id",),
+    "created_at": ("created_at", "id"),
+}
+
+
+def build_user_listing_query(limit: int, sort: str = "id", descending: bool = False,
+                             cursor: Optional[str] = None, is_admin: Optional[bool] = None) -> Select:
+    """
+    Builds a keyset-paginated user listing query over the admin list columns.
+
+    Args:
+        limit (int): Page size.
+        sort (str): Sort order, "id" or "created_at" (ties broken by id).
+        descending (bool): Sort newest/highest first.
+        cursor (Optional[str]): Cursor of the previous page.
+        is_admin (Optional[bool]): Only return admins (True) or customers (False).
+
+    Returns:
+        Select: The listing statement, fetching one extra row to detect a next page.
+
+    Raises:
+        ValueError: If the sort order or cursor is invalid.
+    """
+    if sort not in SORT_KEYS:
+        raise ValueError(f"Unsupported sort order '{sort}'")
+    sort_columns = [getattr(User, name) for name in SORT_KEYS[sort]]
+
+    query = select(*[getattr(User, name) for name in USER_LIST_FIELDS])
+    if is_admin is not None:
+        query = query.where(User.is_admin.is_(is_admin))
+    if cursor:
+        values = decode_cursor(cursor, [column.type.python_type for column in sort_columns])
+        key, bound = tuple_(*sort_columns), tuple_(*values)
+        query = query.where(key < bound if descending else key > bound)
+
+    order = [column.desc() for column in sort_columns] if descending else sort_columns
+    return query.order_by(*order).limit(limit + 1)
+
+
+def build_user_count_query(is_admin: Optional[bool] = None) -> Select:
+    """
+    Builds the total count query matching the listing filters.
+
+    Args:
+        is_admin (Optional[bool]): The same admin filter as the listing.
+
+    Returns:
+        Select: A COUNT(*) statement.
+    """
+    query = select(func.count()).select_from(User)
+    if is_admin is not None:
+        query = query.where(User.is_admin.is_(is_admin))
+    return query
+
+
+def build_user_page(rows: list, limit: int, sort: str, total: Optional[int] = None) -> dict:
+    """
+    Turns the rows of a user listing query into a page with the cursor for the next page.
+
+    Args:
+        rows (list): Result rows of build_user_listing_query (up to limit + 1).
+        limit (int): Page size.
+        sort (str): Sort order used for the query.
+        total (Optional[int]): Total number of matching users, if requested.
+
+    Returns:
+        dict: The page items, the next cursor (None on the last page) and the total.
+    """
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    next_cursor = None
+    if has_more and rows:
+        next_cursor = encode_cursor([rows[-1]._mapping[name] for name in SORT_KEYS[sort]])
+    return {"items": [dict(row._mapping) for row in rows], "next_cursor": next_cursor, "total": total}
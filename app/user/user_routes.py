@@ -1,69 +1,116 @@
-from fastapi import APIRouter, Depends, HTTPException
+from typing import Literal, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from app.user.user_schemas import UserUpdate
+from app.user.user_schemas import UserUpdate, UserResponse, UserPage
+from app.schemas import MessageResponse
 from app.user.user_service import UserService
+from app.user.async_user_service import AsyncUserService
 from app.auth.auth_utils import get_current_user_data
-from app.postgres_data_manager import PostgresDataManager
+from app.dependencies import get_data_manager, run_service, USE_ASYNC_DB
+from app.data_manager_interface import DataManagerInterface
+from app.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from app.http_caching import validators_for_rows, is_not_modified, not_modified_response, set_validators
 
 router = APIRouter()
-user_service = UserService(PostgresDataManager())
 auth_scheme = HTTPBearer()
 
-@router.post("/register", summary="Create user from Auth0 token")
-def register_user(token: HTTPAuthorizationCredentials = Depends(auth_scheme)):
+async def get_user_service(data_manager: DataManagerInterface = Depends(get_data_manager)):
+    if USE_ASYNC_DB:
+        return AsyncUserService(data_manager)
+    return UserService(data_manager)
+
+@router.post("/register", response_model=MessageResponse, summary="Create user from Auth0 token")
+async def register_user(
+    token: HTTPAuthorizationCredentials = Depends(auth_scheme),
+    user_service=Depends(get_user_service)
+):
     """
     Register a new user using data from Auth0 access token.
     """
     try:
-        user_info_auth = get_current_user_data(token.credentials)
+        user_info_auth = await run_service(get_current_user_data, token.credentials)
     except Exception as e:
         raise HTTPException(status_code=401, detail=str(e))
 
-    result = user_service.create_user(**user_info_auth)
+    result = await run_service(user_service.create_user, **user_info_auth)
     if isinstance(result, tuple) and result[1] != 200:
         raise HTTPException(status_code=result[1], detail=result[0]["error"])
     return {"message": "User created successfully"}
 
-@router.get("/", summary="Get all users")
-def get_all_users(token: HTTPAuthorizationCredentials = Depends(auth_scheme)):
+@router.get("/", response_model=UserPage, summary="Get users page by page")
+async def get_all_users(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    sort: Literal["id", "created_at"] = "id",
+    order: Literal["asc", "desc"] = "asc",
+    is_admin: Optional[bool] = None,
+    include_total: bool = Query(True, description="Disable to skip counting all matching users"),
+    token: HTTPAuthorizationCredentials = Depends(auth_scheme),
+    user_service=Depends(get_user_service)
+):
     """
-    Retrieve a list of all users. (Requires valid token)
+    Retrieve users using keyset pagination with optional admin filter. (Requires valid token)
     """
-    user_info_auth = get_current_user_data(token.credentials)  # Validates token
-    result = user_service.get_all_users()
+    user_info_auth = await run_service(get_current_user_data, token.credentials)  # Validates token
+    result = await run_service(user_service.list_users, limit, sort, order == "desc", cursor,
+                               is_admin, include_total)
     if isinstance(result, tuple):
         raise HTTPException(status_code=result[1], detail=result[0]["error"])
     return result
 
-@router.get("/{user_id}", summary="Get user by ID")
-def get_user(user_id: int, token: HTTPAuthorizationCredentials = Depends(auth_scheme)):
+@router.get("/{user_id}", response_model=UserResponse, summary="Get user by ID")
+async def get_user(
+    user_id: int,
+    request: Request,
+    response: Response,
+    token: HTTPAuthorizationCredentials = Depends(auth_scheme),
+    user_service=Depends(get_user_service)
+):
     """
     Retrieve a single user by their ID. (Requires valid token)
+    Supports conditional requests via If-None-Match / If-Modified-Since.
     """
-    user_info_auth = get_current_user_data(token.credentials)
-    result = user_service.get_user_by_id(user_id)
+    user_info_auth = await run_service(get_current_user_data, token.credentials)
+    version = await run_service(user_service.get_user_version, user_id)
+    if version is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    etag, last_modified = validators_for_rows([version], "user")
+    if is_not_modified(request, etag, last_modified):
+        return not_modified_response(etag, last_modified)
+
+    result = await run_service(user_service.get_user_by_id, user_id)
     if isinstance(result, tuple):
         raise HTTPException(status_code=result[1], detail=result[0]["error"])
+    set_validators(response, etag, last_modified)
     return result
 
-@router.put("/{user_id}", summary="Update a user")
-def update_user(user_id: int, update_data: UserUpdate, token: HTTPAuthorizationCredentials = Depends(auth_scheme)):
+@router.put("/{user_id}", response_model=MessageResponse, summary="Update a user")
+async def update_user(
+    user_id: int,
+    update_data: UserUpdate,
+    token: HTTPAuthorizationCredentials = Depends(auth_scheme),
+    user_service=Depends(get_user_service)
+):
     """
     Update an existing user's information. (Requires valid token)
     """
-    user_info_auth = get_current_user_data(token.credentials)
-    result = user_service.update_user(user_id, **update_data.model_dump(exclude_unset=True))
+    user_info_auth = await run_service(get_current_user_data, token.credentials)
+    result = await run_service(user_service.update_user, user_id, **update_data.model_dump(exclude_unset=True))
     if isinstance(result, tuple) and result[1] != 200:
         raise HTTPException(status_code=result[1], detail=result[0]["error"])
-    return result
+    return {"message": "User updated successfully"}
 
-@router.delete("/{user_id}", summary="Delete a user")
-def delete_user(user_id: int, token: HTTPAuthorizationCredentials = Depends(auth_scheme)):
+@router.delete("/{user_id}", response_model=MessageResponse, summary="Delete a user")
+async def delete_user(
+    user_id: int,
+    token: HTTPAuthorizationCredentials = Depends(auth_scheme),
+    user_service=Depends(get_user_service)
+):
     """
     Delete a user by their ID. (Requires valid token)
     """
-    user_info_auth = get_current_user_data(token.credentials)
-    result = user_service.delete_user(user_id)
+    user_info_auth = await run_service(get_current_user_data, token.credentials)
+    result = await run_service(user_service.delete_user, user_id)
     if isinstance(result, tuple) and result[1] != 200:
         raise HTTPException(status_code=result[1], detail=result[0]["error"])
     return {"message": "User deleted successfully"}
@@ -1,6 +1,6 @@
 from pydantic import BaseModel, EmailStr, Field, field_validator
-from datetime import date
-from typing import Optional
+from datetime import date, datetime
+from typing import Optional, List
 
 
 class UserCreate(BaseModel):
@@ -65,3 +65,59 @@ class UserUpdate(BaseModel):
             if birth_date_value < today.replace(year=today.year - 95):
                 raise ValueError("Birth date is too far in the past")
         return birth_date_value
+
+
+class UserResponse(BaseModel):
+    """
+    Schema for returning a single user.
+
+    Attributes:
+        id (int): The user's ID.
+        first_name (str): The user's first name.
+        last_name (str): The user's last name.
+        email (str): The user's email address.
+        company (Optional[str]): The user's company.
+        is_admin (Optional[bool]): Whether the user is an admin.
+        birth_date (Optional[date]): The user's birth date.
+        created_at (Optional[datetime]): When the user was created.
+        updated_at (Optional[datetime]): When the user was last changed.
+    """
+    id: int
+    first_name: str
+    last_name: str
+    email: str
+    company: Optional[str] = None
+    is_admin: Optional[bool] = None
+    birth_date: Optional[date] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
+class UserListItem(BaseModel):
+    """
+    Schema for a user in the admin user list; birth dates are not included.
+    """
+    id: int
+    first_name: str
+    last_name: str
+    email: str
+    company: Optional[str] = None
+    is_admin: Optional[bool] = None
+    created_at: Optional[datetime] = None
+
+
+class UserPage(BaseModel):
+    """
+    Schema for one page of the user list.
+
+    Attributes:
+        items (List[UserListItem]): The users of the page.
+        next_cursor (Optional[str]): Cursor for the next page, None on the last page.
+        total (Optional[int]): Number of matching users, if requested.
+    """
+    items: List[UserListItem]
+    next_cursor: Optional[str] = None
+    total: Optional[int] = None
@@ -1,6 +1,8 @@
 from app.models import User
 from typing import Tuple, Optional, List, Union
 from app.data_manager_interface import DataManagerInterface
+from app.user.user_queries import build_user_listing_query, build_user_count_query, build_user_page
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 
 def user_exists_by_id(db: Session, user_id: int) -> bool:
@@ -90,6 +92,20 @@ class UserService:
             return {"error": "User not found"}, 404
         return user
 
+    def get_user_version(self, user_id: int):
+        """
+        Looks up only the id and update timestamp of a user for conditional requests.
+
+        Args:
+            user_id (int): The ID of the user.
+
+        Returns:
+            Optional[Row]: A row with `id` and `updated_at`, or None if the user does not exist.
+        """
+        return self.data_manager.db.execute(
+            select(User.id, User.updated_at).where(User.id == user_id)
+        ).first()
+
     def get_all_users(self) -> Union[List[User], Tuple[dict, int]]:
         """
         Retrieves all users.
@@ -99,6 +115,33 @@ class UserService:
         """
         return self.data_manager.get_all(User)
 
+    def list_users(self, limit: int, sort: str = "id", descending: bool = False, cursor: Optional[str] = None,
+                   is_admin: Optional[bool] = None, include_total: bool = True) -> Union[dict, Tuple[dict, int]]:
+        """
+        Retrieves one keyset-paginated page of users with the admin list columns.
+
+        Args:
+            limit (int): Page size.
+            sort (str): Sort order, "id" or "created_at".
+            descending (bool): Sort newest/highest first.
+            cursor (Optional[str]): Cursor returned with the previous page.
+            is_admin (Optional[bool]): Only include admins (True) or customers (False).
+            include_total (bool): Whether to count all matching users; disable for large tables.
+
+        Returns:
+            Union[dict, Tuple[dict, int]]: The page with its next cursor or an error message with status code.
+        """
+        try:
+            query = build_user_listing_query(limit, sort, descending, cursor, is_admin)
+        except ValueError as error:
+            return {"error": str(error)}, 400
+
+        rows = self.data_manager.db.execute(query).all()
+        total = None
+        if include_total:
+            total = self.data_manager.db.execute(build_user_count_query(is_admin)).scalar_one()
+        return build_user_page(rows, limit, sort, total)
+
     def update_user(self, user_id: int, **kwargs) -> Tuple[Union[str, dict], int]:
         """
         Updates user attributes by ID.
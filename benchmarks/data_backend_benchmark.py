@@ -0,0 +1,74 @@
+"""
+Compares request throughput of the sync and async data paths.
+
+The sync path runs ProductService calls in a thread pool limited to the anyio
+default of 40 threads, exactly like sync FastAPI routes. The async path runs
+AsyncProductService coroutines concurrently on a single event loop. Both use
+the pool settings from app.database, so raise DB_POOL_SIZE/DB_MAX_OVERFLOW
+together with --concurrency to see the effect of the threadpool limit.
+
+Usage:
+    python -m benchmarks.data_backend_benchmark --requests 5000 --concurrency 500
+"""
+import argparse
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app.database import SessionLocal
+from app.async_database import AsyncSessionLocal
+from app.postgres_data_manager import PostgresDataManager
+from app.async_postgres_data_manager import AsyncPostgresDataManager
+from app.product.product_service import ProductService
+from app.product.async_product_service import AsyncProductService
+
+ANYIO_THREAD_LIMIT = 40
+
+
+def sync_request(product_id: int):
+    data_manager = PostgresDataManager(SessionLocal())
+    try:
+        return ProductService(data_manager).get_product_by_id(product_id)
+    finally:
+        data_manager.close()
+
+
+async def async_request(product_id: int, limiter: asyncio.Semaphore):
+    async with limiter:
+        data_manager = AsyncPostgresDataManager(AsyncSessionLocal())
+        try:
+            return await AsyncProductService(data_manager).get_product_by_id(product_id)
+        finally:
+            await data_manager.close()
+
+
+def run_sync(requests: int, product_id: int) -> float:
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=ANYIO_THREAD_LIMIT) as executor:
+        list(executor.map(sync_request, [product_id] * requests))
+    return time.perf_counter() - start
+
+
+async def run_async(requests: int, concurrency: int, product_id: int) -> float:
+    limiter = asyncio.Semaphore(concurrency)
+    start = time.perf_counter()
+    await asyncio.gather(*(async_request(product_id, limiter) for _ in range(requests)))
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=200, help="Requests in flight on the async path")
+    parser.add_argument("--product-id", type=int, default=1)
+    args = parser.parse_args()
+
+    sync_seconds = run_sync(args.requests, args.product_id)
+    async_seconds = asyncio.run(run_async(args.requests, args.concurrency, args.product_id))
+
+    print(f"sync  ({ANYIO_THREAD_LIMIT} threads): {args.requests / sync_seconds:8.1f} req/s")
+    print(f"async ({args.concurrency} in flight): {args.requests / async_seconds:8.1f} req/s")
+
+
+if __name__ == "__main__":
+    main()
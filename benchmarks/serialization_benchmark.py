@@ -0,0 +1,103 @@
+"""
+Measures the cost of turning product results into a response body, per 1k products.
+
+Three ways of rendering the same data are compared:
+
+* before: no response model, FastAPI walks the objects with jsonable_encoder
+  and renders the result with json.dumps (JSONResponse)
+* response model + json: validation and serialization by the Pydantic model,
+  rendered with json.dumps
+* response model + orjson: the current setup with ORJSONResponse as default
+
+Both result shapes are covered: ORM Product objects (as returned by
+get_product_by_id) and the row dictionaries of the listing (list_products).
+No database is needed; the products are built in memory.
+
+Usage:
+    python -m benchmarks.serialization_benchmark --products 1000 --repeat 20
+"""
+import argparse
+import timeit
+from datetime import datetime, timedelta
+from typing import List
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, ORJSONResponse
+from pydantic import TypeAdapter
+
+from app.models import Product
+from app.product.product_queries import LISTING_FIELDS
+from app.product.product_schemas import ProductResponse, ProductPage
+
+
+def build_products(count: int) -> List[Product]:
+    now = datetime(2026, 1, 1)
+    return [
+        Product(
+            id=number,
+            name=f"Product {number}",
+            unit="Stück",
+            price=round(1 + number * 0.37, 2),
+            description=f"Description of product {number} with a few more words to it.",
+            stock=number % 250,
+            reserved=number % 7,
+            available=number % 250 - number % 7,
+            image_path=f"static/product_images/product_{number}",
+            created_at=now,
+            updated_at=now + timedelta(minutes=number),
+            version=1
+        )
+        for number in range(1, count + 1)
+    ]
+
+
+def build_page(products: List[Product]) -> dict:
+    items = [{name: getattr(product, name) for name in LISTING_FIELDS} for product in products]
+    return {"items": items, "next_cursor": "eyJ2IjpbMTAwMF19"}
+
+
+def before(content):
+    return JSONResponse(jsonable_encoder(content)).body
+
+
+def with_model(adapter: TypeAdapter, response_class, **dump_options):
+    def render(content):
+        value = adapter.validate_python(content, from_attributes=True)
+        return response_class(adapter.dump_python(value, mode="json", **dump_options)).body
+    return render
+
+
+def measure(render, content, repeat: int, per: int) -> float:
+    seconds = min(timeit.repeat(lambda: render(content), number=1, repeat=repeat))
+    return seconds * 1000 * 1000 / per
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--products", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    products = build_products(args.products)
+    page = build_page(products)
+    objects = TypeAdapter(List[ProductResponse])
+    listing = TypeAdapter(ProductPage)
+
+    cases = [
+        ("ORM products", products, objects, {}),
+        ("listing page", page, listing, {"exclude_unset": True}),
+    ]
+    print(f"ms per 1k products (best of {args.repeat})")
+    for label, content, adapter, dump_options in cases:
+        results = [
+            ("before (jsonable_encoder + json)", before),
+            ("response model + json", with_model(adapter, JSONResponse, **dump_options)),
+            ("response model + orjson", with_model(adapter, ORJSONResponse, **dump_options)),
+        ]
+        print(label)
+        for name, render in results:
+            print(f"  {name:34} {measure(render, content, args.repeat, args.products):8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -10,10 +10,10 @@ load_dotenv()
 postgres_password = os.getenv("POSTGRESQL_PW")
 
 # Database connection configuration
-db_name = "webshop"
-user = "postgres"
-host = "localhost"
-port = 5432
+db_name = os.getenv("POSTGRES_DB", "webshop")
+user = os.getenv("POSTGRES_USER", "postgres")
+host = os.getenv("POSTGRES_HOST", "localhost")
+port = int(os.getenv("POSTGRES_PORT", "5432"))
 
 def create_database():
     """
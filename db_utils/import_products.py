@@ -0,0 +1,39 @@
+import argparse
+import json
+from app.product.product_import import ProductImporter, IMPORT_CHUNK_SIZE
+
+
+def import_products(path: str, file_format: str, on_conflict: str, chunk_size: int):
+    """
+    Imports a CSV or NDJSON product feed into the database.
+
+    The file is streamed in chunks through PostgreSQL COPY, so even very large
+    supplier feeds are imported with constant memory use.
+
+    Prints the import report with counts and per-row errors.
+    """
+    try:
+        with open(path, "rb") as feed:
+            report = ProductImporter(on_conflict=on_conflict, chunk_size=chunk_size).run(feed, file_format)
+    except Exception as e:
+        print("❌ Error occurred while importing products:", e)
+        return
+
+    print(f"✅ Imported {report['rows']} rows: {report['inserted']} inserted, {report['updated']} updated, "
+          f"{report['skipped']} skipped, {report['invalid']} invalid.")
+    for error in report["errors"]:
+        print(json.dumps(error, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk import products from a CSV or NDJSON file.")
+    parser.add_argument("path", help="Path to the product feed")
+    parser.add_argument("--format", dest="file_format", choices=["csv", "ndjson"],
+                        help="File format; derived from the file extension if omitted")
+    parser.add_argument("--on-conflict", choices=["update", "skip"], default="skip",
+                        help="What to do with products whose name already exists")
+    parser.add_argument("--chunk-size", type=int, default=IMPORT_CHUNK_SIZE)
+    args = parser.parse_args()
+
+    file_format = args.file_format or ("ndjson" if args.path.lower().endswith((".ndjson", ".jsonl")) else "csv")
+    import_products(args.path, file_format, args.on_conflict, args.chunk_size)
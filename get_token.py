@@ -1,4 +1,10 @@
-from app.auth.auth0_token_helper import get_machine_token
+import argparse
+from app.auth.auth0_token_helper import get_machine_token, get_local_token
 
-token = get_machine_token()
+parser = argparse.ArgumentParser(description="Print an access token for the API.")
+parser.add_argument("--local", action="store_true",
+                    help="Sign the token with the local stub key (requires AUTH_DEV_MODE=true; run the API with AUTH0_JWKS_FILE=local)")
+args = parser.parse_args()
+
+token = get_local_token() if args.local else get_machine_token()
 print("Access Token:", token)
@@ -1,4 +1,6 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 import uvicorn
 import os
 from dotenv import load_dotenv
@@ -10,11 +12,33 @@ from app.user.user_routes import router as user_router
 from app.product.product_routes import router as product_router
 from app.order.order_routes import router as order_router
 from app.admin.admin_routes import router as admin_router  # aktiviert
+from app.auth.jwks_cache import jwks_cache
+from app.product.product_suggest import suggest_index
+from app.order.reservation_sweeper import reservation_sweeper
+from app.idempotency import idempotency_cleaner
 
 # Load environment variables
 load_dotenv()
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Prefetch the Auth0 signing keys so the first request does not wait for them
+    jwks_cache.start()
+    # Load the autocomplete index so suggestions never have to query the database
+    suggest_index.start()
+    # Give expired cart reservations back to availability
+    reservation_sweeper.start()
+    idempotency_cleaner.start()
+    yield
+    idempotency_cleaner.stop()
+    reservation_sweeper.stop()
+    suggest_index.stop()
+    jwks_cache.stop()
+
+
+# Responses are validated against the routes' response models and rendered with orjson
+app = FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse)
 
 # Include Routers
 app.include_router(web_router)
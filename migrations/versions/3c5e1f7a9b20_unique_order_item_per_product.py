@@ -0,0 +1,59 @@
+"""unique order item per product
+
+Revision ID: 3c5e1f7a9b20
+Revises: 0b4d7b0bcaba
+Create Date: 2026-10-17 09:12:03.114820
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3c5e1f7a9b20'
+down_revision: Union[str, Sequence[str], None] = '0b4d7b0bcaba'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Merge duplicate lines of the same product into the oldest line of each order
+    op.execute("""
+        UPDATE order_items AS keep
+        SET quantity = merged.quantity
+        FROM (
+            SELECT MIN(id) AS id, SUM(quantity) AS quantity
+            FROM order_items
+            GROUP BY order_id, product_id
+            HAVING COUNT(*) > 1
+        ) AS merged
+        WHERE keep.id = merged.id
+    """)
+    op.execute("""
+        DELETE FROM order_items AS duplicate
+        USING order_items AS keep
+        WHERE duplicate.order_id = keep.order_id
+          AND duplicate.product_id = keep.product_id
+          AND duplicate.id > keep.id
+    """)
+
+    # Build the index without blocking cart writes, then promote it to a constraint.
+    # An INVALID index left by a failed earlier build is dropped first.
+    with op.get_context().autocommit_block():
+        op.drop_index('uq_order_items_order_product', table_name='order_items', postgresql_concurrently=True, if_exists=True)
+        op.create_index(
+            'uq_order_items_order_product', 'order_items', ['order_id', 'product_id'],
+            unique=True, postgresql_concurrently=True
+        )
+    op.execute(
+        "ALTER TABLE order_items ADD CONSTRAINT uq_order_items_order_product "
+        "UNIQUE USING INDEX uq_order_items_order_product"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint('uq_order_items_order_product', 'order_items', type_='unique')
@@ -0,0 +1,34 @@
+"""stock batches
+
+Revision ID: 5a7b9c1d3e42
+Revises: 8d2f4a6c1e37
+Create Date: 2026-10-17 11:20:37.904512
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5a7b9c1d3e42'
+down_revision: Union[str, Sequence[str], None] = '8d2f4a6c1e37'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('stock_batches',
+    sa.Column('batch_id', sa.String(), nullable=False),
+    sa.Column('item_count', sa.Integer(), nullable=False),
+    sa.Column('result', sa.JSON(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('batch_id')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('stock_batches')
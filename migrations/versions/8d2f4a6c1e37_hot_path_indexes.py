@@ -0,0 +1,72 @@
+"""hot path indexes
+
+Revision ID: 8d2f4a6c1e37
+Revises: 3c5e1f7a9b20
+Create Date: 2026-10-17 10:04:51.527301
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8d2f4a6c1e37'
+down_revision: Union[str, Sequence[str], None] = '3c5e1f7a9b20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# The unique order_items(order_id, product_id) index is created by 3c5e1f7a9b20.
+# All indexes are built CONCURRENTLY, so each runs outside a transaction and does
+# not block writes. A failed concurrent build leaves an INVALID index behind, so
+# each index is dropped first and a rerun starts clean. The unique cart index
+# fails if a user already has several open carts; merge those carts first.
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_orders_user_id_status', table_name='orders', postgresql_concurrently=True, if_exists=True)
+        op.create_index(
+            'ix_orders_user_id_status', 'orders', ['user_id', 'status'],
+            unique=False, postgresql_concurrently=True
+        )
+        op.drop_index('uq_orders_one_cart_per_user', table_name='orders', postgresql_concurrently=True, if_exists=True)
+        op.create_index(
+            'uq_orders_one_cart_per_user', 'orders', ['user_id'],
+            unique=True, postgresql_where=sa.text("status = 'im_warenkorb'"),
+            postgresql_concurrently=True
+        )
+        op.drop_index('ix_products_name_pattern', table_name='products', postgresql_concurrently=True, if_exists=True)
+        op.create_index(
+            'ix_products_name_pattern', 'products', ['name'],
+            unique=False, postgresql_ops={'name': 'varchar_pattern_ops'},
+            postgresql_concurrently=True
+        )
+        op.drop_index(op.f('ix_invoices_order_id'), table_name='invoices', postgresql_concurrently=True, if_exists=True)
+        op.create_index(
+            op.f('ix_invoices_order_id'), 'invoices', ['order_id'],
+            unique=False, postgresql_concurrently=True
+        )
+        op.drop_index(op.f('ix_reminders_invoice_id'), table_name='reminders', postgresql_concurrently=True, if_exists=True)
+        op.create_index(
+            op.f('ix_reminders_invoice_id'), 'reminders', ['invoice_id'],
+            unique=False, postgresql_concurrently=True
+        )
+        op.drop_index(op.f('ix_shipments_order_id'), table_name='shipments', postgresql_concurrently=True, if_exists=True)
+        op.create_index(
+            op.f('ix_shipments_order_id'), 'shipments', ['order_id'],
+            unique=False, postgresql_concurrently=True
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(op.f('ix_shipments_order_id'), table_name='shipments', postgresql_concurrently=True, if_exists=True)
+        op.drop_index(op.f('ix_reminders_invoice_id'), table_name='reminders', postgresql_concurrently=True, if_exists=True)
+        op.drop_index(op.f('ix_invoices_order_id'), table_name='invoices', postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_products_name_pattern', table_name='products', postgresql_concurrently=True, if_exists=True)
+        op.drop_index('uq_orders_one_cart_per_user', table_name='orders', postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_orders_user_id_status', table_name='orders', postgresql_concurrently=True, if_exists=True)
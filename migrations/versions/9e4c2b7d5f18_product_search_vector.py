@@ -0,0 +1,51 @@
+"""product search vector
+
+Revision ID: 9e4c2b7d5f18
+Revises: 5a7b9c1d3e42
+Create Date: 2026-10-17 14:22:09.318540
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9e4c2b7d5f18'
+down_revision: Union[str, Sequence[str], None] = '5a7b9c1d3e42'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Adding a stored generated column rewrites the products table under an exclusive
+# lock, so run this migration in a maintenance window on large catalogs. The GIN
+# index is built CONCURRENTLY afterwards and does not block writes.
+SEARCH_VECTOR = (
+    "setweight(to_tsvector('german'::regconfig, coalesce(name, '')), 'A') || "
+    "setweight(to_tsvector('english'::regconfig, coalesce(name, '')), 'A') || "
+    "setweight(to_tsvector('german'::regconfig, coalesce(description, '')), 'B') || "
+    "setweight(to_tsvector('english'::regconfig, coalesce(description, '')), 'B')"
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        'products',
+        sa.Column('search_vector', postgresql.TSVECTOR(), sa.Computed(SEARCH_VECTOR, persisted=True), nullable=True)
+    )
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_products_search_vector', table_name='products', postgresql_concurrently=True, if_exists=True)
+        op.create_index(
+            'ix_products_search_vector', 'products', ['search_vector'],
+            unique=False, postgresql_using='gin',
+            postgresql_concurrently=True
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_products_search_vector', table_name='products', postgresql_concurrently=True, if_exists=True)
+    op.drop_column('products', 'search_vector')
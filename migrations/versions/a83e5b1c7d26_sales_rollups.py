@@ -0,0 +1,46 @@
+"""sales rollups
+
+Revision ID: a83e5b1c7d26
+Revises: f5c1d7e9a3b6
+Create Date: 2026-10-17 21:04:37.915260
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a83e5b1c7d26'
+down_revision: Union[str, Sequence[str], None] = 'f5c1d7e9a3b6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# The tables start empty; fill them with `python -m app.jobs.sales_rollup --backfill`.
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('daily_sales',
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('order_count', sa.Integer(), server_default=sa.text('0'), nullable=False),
+    sa.Column('units', sa.Integer(), server_default=sa.text('0'), nullable=False),
+    sa.Column('revenue', sa.Float(), server_default=sa.text('0'), nullable=False),
+    sa.PrimaryKeyConstraint('day')
+    )
+    op.create_table('product_sales',
+    sa.Column('product_id', sa.Integer(), nullable=False),
+    sa.Column('units', sa.Integer(), server_default=sa.text('0'), nullable=False),
+    sa.Column('revenue', sa.Float(), server_default=sa.text('0'), nullable=False),
+    sa.ForeignKeyConstraint(['product_id'], ['products.id'], ),
+    sa.PrimaryKeyConstraint('product_id')
+    )
+    op.create_index('ix_product_sales_units', 'product_sales', ['units', 'product_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_product_sales_units', table_name='product_sales')
+    op.drop_table('product_sales')
+    op.drop_table('daily_sales')
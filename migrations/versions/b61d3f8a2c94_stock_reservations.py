@@ -0,0 +1,43 @@
+"""stock reservations
+
+Revision ID: b61d3f8a2c94
+Revises: 9e4c2b7d5f18
+Create Date: 2026-10-17 15:41:26.702193
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b61d3f8a2c94'
+down_revision: Union[str, Sequence[str], None] = '9e4c2b7d5f18'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# A constant server default is stored in the catalog, so adding products.reserved
+# does not rewrite the table.
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('products', sa.Column('reserved', sa.Integer(), server_default=sa.text('0'), nullable=False))
+    op.create_table('stock_reservations',
+    sa.Column('order_id', sa.Integer(), nullable=False),
+    sa.Column('product_id', sa.Integer(), nullable=False),
+    sa.Column('quantity', sa.Integer(), nullable=False),
+    sa.Column('expires_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['order_id'], ['orders.id'], ),
+    sa.ForeignKeyConstraint(['product_id'], ['products.id'], ),
+    sa.PrimaryKeyConstraint('order_id', 'product_id')
+    )
+    op.create_index(op.f('ix_stock_reservations_expires_at'), 'stock_reservations', ['expires_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_stock_reservations_expires_at'), table_name='stock_reservations')
+    op.drop_table('stock_reservations')
+    op.drop_column('products', 'reserved')
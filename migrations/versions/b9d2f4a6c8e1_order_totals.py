@@ -0,0 +1,57 @@
+"""order totals
+
+Revision ID: b9d2f4a6c8e1
+Revises: a83e5b1c7d26
+Create Date: 2026-10-17 21:48:12.407316
+
+"""
+import os
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b9d2f4a6c8e1'
+down_revision: Union[str, Sequence[str], None] = 'a83e5b1c7d26'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Existing orders are backfilled in id-range chunks, each committed on its own, so no
+# transaction holds the locks of the whole table. Orders without items keep the default 0.
+# Items written by workers still running the old code during the rollout are caught by
+# `python -m app.order.order_totals --repair` afterwards.
+BACKFILL_BATCH_SIZE = int(os.getenv("ORDER_TOTALS_BATCH_SIZE", "5000"))
+
+BACKFILL_CHUNK = sa.text("""
+    UPDATE orders o
+    SET total_amount = e.total_amount, item_count = e.item_count
+    FROM (
+        SELECT order_id AS id,
+               round(CAST(sum(quantity * unit_price) AS numeric), 2) AS total_amount,
+               sum(quantity) AS item_count
+        FROM order_items
+        WHERE order_id > :last_id AND order_id <= :max_id
+        GROUP BY order_id
+    ) AS e
+    WHERE o.id = e.id
+""")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('orders', sa.Column('total_amount', sa.Float(), server_default=sa.text('0'), nullable=False))
+    op.add_column('orders', sa.Column('item_count', sa.Integer(), server_default=sa.text('0'), nullable=False))
+
+    with op.get_context().autocommit_block():
+        bind = op.get_bind()
+        max_order_id = bind.execute(sa.text("SELECT coalesce(max(id), 0) FROM orders")).scalar()
+        for last_id in range(0, max_order_id, BACKFILL_BATCH_SIZE):
+            bind.execute(BACKFILL_CHUNK, {"last_id": last_id, "max_id": last_id + BACKFILL_BATCH_SIZE})
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('orders', 'item_count')
+    op.drop_column('orders', 'total_amount')
@@ -0,0 +1,32 @@
+"""optimistic versioning
+
+Revision ID: c4a8e2f61b07
+Revises: b61d3f8a2c94
+Create Date: 2026-10-17 16:58:12.460385
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4a8e2f61b07'
+down_revision: Union[str, Sequence[str], None] = 'b61d3f8a2c94'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Constant server defaults do not rewrite the tables; existing rows start at version 1.
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('products', sa.Column('version', sa.Integer(), server_default=sa.text('1'), nullable=False))
+    op.add_column('orders', sa.Column('version', sa.Integer(), server_default=sa.text('1'), nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('orders', 'version')
+    op.drop_column('products', 'version')
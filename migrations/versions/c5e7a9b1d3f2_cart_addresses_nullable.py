@@ -0,0 +1,43 @@
+"""cart addresses nullable
+
+Revision ID: c5e7a9b1d3f2
+Revises: b9d2f4a6c8e1
+Create Date: 2026-10-18 09:12:40.118734
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c5e7a9b1d3f2'
+down_revision: Union[str, Sequence[str], None] = 'b9d2f4a6c8e1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Carts can be opened before the user has an address; completed orders still need both.
+# Carts without an address have to be removed before a downgrade can restore NOT NULL.
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.alter_column('orders', 'shipping_address_id', existing_type=sa.Integer(), nullable=True)
+    op.alter_column('orders', 'billing_address_id', existing_type=sa.Integer(), nullable=True)
+    op.create_check_constraint(
+        'ck_orders_addresses_after_checkout', 'orders',
+        "status = 'im_warenkorb' OR (shipping_address_id IS NOT NULL AND billing_address_id IS NOT NULL)"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint('ck_orders_addresses_after_checkout', 'orders', type_='check')
+    op.execute("DELETE FROM stock_reservations WHERE order_id IN "
+               "(SELECT id FROM orders WHERE shipping_address_id IS NULL OR billing_address_id IS NULL)")
+    op.execute("DELETE FROM order_items WHERE order_id IN "
+               "(SELECT id FROM orders WHERE shipping_address_id IS NULL OR billing_address_id IS NULL)")
+    op.execute("DELETE FROM orders WHERE shipping_address_id IS NULL OR billing_address_id IS NULL")
+    op.alter_column('orders', 'billing_address_id', existing_type=sa.Integer(), nullable=False)
+    op.alter_column('orders', 'shipping_address_id', existing_type=sa.Integer(), nullable=False)
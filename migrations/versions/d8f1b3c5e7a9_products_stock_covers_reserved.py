@@ -0,0 +1,33 @@
+"""products stock covers reserved
+
+Revision ID: d8f1b3c5e7a9
+Revises: c5e7a9b1d3f2
+Create Date: 2026-10-18 14:05:22.503117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd8f1b3c5e7a9'
+down_revision: Union[str, Sequence[str], None] = 'c5e7a9b1d3f2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Added as NOT VALID first so only the brief catalog change holds the exclusive lock;
+# VALIDATE then scans existing rows under a lock that still allows reads and writes.
+# It fails if a product already has less stock than reserved; fix those rows and rerun.
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("ALTER TABLE products ADD CONSTRAINT ck_products_stock_covers_reserved "
+               "CHECK (stock >= reserved) NOT VALID")
+    op.execute("ALTER TABLE products VALIDATE CONSTRAINT ck_products_stock_covers_reserved")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint('ck_products_stock_covers_reserved', 'products', type_='check')
@@ -0,0 +1,47 @@
+"""job queue
+
+Revision ID: e2b6c8d4f1a9
+Revises: d7f3a9c5e8b2
+Create Date: 2026-10-17 19:12:08.230571
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e2b6c8d4f1a9'
+down_revision: Union[str, Sequence[str], None] = 'd7f3a9c5e8b2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('jobs',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('kind', sa.String(), nullable=False),
+    sa.Column('payload', sa.JSON(), nullable=False),
+    sa.Column('dedupe_key', sa.String(), nullable=True),
+    sa.Column('status', sa.String(), server_default=sa.text("'queued'"), nullable=False),
+    sa.Column('attempts', sa.Integer(), server_default=sa.text('0'), nullable=False),
+    sa.Column('max_attempts', sa.Integer(), server_default=sa.text('5'), nullable=False),
+    sa.Column('run_at', sa.DateTime(), nullable=False),
+    sa.Column('last_error', sa.String(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('finished_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('dedupe_key')
+    )
+    op.create_index('ix_jobs_queued_run_at', 'jobs', ['run_at'], unique=False,
+                    postgresql_where=sa.text("status = 'queued'"))
+    op.add_column('shipments', sa.Column('status', sa.String(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('shipments', 'status')
+    op.drop_index('ix_jobs_queued_run_at', table_name='jobs', postgresql_where=sa.text("status = 'queued'"))
+    op.drop_table('jobs')
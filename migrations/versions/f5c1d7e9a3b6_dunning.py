@@ -0,0 +1,51 @@
+"""dunning
+
+Revision ID: f5c1d7e9a3b6
+Revises: e2b6c8d4f1a9
+Create Date: 2026-10-17 20:26:51.648093
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f5c1d7e9a3b6'
+down_revision: Union[str, Sequence[str], None] = 'e2b6c8d4f1a9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# The partial index is built CONCURRENTLY, so it does not block invoice writes.
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('invoices', sa.Column('dunning_level', sa.Integer(), server_default=sa.text('0'), nullable=False))
+    op.add_column('invoices', sa.Column('last_reminded_at', sa.Date(), nullable=True))
+    op.create_table('dunning_runs',
+    sa.Column('run_date', sa.Date(), nullable=False),
+    sa.Column('last_invoice_date', sa.Date(), nullable=True),
+    sa.Column('last_invoice_id', sa.Integer(), nullable=True),
+    sa.Column('reminders_created', sa.Integer(), server_default=sa.text('0'), nullable=False),
+    sa.Column('started_at', sa.DateTime(), nullable=True),
+    sa.Column('finished_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('run_date')
+    )
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_invoices_unpaid_invoice_date', table_name='invoices', postgresql_concurrently=True, if_exists=True)
+        op.create_index(
+            'ix_invoices_unpaid_invoice_date', 'invoices', ['invoice_date', 'id'],
+            unique=False, postgresql_where=sa.text('NOT is_paid'),
+            postgresql_concurrently=True
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_invoices_unpaid_invoice_date', table_name='invoices', postgresql_concurrently=True, if_exists=True)
+    op.drop_table('dunning_runs')
+    op.drop_column('invoices', 'last_reminded_at')
+    op.drop_column('invoices', 'dunning_level')
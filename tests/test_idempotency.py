@@ -0,0 +1,124 @@
+import asyncio
+from types import SimpleNamespace
+import pytest
+from fastapi import HTTPException
+import app.idempotency as idempotency
+from app.idempotency import run_idempotent, in_progress_error, stored_outcome
+
+
+class FakeClaim:
+    """
+    In-memory stand-in for IdempotencyClaim: a claimed key without a response
+    counts as in flight, as if its row were still locked by the first request.
+    """
+    rows = {}
+
+    def __init__(self, db, scope, key, fingerprint):
+        self.identity = (scope, key)
+        self.fingerprint = fingerprint
+
+    def acquire(self):
+        stored = self.rows.get(self.identity)
+        if stored is None:
+            self.rows[self.identity] = SimpleNamespace(request_hash=self.fingerprint, status_code=None, response=None)
+            return None
+        if stored.status_code is None:
+            raise in_progress_error()
+        return stored_outcome(stored, self.fingerprint)
+
+    def complete(self, status_code, body):
+        self.rows[self.identity] = SimpleNamespace(request_hash=self.fingerprint, status_code=status_code, response=body)
+
+    def release(self):
+        self.rows.pop(self.identity, None)
+
+
+@pytest.fixture(autouse=True)
+def fake_claims(monkeypatch):
+    FakeClaim.rows = {}
+    monkeypatch.setattr(idempotency, "IdempotencyClaim", FakeClaim)
+
+
+def run(scope, key, payload, call):
+    return asyncio.run(run_idempotent(object(), scope, key, payload, call))
+
+
+def counting(result=None, error=None):
+    calls = []
+
+    async def call():
+        calls.append(1)
+        if error is not None:
+            raise error
+        return result
+    return call, calls
+
+
+def test_replay_returns_stored_response_without_running_again():
+    call, calls = counting({"message": "Product added to cart"})
+    payload = {"user_id": 1, "product_id": 7, "quantity": 2}
+
+    assert run("cart_add:1", "abc", payload, call) == {"message": "Product added to cart"}
+    replay = run("cart_add:1", "abc", payload, call)
+
+    assert len(calls) == 1
+    assert replay.status_code == 200
+    assert replay.headers["Idempotent-Replayed"] == "true"
+    assert replay.body == b'{"message":"Product added to cart"}'
+
+
+def test_key_in_flight_is_rejected_with_409():
+    payload = {"user_id": 1}
+    FakeClaim(None, "checkout:1", "abc", idempotency.request_fingerprint("checkout:1", payload)).acquire()
+    call, calls = counting({"message": "ok"})
+
+    with pytest.raises(HTTPException) as error:
+        run("checkout:1", "abc", payload, call)
+
+    assert error.value.status_code == 409
+    assert calls == []
+
+
+def test_client_error_is_stored_and_replayed():
+    call, calls = counting(error=HTTPException(status_code=404, detail="Product not found"))
+    payload = {"user_id": 1, "product_id": 99, "quantity": 1}
+
+    with pytest.raises(HTTPException):
+        run("cart_add:1", "abc", payload, call)
+    replay = run("cart_add:1", "abc", payload, call)
+
+    assert len(calls) == 1
+    assert replay.status_code == 404
+    assert replay.body == b'{"detail":"Product not found"}'
+
+
+def test_server_error_releases_the_key():
+    call, calls = counting(error=HTTPException(status_code=500, detail="boom"))
+    payload = {"user_id": 1}
+
+    for _ in range(2):
+        with pytest.raises(HTTPException):
+            run("checkout:1", "abc", payload, call)
+
+    assert len(calls) == 2
+
+
+def test_reused_key_with_different_body_is_rejected_with_422():
+    call, calls = counting({"message": "ok"})
+    run("cart_add:1", "abc", {"user_id": 1, "product_id": 7, "quantity": 1}, call)
+
+    with pytest.raises(HTTPException) as error:
+        run("cart_add:1", "abc", {"user_id": 1, "product_id": 7, "quantity": 5}, call)
+
+    assert error.value.status_code == 422
+    assert len(calls) == 1
+
+
+def test_same_key_of_another_user_runs_separately():
+    call, calls = counting({"message": "ok"})
+
+    run("cart_add:1", "abc", {"user_id": 1, "product_id": 7, "quantity": 1}, call)
+    result = run("cart_add:2", "abc", {"user_id": 2, "product_id": 7, "quantity": 1}, call)
+
+    assert result == {"message": "ok"}
+    assert len(calls) == 2